@@ -0,0 +1,192 @@
+"""
+AlgoArena Build Artifacts
+Compile-once cache of built submissions for the local judge backend.
+
+Keys are (language, sha256 of the full harness source). The tests travel
+on stdin, so one build serves every test case, every judging policy and
+every identical resubmission until it is evicted (LRU, one directory per
+build). Concurrent submissions of the same source share one build, and
+compiler errors are cached like builds (they are just as deterministic);
+timeouts are not.
+
+Compilers read whatever the source asks for (`#include "/any/file"` shows
+up in the error output), so with a sandbox they run inside one too, with
+write access to their build directory only.
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+
+# Compiler output kept for the error message
+BUILD_OUTPUT_LIMIT = 16 * 1024
+
+
+class BuildFailed(Exception):
+    """The submission did not compile; the message is the compiler output."""
+
+
+class Artifact:
+    __slots__ = ("path", "build_ms", "error")
+
+    def __init__(self, path: str, build_ms: float, error: str = None):
+        self.path = path
+        self.build_ms = build_ms
+        self.error = error
+
+
+def _limit_compiler(cpu_time_sec: int, max_processes: int = 0):
+    def apply():
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_time_sec, cpu_time_sec + 1))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        if max_processes:
+            resource.setrlimit(resource.RLIMIT_NPROC, (max_processes, max_processes))
+
+    return apply
+
+
+class ArtifactCache:
+    def __init__(
+        self, max_entries: int = 256, compile_time_sec: float = 30.0, sandbox=None
+    ):
+        self.max_entries = max_entries
+        self.compile_time_sec = compile_time_sec
+        self.sandbox = sandbox
+        self.root = None
+        self._entries = OrderedDict()  # key -> Artifact
+        self._building = {}  # key -> Task, for builds in progress
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # waited on someone else's build
+        self.failures = 0
+        self.evictions = 0
+        self.build_ms_total = 0.0
+
+    @staticmethod
+    def make_key(language: str, source: str) -> tuple:
+        return (language, hashlib.sha256(source.encode()).hexdigest())
+
+    async def get(self, adapter, source: str, build_command: list):
+        """
+        Returns (artifact, built_now). Raises BuildFailed with the compiler
+        output. `build_command` is adapter.build_command() with the compiler
+        resolved to a full path.
+        """
+        key = self.make_key(adapter.name, source)
+
+        artifact = self._entries.get(key)
+        if artifact is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if artifact.error is not None:
+                raise BuildFailed(artifact.error)
+            return artifact, False
+
+        task = self._building.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._build(key, adapter, source, build_command))
+            self._building[key] = task
+            task.add_done_callback(lambda _: self._building.pop(key, None))
+            built_now = True
+        else:
+            self.shared += 1
+            built_now = False
+
+        # Shielded, so one cancelled waiter doesn't abort the build for the rest
+        return await asyncio.shield(task), built_now
+
+    async def _build(self, key: tuple, adapter, source: str, build_command: list):
+        if self.root is None:
+            self.root = tempfile.mkdtemp(prefix="algoarena-builds-")
+        workdir = tempfile.mkdtemp(prefix=f"{adapter.name}-", dir=self.root)
+        with open(f"{workdir}/{adapter.filename}", "w") as f:
+            f.write(source)
+
+        argv = build_command
+        max_processes = 0
+        uid = mounts = None
+        if self.sandbox is not None:
+            uid = self.sandbox.acquire_uid()
+            os.chown(workdir, uid, uid)
+            mounts = tempfile.mkdtemp(prefix="algoarena-compile-")
+            argv = self.sandbox.wrap(build_command, mounts, uid, work=workdir)
+            max_processes = self.sandbox.max_processes
+
+        started = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                cwd=workdir,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True,
+                preexec_fn=_limit_compiler(int(self.compile_time_sec), max_processes),
+            )
+            try:
+                output, _ = await asyncio.wait_for(
+                    process.communicate(), timeout=self.compile_time_sec
+                )
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                shutil.rmtree(workdir, ignore_errors=True)
+                self.failures += 1
+                raise BuildFailed(f"Compilation timed out ({self.compile_time_sec}s)")
+        finally:
+            if mounts is not None:
+                shutil.rmtree(mounts, ignore_errors=True)
+                self.sandbox.release_uid(uid)
+        build_ms = (time.perf_counter() - started) * 1000
+        self.build_ms_total += build_ms
+
+        if process.returncode != 0:
+            shutil.rmtree(workdir, ignore_errors=True)
+            self.failures += 1
+            message = output[:BUILD_OUTPUT_LIMIT].decode(errors="replace").strip()
+            self._store(key, Artifact(None, build_ms, message or "Compilation failed"))
+            raise BuildFailed(message or "Compilation failed")
+
+        artifact = Artifact(workdir, build_ms)
+        self._store(key, artifact)
+        return artifact
+
+    def _store(self, key: tuple, artifact: Artifact):
+        self._entries[key] = artifact
+        self._entries.move_to_end(key)
+
+        # The newest build is always kept, its run hasn't started yet
+        while len(self._entries) > max(self.max_entries, 1):
+            _, evicted = self._entries.popitem(last=False)
+            if evicted.path:
+                shutil.rmtree(evicted.path, ignore_errors=True)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        if self.root is not None:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.root = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.shared
+        builds = self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "failures": self.failures,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.shared) / lookups, 4) if lookups else 0.0,
+            "avg_build_ms": round(self.build_ms_total / builds, 3) if builds else 0.0,
+        }
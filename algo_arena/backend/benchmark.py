@@ -0,0 +1,419 @@
+"""
+AlgoArena Load Test / Benchmark
+Runs socket_app in-process against a fake Piston and reports event latencies
+
+Every simulated pair goes through the same flow as test_sockets.py:
+create room -> identify -> join_room -> submit_code -> match_ended.
+The fake execution engine answers with a random latency (lognormal around
+--latency-ms) and can be told to fail a share of the runs, so the numbers
+reflect the server and not the network to a real Piston.
+
+Usage:
+    python benchmark.py --pairs 50 --rounds 4 --latency-ms 80 --output bench.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+# =====================================================
+# FAKE PISTON
+# =====================================================
+
+
+def build_fake_piston(latency_ms: float, sigma: float, fail_rate: float, crash_rate: float):
+    """
+    Minimal ASGI app that speaks Piston's /execute API.
+
+    - fail_rate: share of runs answered with HTTP 500
+    - crash_rate: share of runs that come back with stderr (a user-code crash)
+    Everything else answers with one result frame per test in the job on stdin.
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    from harness import encode_frame
+
+    fake = FastAPI()
+    median_sec = max(latency_ms, 0.001) / 1000
+
+    @fake.post("/api/v2/execute")
+    async def execute(request: Request):
+        payload = await request.json()
+        await asyncio.sleep(random.lognormvariate(math.log(median_sec), sigma))
+
+        roll = random.random()
+        if roll < fail_rate:
+            return JSONResponse({"message": "internal error"}, status_code=500)
+        if roll < fail_rate + crash_rate:
+            return {
+                "run": {
+                    "stdout": "",
+                    "stderr": "Traceback (most recent call last):\nRuntimeError: boom",
+                    "code": 1,
+                    "signal": None,
+                }
+            }
+
+        tests = json.loads(payload.get("stdin") or "{}").get("tests", [])
+        records = [
+            {"i": i, "actual": None, "wall_ms": 0.05, "cpu_ms": 0.05}
+            for i in range(len(tests))
+        ]
+        records.append({"done": True})
+        return {
+            "run": {
+                "stdout": b"".join(map(encode_frame, records)).decode(),
+                "stderr": "",
+                "code": 0,
+                "signal": None,
+            }
+        }
+
+    return fake
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def serve(app, port: int):
+    import uvicorn
+
+    config = uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"
+    )
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+# =====================================================
+# SIMULATED PLAYER
+# =====================================================
+
+
+class Player:
+    def __init__(self, base_url: str, username: str, timeout_sec: float):
+        import socketio
+
+        self.base_url = base_url
+        self.username = username
+        self.timeout_sec = timeout_sec
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.inbox = []
+        self.arrived = asyncio.Event()
+
+        @self.client.on("*")
+        async def on_any(event, data=None):
+            self.inbox.append((event, data))
+            self.arrived.set()
+
+    async def wait_for(self, event: str, match=lambda data: True):
+        """Waits for `event`; a server "error" emit fails the step instead."""
+        deadline = time.perf_counter() + self.timeout_sec
+        while True:
+            for i, (name, data) in enumerate(self.inbox):
+                if name == "error":
+                    del self.inbox[i]
+                    raise RuntimeError(f"server error: {data}")
+                if name == event and match(data):
+                    del self.inbox[i]
+                    return data
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError(f"no {event} within {self.timeout_sec}s")
+            self.arrived.clear()
+            try:
+                await asyncio.wait_for(self.arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def request(self, stats, step: str, emit: str, data, event: str, match=None):
+        started = time.perf_counter()
+        await self.client.emit(emit, data)
+        reply = await self.wait_for(event, match or (lambda data: True))
+        stats.record(step, time.perf_counter() - started)
+        return reply
+
+
+# =====================================================
+# STATS
+# =====================================================
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank, good enough for a few thousand samples
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Stats:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.verdicts = {}
+
+    def record(self, step: str, seconds: float):
+        self.samples.setdefault(step, []).append(seconds * 1000)
+
+    def error(self, step: str, message: str):
+        bucket = self.errors.setdefault(step, {})
+        bucket[message] = bucket.get(message, 0) + 1
+
+    def summary(self) -> dict:
+        events = {}
+        for step, values in self.samples.items():
+            values = sorted(values)
+            events[step] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+                "p99_ms": round(percentile(values, 99), 3),
+                "mean_ms": round(statistics.fmean(values), 3),
+                "max_ms": round(values[-1], 3),
+            }
+        return events
+
+
+# =====================================================
+# SCENARIO
+# =====================================================
+
+
+async def play_match(http, base_url: str, pair_id: str, args, stats: Stats) -> bool:
+    first = Player(base_url, f"bench_{pair_id}_a", args.timeout_sec)
+    second = Player(base_url, f"bench_{pair_id}_b", args.timeout_sec)
+    step = "create_room"
+
+    try:
+        started = time.perf_counter()
+        response = await http.post(
+            f"{base_url}/rooms",
+            json={
+                "username": first.username,
+                "difficulty": args.difficulty,
+                "time_limit_sec": 600,
+            },
+        )
+        response.raise_for_status()
+        room_id = response.json()["room_id"]
+        stats.record(step, time.perf_counter() - started)
+
+        step = "connect"
+        for player in (first, second):
+            started = time.perf_counter()
+            await player.client.connect(base_url, transports=["websocket"])
+            stats.record(step, time.perf_counter() - started)
+
+        step = "identify"
+        for player in (first, second):
+            await player.request(
+                stats, step, "identify", {"username": player.username}, "identified"
+            )
+
+        step = "join_room"
+        await first.request(
+            stats, step, "join_room", {"room_id": room_id}, "room_snapshot"
+        )
+        await second.request(
+            stats,
+            step,
+            "join_room",
+            {"room_id": room_id},
+            "room_snapshot",
+            lambda data: data.get("status") == "active",
+        )
+
+        step = "submit_code"
+        match_started = time.perf_counter()
+
+        async def submit(player: Player):
+            # Unique code per player, so the judge cache can't short-circuit it.
+            # Code, not a comment: the cache key ignores comments
+            salt = "" if args.cache_hits else f"\n_salt = {player.username!r}"
+            code = f"def solution(**kwargs):\n    return None{salt}\n"
+            update = await player.request(
+                stats,
+                "submission_update",
+                "submit_code",
+                {"room_id": room_id, "code": code},
+                "submission_update",
+                lambda data: data.get("username") == player.username,
+            )
+            status = update["submission"]["status"]
+            stats.verdicts[status] = stats.verdicts.get(status, 0) + 1
+
+        await asyncio.gather(submit(first), submit(second))
+
+        step = "match_ended"
+        await asyncio.gather(
+            first.wait_for("match_ended"), second.wait_for("match_ended")
+        )
+        stats.record(step, time.perf_counter() - match_started)
+        return True
+
+    except Exception as e:
+        stats.error(step, str(e) or type(e).__name__)
+        return False
+
+    finally:
+        for player in (first, second):
+            with contextlib.suppress(Exception):
+                await player.client.disconnect()
+
+
+async def run_benchmark(args) -> dict:
+    import httpx
+
+    piston_port = free_port()
+    arena_port = free_port()
+
+    # main reads its configuration at import time
+    os.environ["JUDGE_BACKEND"] = "piston"
+    os.environ["PISTON_API_URL"] = f"http://127.0.0.1:{piston_port}/api/v2/execute"
+    os.environ.setdefault("JUDGE_QUEUE_SIZE", str(max(100, args.pairs * 4)))
+    # Every bench player comes from 127.0.0.1, so per-address budgets would
+    # turn the load into 429s; the limiter is off unless asked for
+    from rate_limit import DEFAULT_BUDGETS
+
+    for event in DEFAULT_BUDGETS:
+        os.environ.setdefault(f"RATE_LIMIT_{event.upper()}", "0")
+    # Bench players shouldn't end up in the real ratings log
+    os.environ.setdefault("RATINGS_PATH", "")
+    # History is written for real (it is on the submit path), just not next to the code
+    os.environ.setdefault(
+        "HISTORY_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="algoarena-bench-"), "history.db")
+    )
+
+    # The server's [LOG] lines would swamp the report
+    log_sink = sys.stdout if args.verbose else io.StringIO()
+    with contextlib.redirect_stdout(log_sink):
+        import main
+
+        fake = build_fake_piston(
+            args.latency_ms, args.latency_sigma, args.fail_rate, args.crash_rate
+        )
+        piston_server, piston_task = await serve(fake, piston_port)
+        arena_server, arena_task = await serve(main.socket_app, arena_port)
+
+        base_url = f"http://127.0.0.1:{arena_port}"
+        stats = Stats()
+        completed = failed = 0
+
+        try:
+            async with httpx.AsyncClient(timeout=args.timeout_sec) as http:
+
+                async def pair_worker(slot: int):
+                    nonlocal completed, failed
+                    for round_no in range(args.rounds):
+                        ok = await play_match(
+                            http, base_url, f"{slot}_{round_no}", args, stats
+                        )
+                        if ok:
+                            completed += 1
+                        else:
+                            failed += 1
+
+                started = time.perf_counter()
+                await asyncio.gather(*(pair_worker(i) for i in range(args.pairs)))
+                duration = time.perf_counter() - started
+
+                judge_stats = (await http.get(f"{base_url}/judge/stats")).json()
+        finally:
+            arena_server.should_exit = True
+            piston_server.should_exit = True
+            await asyncio.gather(arena_task, piston_task, return_exceptions=True)
+
+    return {
+        "config": {
+            "pairs": args.pairs,
+            "rounds": args.rounds,
+            "difficulty": args.difficulty,
+            "latency_ms": args.latency_ms,
+            "latency_sigma": args.latency_sigma,
+            "fail_rate": args.fail_rate,
+            "crash_rate": args.crash_rate,
+            "cache_hits": args.cache_hits,
+        },
+        "duration_sec": round(duration, 3),
+        "matches_completed": completed,
+        "matches_failed": failed,
+        "throughput": {
+            "matches_per_sec": round(completed / duration, 3),
+            "submissions_per_sec": round(2 * completed / duration, 3),
+        },
+        "events": stats.summary(),
+        "verdicts": stats.verdicts,
+        "errors": stats.errors,
+        "judge": judge_stats,
+    }
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 60)
+    print("  ALGOARENA BENCHMARK")
+    print("=" * 60)
+    print(
+        f"Matches: {report['matches_completed']} ok, {report['matches_failed']} failed "
+        f"in {report['duration_sec']}s "
+        f"({report['throughput']['matches_per_sec']} matches/s)"
+    )
+    print(f"Verdicts: {report['verdicts']}")
+    print(f"\n{'event':<20}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for event, row in report["events"].items():
+        print(
+            f"{event:<20}{row['count']:>7}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    for step, messages in report["errors"].items():
+        for message, count in messages.items():
+            print(f"❌ {step}: {message} (x{count})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=20, help="concurrent player pairs")
+    parser.add_argument("--rounds", type=int, default=3, help="matches per pair")
+    parser.add_argument("--difficulty", default="easy")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median engine latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal spread")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of HTTP 500s")
+    parser.add_argument("--crash-rate", type=float, default=0.0, help="share of runs with stderr")
+    parser.add_argument("--cache-hits", action="store_true", help="submit identical code")
+    parser.add_argument("--timeout-sec", type=float, default=30.0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--verbose", action="store_true", help="keep the server logs")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if not args.cache_hits:
+        # Every submission was unique, so a hit means the salt stopped working
+        hits = report["judge"]["cache"]["hits"]
+        assert hits == 0, f"{hits} judge cache hits without --cache-hits"
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
@@ -0,0 +1,263 @@
+"""
+AlgoArena Problem Catalog
+Indexed, hot-reloadable view over problems.json.
+
+Every load builds an immutable snapshot (id index, difficulty buckets,
+listing indexes and pre-serialized API payloads with their ETags). Reloading
+swaps the whole snapshot in one assignment, so a request never sees a
+half-updated catalog.
+
+Listings are ordered by problem id and paged with an opaque cursor (the last
+id served), so pages stay stable across reloads. Every filter maps to a
+sorted list of positions in that order: difficulty and tag lists are built
+up front, a title prefix is a bisect over the sorted titles.
+"""
+
+import asyncio
+import base64
+import bisect
+import hashlib
+import json
+import os
+import random
+
+from harness import JudgeHarness, problem_signature
+from languages import starter_codes
+
+SUMMARY_FIELDS = ("id", "title", "difficulty", "tags")
+DETAIL_FIELDS = (
+    "id",
+    "title",
+    "difficulty",
+    "tags",
+    "description",
+    "starter_code",
+    "public_tests",
+)
+
+
+def encode_cursor(problem_id: str) -> str:
+    return base64.urlsafe_b64encode(problem_id.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """Raises ValueError for anything encode_cursor() didn't produce."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        problem_id = base64.b64decode(padded, altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not problem_id:
+        raise ValueError("Invalid cursor")
+    return problem_id
+
+
+def _contains(positions: list, position: int) -> bool:
+    i = bisect.bisect_left(positions, position)
+    return i < len(positions) and positions[i] == position
+
+
+class CatalogSnapshot:
+    def __init__(self, problems: list, version: str):
+        self.version = version
+        self.problems = problems
+
+        self.by_id = {}
+        self.by_difficulty = {}
+        self.summaries = []
+        self.summaries_by_difficulty = {}
+        self.details_json = {}
+        self.details_etag = {}
+        self._harnesses = {}
+
+        for problem in problems:
+            problem.setdefault("tags", [])
+            difficulty = problem["difficulty"].lower()
+            summary = {key: problem[key] for key in SUMMARY_FIELDS}
+            details = {key: problem.get(key) for key in DETAIL_FIELDS}
+            # Starter code per language that can judge it (typed ones need a signature)
+            details["starter_codes"] = starter_codes(problem, problem_signature(problem))
+            details["languages"] = list(details["starter_codes"])
+
+            self.by_id[problem["id"]] = problem
+            self.by_difficulty.setdefault(difficulty, []).append(problem)
+            self.summaries.append(summary)
+            self.summaries_by_difficulty.setdefault(difficulty, []).append(summary)
+            # Problems are immutable between reloads, so encode the response once
+            payload = json.dumps(details).encode()
+            self.details_json[problem["id"]] = payload
+            self.details_etag[problem["id"]] = f'"{hashlib.sha256(payload).hexdigest()[:16]}"'
+
+        # Listing indexes, all in id order (position = index into self.ordered)
+        self.ordered = sorted(self.summaries, key=lambda summary: summary["id"])
+        self.ordered_ids = [summary["id"] for summary in self.ordered]
+        self.positions_by_difficulty = {}
+        self.positions_by_tag = {}
+        self.titles = []  # sorted (lowercased title, position)
+        for position, summary in enumerate(self.ordered):
+            difficulty = summary["difficulty"].lower()
+            self.positions_by_difficulty.setdefault(difficulty, []).append(position)
+            for tag in summary["tags"]:
+                self.positions_by_tag.setdefault(tag.lower(), []).append(position)
+            self.titles.append((summary["title"].lower(), position))
+        self.titles.sort()
+
+    def title_positions(self, prefix: str) -> list:
+        prefix = prefix.lower()
+        lo = bisect.bisect_left(self.titles, (prefix,))
+        hi = bisect.bisect_left(self.titles, (prefix + "\uffff",))
+        return sorted(position for _, position in self.titles[lo:hi])
+
+    def page(self, difficulty=None, tags=(), title_prefix=None, limit=10, after=None):
+        """
+        (summaries, total matching, id of the last one if more follow).
+        Problems must match every filter; `after` is the last id of the
+        previous page (it doesn't have to exist any more).
+        """
+        filters = []
+        if difficulty:
+            filters.append(self.positions_by_difficulty.get(difficulty.lower(), []))
+        for tag in tags:
+            filters.append(self.positions_by_tag.get(tag.lower(), []))
+        if title_prefix:
+            filters.append(self.title_positions(title_prefix))
+
+        if not filters:
+            matches = range(len(self.ordered))
+        else:
+            # Walk the shortest list, probe the others by bisect
+            filters.sort(key=len)
+            matches = [
+                position
+                for position in filters[0]
+                if all(_contains(other, position) for other in filters[1:])
+            ]
+
+        start = 0
+        if after is not None:
+            first = bisect.bisect_right(self.ordered_ids, after)
+            start = bisect.bisect_left(matches, first)
+
+        positions = matches[start : start + limit]
+        items = [self.ordered[position] for position in positions]
+        more = start + limit < len(matches)
+        return items, len(matches), items[-1]["id"] if more and items else None
+
+    def harness(self, problem_id: str):
+        # Built lazily on first judge, then reused until the next reload
+        harness = self._harnesses.get(problem_id)
+        if harness is None and problem_id in self.by_id:
+            harness = JudgeHarness(self.by_id[problem_id])
+            self._harnesses[problem_id] = harness
+        return harness
+
+
+class ProblemCatalog:
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime = None
+        self._snapshot = CatalogSnapshot([], version="empty")
+        # (lookup, "hit" | "miss") -> count, read by /metrics
+        self.lookups = {}
+        self.reload()
+
+    def _count(self, lookup: str, found) -> None:
+        key = (lookup, "hit" if found else "miss")
+        self.lookups[key] = self.lookups.get(key, 0) + 1
+
+    # -------------------------------------------------
+    # Lookups (all O(1) apart from slicing the result)
+    # -------------------------------------------------
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    def get(self, problem_id: str):
+        problem = self._snapshot.by_id.get(problem_id)
+        self._count("get", problem)
+        return problem
+
+    def harness(self, problem_id: str):
+        harness = self._snapshot.harness(problem_id)
+        self._count("harness", harness)
+        return harness
+
+    def details_json(self, problem_id: str):
+        payload = self._snapshot.details_json.get(problem_id)
+        self._count("details", payload)
+        return payload
+
+    def details_etag(self, problem_id: str):
+        return self._snapshot.details_etag.get(problem_id)
+
+    def page(self, difficulty=None, tags=(), title_prefix=None, limit=10, cursor=None):
+        """(summaries, total, next_cursor). Raises ValueError for a bad cursor."""
+        after = decode_cursor(cursor) if cursor else None
+        items, total, last_id = self._snapshot.page(
+            difficulty, tags, title_prefix, limit, after
+        )
+        self._count("page", items)
+        return items, total, encode_cursor(last_id) if last_id else None
+
+    def summaries(self, difficulty: str = None, limit: int = None) -> list:
+        snapshot = self._snapshot
+        if difficulty:
+            items = snapshot.summaries_by_difficulty.get(difficulty.lower(), [])
+        else:
+            items = snapshot.summaries
+        self._count("summaries", items)
+        return items[:limit] if limit is not None else list(items)
+
+    def random_problem(self, difficulty: str):
+        bucket = self._snapshot.by_difficulty.get(difficulty.lower())
+        self._count("random", bucket)
+        if not bucket:
+            return None
+        return random.choice(bucket)
+
+    def __len__(self):
+        return len(self._snapshot.problems)
+
+    # -------------------------------------------------
+    # Reloading
+    # -------------------------------------------------
+    def reload(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, "rb") as f:
+            raw = f.read()
+
+        problems = json.loads(raw)
+        version = hashlib.sha256(raw).hexdigest()[:16]
+
+        # Build fully before publishing, then swap in a single assignment
+        self._snapshot = CatalogSnapshot(problems, version)
+        self._mtime = mtime
+
+    def reload_if_changed(self) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+        if mtime == self._mtime:
+            return False
+
+        try:
+            self.reload()
+        except (ValueError, KeyError) as e:
+            # Keep serving the last good snapshot if the new file is broken
+            print(f"[LOG] Problem catalog reload failed, keeping old version: {e}")
+            self._mtime = mtime
+            return False
+
+        print(f"[LOG] Problem catalog reloaded ({len(self)} problems, v{self.version})")
+        return True
+
+    async def watch(self, interval_sec: float = 5.0):
+        while True:
+            await asyncio.sleep(interval_sec)
+            self.reload_if_changed()
@@ -0,0 +1,43 @@
+"""
+AlgoArena Event Coalescing
+Batches high-frequency updates so the socket sees at most one emit per interval.
+"""
+
+import asyncio
+
+
+class EventCoalescer:
+    """
+    Collects items with add() and hands them to `emit(batch)` at most once
+    every `interval_sec`. The first item of a quiet period schedules the
+    flush, later ones just join the pending batch.
+    """
+
+    def __init__(self, emit, interval_sec: float = 0.1):
+        self.emit = emit
+        self.interval_sec = interval_sec
+        self._pending = []
+        self._timer = None
+
+    def add(self, item):
+        self._pending.append(item)
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval_sec)
+        self._timer = None
+        await self._send()
+
+    async def _send(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        await self.emit(batch)
+
+    async def flush(self):
+        # Send anything still pending right away (e.g. before the final result)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._send()
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+# test_algo_arena.py and test_sockets.py are scripts that drive a running
+# server (python test_algo_arena.py), not pytest modules
+collect_ignore = ["test_algo_arena.py", "test_sockets.py"]
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# main reads its configuration at import time: rooms in memory, nothing
+# written to disk, no rate limits, and a Piston nobody answers (tests that
+# judge swap in their own executor)
+APP_ENV = {
+    "ROOM_STORE": "memory",
+    "HISTORY_DB_PATH": "",
+    "RATINGS_PATH": "",
+    "JUDGE_BACKEND": "piston",
+    "PISTON_API_URL": "http://piston.invalid/api/v2/execute",
+    "RATE_LIMIT_SUBMIT": "0",
+    "RATE_LIMIT_JOIN": "0",
+    "RATE_LIMIT_IDENTIFY": "0",
+    "RATE_LIMIT_MATCHMAKING": "0",
+    "RATE_LIMIT_CREATE_ROOM": "0",
+}
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    """The main module, imported once with APP_ENV."""
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in APP_ENV.items():
+            patch.setenv(name, value)
+        # problems.json is opened relative to the working directory
+        patch.chdir(BACKEND_DIR)
+        import main
+    return main
+
+
+@pytest.fixture
+def client(app_module):
+    """A TestClient with the app's startup and shutdown run around the test."""
+    from fastapi.testclient import TestClient
+
+    with TestClient(app_module.app) as client:
+        yield client
@@ -0,0 +1,705 @@
+"""
+AlgoArena Execution Backends
+Runs a generated judge harness and hands back its raw stdout / stderr.
+
+Two backends are available, selected with the JUDGE_BACKEND env var:
+- "piston" (default): ships the harness to the Piston API at PISTON_API_URL
+- "local": keeps a pool of pre-forked, resource-limited Python workers, each
+  in its own sandbox (see sandbox.py)
+
+Both take the submission's language adapter (languages.py). Piston compiles
+inside its own run; the local backend builds compiled languages through a
+compile-once ArtifactCache and has a worker exec the result.
+"""
+
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from artifacts import ArtifactCache, BuildFailed
+from languages import DEFAULT_LANGUAGE, LANGUAGES
+from sandbox import BUILD_DIR, create_sandbox
+
+
+class ExecutorError(Exception):
+    """Raised when the execution engine itself could not run the harness."""
+
+
+class OutputLimitExceeded(Exception):
+    """A local worker wrote more than max_output_mb to stdout."""
+
+
+class NothingToRun(Exception):
+    """The submission didn't compile, or its language isn't installed here."""
+
+
+class StopRun(Exception):
+    """Raised by an on_output callback that has seen enough: the run ends there."""
+
+
+# =====================================================
+# BASE
+# =====================================================
+class Executor:
+    """
+    Common interface for every backend.
+
+    run() returns a dict shaped like:
+        {"stdout": str, "stderr": str, "exit_code": int, "timed_out": bool}
+
+    plus "compile_ms" when a compile step ran as part of this call, and
+    "run_ms": the run's wall time as measured outside the submission (by this
+    process, or by Piston), None when the backend can't say. The harness's
+    per-test timers run inside the submission and can be tampered with.
+
+    If `on_output` is given it is called with raw stdout chunks (bytes) as soon
+    as the backend has them (live for the local pool, after the response for
+    Piston; see `streams`). Streamed output is not kept, so "stdout" is then
+    empty. on_output may raise StopRun to end the run: a live run is killed
+    on the spot, and run() returns normally with "stopped": True.
+
+    `language` is a languages.LanguageAdapter, Python when omitted.
+    """
+
+    # Whether on_output sees results while the run is still going
+    streams = False
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def run(
+        self, source: str, stdin: str = "", on_output=None, language=None
+    ) -> dict:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+# =====================================================
+# PISTON (remote HTTP)
+# =====================================================
+class PistonExecutor(Executor):
+    """
+    Talks to Piston over one app-lifetime httpx client, so judge calls reuse
+    warm keep-alive connections instead of paying TCP/TLS setup every time.
+    """
+
+    # Failures where the request never reached Piston, so retrying is safe
+    RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+    # Answers that mean "not now" (rate limited, or no upstream behind a proxy)
+    RETRYABLE_STATUS = (429, 502, 503)
+
+    def __init__(
+        self,
+        url: str,
+        versions: dict = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_sec: float = 30.0,
+        http2: bool = False,
+        connect_timeout_sec: float = 3.0,
+        read_timeout_sec: float = 10.0,
+        write_timeout_sec: float = 5.0,
+        pool_timeout_sec: float = 5.0,
+        max_retries: int = 2,
+        backoff_sec: float = 0.1,
+        max_retry_after_sec: float = 5.0,
+    ):
+        self.url = url
+        # {language name: Piston runtime version}, overrides the adapters' defaults
+        self.versions = versions or {}
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_sec,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout_sec,
+            read=read_timeout_sec,
+            write=write_timeout_sec,
+            pool=pool_timeout_sec,
+        )
+        self.http2 = http2
+        self.max_retries = max_retries
+        self.backoff_sec = backoff_sec
+        self.max_retry_after_sec = max_retry_after_sec
+        self._client = None
+
+    async def start(self):
+        if self._client is not None:
+            return
+
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401  (httpx needs it for HTTP/2)
+            except ImportError:
+                print("[LOG] PISTON_HTTP2 is set but 'h2' is not installed, using HTTP/1.1")
+                http2 = False
+
+        self._client = httpx.AsyncClient(
+            limits=self.limits, timeout=self.timeout, http2=http2
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _retry_after(response) -> float:
+        """Seconds the Retry-After header asks for (delta or HTTP date), or None."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    async def _post(self, payload: dict) -> dict:
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            # Full jitter keeps simultaneous retries from stampeding Piston
+            delay = random.uniform(0, self.backoff_sec * 2**attempt)
+            try:
+                response = await self._client.post(self.url, json=payload)
+            except self.RETRYABLE_ERRORS:
+                if last:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code in self.RETRYABLE_STATUS and not last:
+                retry_after = self._retry_after(response)
+                # Waiting longer than that would hold a judge slot too long
+                if retry_after is None or retry_after <= self.max_retry_after_sec:
+                    await asyncio.sleep(delay if retry_after is None else retry_after)
+                    continue
+            response.raise_for_status()
+            return response.json()
+
+    async def run(
+        self, source: str, stdin: str = "", on_output=None, language=None
+    ) -> dict:
+        if self._client is None:
+            await self.start()
+
+        language = language or LANGUAGES[DEFAULT_LANGUAGE]
+        payload = {
+            "language": language.piston_language,
+            "version": self.versions.get(language.name, language.piston_version),
+            "files": [{"name": language.filename, "content": source}],
+            "stdin": stdin,
+        }
+
+        try:
+            execution = await self._post(payload)
+        except Exception as e:
+            raise ExecutorError(str(e)) from e
+
+        # Compiled languages get a "compile" stage; when it fails there is no run
+        compile_data = execution.get("compile") or {}
+        if compile_data.get("code"):
+            output = compile_data.get("stderr") or compile_data.get("stdout") or ""
+            return {
+                "stdout": "",
+                "stderr": "Compilation failed:\n" + output,
+                "exit_code": compile_data["code"],
+                "timed_out": compile_data.get("signal") == "SIGKILL",
+                "run_ms": None,
+            }
+
+        run_data = execution.get("run", {})
+        stdout = run_data.get("stdout") or ""
+
+        # Piston can't stream, so hand the whole output over once the run is over
+        stopped = False
+        if on_output:
+            try:
+                on_output(stdout.encode())
+            except StopRun:
+                stopped = True
+            stdout = ""
+
+        return {
+            "stdout": stdout,
+            "stderr": run_data.get("stderr", ""),
+            "exit_code": run_data.get("code") or 0,
+            "timed_out": run_data.get("signal") == "SIGKILL",
+            "stopped": stopped,
+            # Measured by Piston around the process (newer Piston versions only)
+            "run_ms": run_data.get("wall_time"),
+        }
+
+
+# =====================================================
+# LOCAL (pre-forked worker pool)
+# =====================================================
+
+# Every worker is a fresh interpreter that blocks on stdin until a job arrives.
+# The job is one JSON object: {"source": ..., "stdin": ..., "memory_bytes": ...}.
+# Other languages send {"argv": [...], "files": {...}} instead: the worker
+# writes the files, points stdin at the job's stdin and execs argv, keeping
+# the rlimits. Isolation (network, files, uid) comes from the sandbox the
+# worker was started in, not from anything done here.
+# The memory cap is set here rather than at spawn, because JVM / V8 processes
+# reserve far more address space than they use and cap their heap themselves.
+WORKER_BOOTSTRAP = """
+import io, json, os, resource, sys
+job = json.loads(sys.stdin.read())
+if job.get("memory_bytes"):
+    resource.setrlimit(resource.RLIMIT_AS, (job["memory_bytes"], job["memory_bytes"]))
+
+if "argv" in job:
+    for name, content in job.get("files", {}).items():
+        with open(name, "w", encoding="utf-8") as f:
+            f.write(content)
+    with open("stdin.txt", "w", encoding="utf-8") as f:
+        f.write(job.get("stdin", ""))
+    fd = os.open("stdin.txt", os.O_RDONLY)
+    os.dup2(fd, 0)
+    os.close(fd)
+    os.execv(job["argv"][0], job["argv"])
+
+sys.stdin = io.StringIO(job.get("stdin", ""))
+code = compile(job["source"], "<submission>", "exec")
+exec(code, {"__name__": "__main__"})
+"""
+
+
+# Pipe read size, and how much stderr is kept (the rest is drained and dropped)
+READ_CHUNK_BYTES = 64 * 1024
+STDERR_KEEP_BYTES = 64 * 1024
+
+
+def _limit_resources(cpu_time_sec: int, file_size_bytes: int, max_processes: int):
+    # Runs in the child between fork() and exec(), so keep it to plain syscalls.
+    # RLIMIT_AS is applied by the bootstrap, once it knows the language.
+    # RLIMIT_NPROC counts every process and thread of the worker's uid (root,
+    # which sets up the sandbox, is exempt).
+    def apply():
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_time_sec, cpu_time_sec + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (file_size_bytes, file_size_bytes))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+        if max_processes:
+            resource.setrlimit(resource.RLIMIT_NPROC, (max_processes, max_processes))
+
+    return apply
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class _Worker:
+    def __init__(self, process, workdir: str, uid: int = None, sandbox=None):
+        self.process = process
+        self.workdir = workdir
+        self.uid = uid
+        self.sandbox = sandbox
+        # Where compiled submissions are staged, and the path the worker sees
+        self.build_dir = f"{workdir}/build" if sandbox else workdir
+        self.build_target = BUILD_DIR if sandbox else workdir
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    def kill(self):
+        if self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+
+    @property
+    def returncode(self) -> int:
+        if self.sandbox:
+            return self.sandbox.exit_status(self.process.returncode)
+        return self.process.returncode
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        if self.uid is not None:
+            self.sandbox.release_uid(self.uid)
+            self.uid = None
+
+
+class LocalExecutor(Executor):
+    """
+    Keeps `pool_size` idle interpreters warm so a submission never pays for
+    process start-up. Each worker runs exactly one job and is then replaced,
+    so state can never leak between submissions.
+
+    Compiled languages are built by `artifacts` before a worker is taken, once
+    per source; the build is then linked into the worker's build directory
+    and the worker only execs it. Runtimes and compilers are looked up on
+    PATH, a language whose toolchain is missing (or that the sandbox doesn't
+    expose) gets an error verdict.
+
+    Results stream: on_output gets stdout while the tests are still running.
+
+    With `sandbox` None, workers and compilers run as the server's user, with
+    nothing isolating them.
+    """
+
+    streams = True
+
+    def __init__(
+        self,
+        pool_size: int = 4,
+        cpu_time_sec: int = 5,
+        wall_time_sec: float = 10.0,
+        memory_mb: int = 256,
+        file_size_mb: int = 16,
+        max_output_mb: int = 16,
+        build_cache_size: int = 256,
+        compile_time_sec: float = 30.0,
+        sandbox=None,
+    ):
+        self.pool_size = pool_size
+        self.cpu_time_sec = cpu_time_sec
+        self.wall_time_sec = wall_time_sec
+        self.memory_mb = memory_mb
+        self.memory_bytes = memory_mb * 1024 * 1024
+        self.file_size_bytes = file_size_mb * 1024 * 1024
+        self.max_output_bytes = max_output_mb * 1024 * 1024
+        self.artifacts = ArtifactCache(build_cache_size, compile_time_sec, sandbox)
+        self.sandbox = sandbox
+        self._tools = {}
+
+        self._idle = None
+        self._spawning = set()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._start_lock:
+            if self._started:
+                return
+            if self.sandbox is not None:
+                # Fail at startup rather than on every submission
+                workdir = tempfile.mkdtemp(prefix="algoarena-judge-")
+                try:
+                    problem = await self.sandbox.probe(workdir)
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
+                if problem:
+                    raise ExecutorError(f"Judge sandbox does not work here: {problem}")
+            self._idle = asyncio.Queue()
+            workers = await asyncio.gather(
+                *(self._spawn_worker() for _ in range(self.pool_size))
+            )
+            for worker in workers:
+                self._idle.put_nowait(worker)
+            self._started = True
+
+    async def close(self):
+        if not self._started:
+            return
+        for task in list(self._spawning):
+            task.cancel()
+        while not self._idle.empty():
+            worker = self._idle.get_nowait()
+            worker.kill()
+            await worker.process.wait()
+            worker.cleanup()
+        self.artifacts.clear()
+        self._started = False
+
+    def stats(self) -> dict:
+        return {"builds": self.artifacts.stats(), "sandboxed": self.sandbox is not None}
+
+    def _resolve(self, argv: list) -> list:
+        """argv with the program looked up on PATH, None if it isn't installed."""
+        program = argv[0]
+        if not os.path.isabs(program):
+            if program not in self._tools:
+                path = shutil.which(program)
+                if path and self.sandbox is not None and not self.sandbox.exposes(path):
+                    path = None  # installed, but out of the workers' sight
+                self._tools[program] = path
+            program = self._tools[program]
+        return [program] + argv[1:] if program else None
+
+    async def _prepare(self, language, source: str, stdin: str) -> tuple:
+        """
+        The worker job for `source`, the compile time spent on it and the
+        build directory to stage into the worker (None for interpreted code).
+        The job's argv still has BUILD_DIR where the worker's path goes.
+        """
+        memory_bytes = self.memory_bytes if language.memory_rlimit else None
+        argv = language.run_command(language.filename, self.memory_mb)
+        if argv is None:
+            job = {"source": source, "stdin": stdin, "memory_bytes": memory_bytes}
+            return job, 0.0, None
+
+        files = {language.filename: source}
+        compile_ms = 0.0
+        build = None
+        if language.compiled:
+            compiler = self._resolve(language.build_command())
+            if compiler is None:
+                raise NothingToRun(f"{language.label} is not available on this judge")
+            try:
+                artifact, built_now = await self.artifacts.get(
+                    language, source, compiler
+                )
+            except BuildFailed as e:
+                raise NothingToRun(f"Compilation failed:\n{e}") from e
+            compile_ms = artifact.build_ms if built_now else 0.0
+            argv = language.run_command(BUILD_DIR, self.memory_mb)
+            files = {}
+            build = artifact.path
+
+        argv = self._resolve(argv)
+        if argv is None:
+            raise NothingToRun(f"{language.label} is not available on this judge")
+        job = {"argv": argv, "files": files, "stdin": stdin, "memory_bytes": memory_bytes}
+        return job, compile_ms, build
+
+    @staticmethod
+    def _stage(job: dict, build: str, worker: _Worker) -> dict:
+        # Hard links, so staging costs nothing; the worker can't write to them
+        shutil.copytree(
+            build, worker.build_dir, dirs_exist_ok=True, copy_function=_link_or_copy
+        )
+        # copytree carries over the build directory's 0700 from mkdtemp
+        os.chmod(worker.build_dir, 0o755)
+        if worker.build_target == BUILD_DIR:
+            return job
+        argv = [
+            worker.build_target + arg[len(BUILD_DIR) :]
+            if arg == BUILD_DIR or arg.startswith(BUILD_DIR + "/")
+            else arg
+            for arg in job["argv"]
+        ]
+        return {**job, "argv": argv}
+
+    async def _spawn_worker(self) -> _Worker:
+        workdir = tempfile.mkdtemp(prefix="algoarena-judge-")
+        argv = [sys.executable, "-I", "-c", WORKER_BOOTSTRAP]
+        uid = None
+        max_processes = 0
+        if self.sandbox is not None:
+            uid = self.sandbox.acquire_uid()
+            argv = self.sandbox.wrap(
+                [self.sandbox.python, "-I", "-c", WORKER_BOOTSTRAP], workdir, uid
+            )
+            max_processes = self.sandbox.max_processes
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=workdir,
+            env={"PATH": "/usr/bin:/bin", "PYTHONIOENCODING": "utf-8"},
+            start_new_session=True,
+            preexec_fn=_limit_resources(
+                self.cpu_time_sec, self.file_size_bytes, max_processes
+            ),
+        )
+        return _Worker(process, workdir, uid, self.sandbox)
+
+    def _refill(self):
+        async def spawn_into_pool():
+            worker = await self._spawn_worker()
+            self._idle.put_nowait(worker)
+
+        task = asyncio.create_task(spawn_into_pool())
+        self._spawning.add(task)
+        task.add_done_callback(self._spawning.discard)
+
+    async def _acquire(self) -> _Worker:
+        while True:
+            worker = await self._idle.get()
+            # Replace it straight away so the pool stays warm while we run
+            self._refill()
+            if worker.alive:
+                return worker
+            worker.cleanup()
+
+    async def _communicate(self, process, job: bytes, stdout_chunks: list, on_output):
+        try:
+            process.stdin.write(job)
+            await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # worker already died, its stderr says why
+        process.stdin.close()
+
+        async def read_stdout():
+            # Chunk by chunk, so callers see each test result as it is written
+            total = 0
+            while chunk := await process.stdout.read(READ_CHUNK_BYTES):
+                total += len(chunk)
+                if total > self.max_output_bytes:
+                    raise OutputLimitExceeded
+                if on_output:
+                    on_output(chunk)
+                else:
+                    stdout_chunks.append(chunk)
+
+        async def read_stderr():
+            kept = bytearray()
+            while chunk := await process.stderr.read(READ_CHUNK_BYTES):
+                kept += chunk[: STDERR_KEEP_BYTES - len(kept)]
+            return bytes(kept)
+
+        _, stderr = await asyncio.gather(read_stdout(), read_stderr())
+        await process.wait()
+        return stderr
+
+    async def run(
+        self, source: str, stdin: str = "", on_output=None, language=None
+    ) -> dict:
+        if not self._started:
+            await self.start()
+
+        # Built (or fetched from the artifact cache) before taking a worker,
+        # so compile time never counts against the run's wall-clock limit
+        try:
+            job, compile_ms, build = await self._prepare(
+                language or LANGUAGES[DEFAULT_LANGUAGE], source, stdin
+            )
+        except NothingToRun as e:
+            return {
+                "stdout": "",
+                "stderr": str(e),
+                "exit_code": 1,
+                "timed_out": False,
+                "run_ms": None,
+            }
+
+        worker = await self._acquire()
+        timed_out = False
+        output_limited = False
+        stopped = False
+        stdout_chunks = []
+
+        try:
+            # Staging can fail too (the cached build may have been evicted
+            # meanwhile); the worker is then killed and cleaned up like below
+            if build is not None:
+                job = self._stage(job, build, worker)
+            job = json.dumps(job).encode()
+            started = time.perf_counter()
+            stderr = await asyncio.wait_for(
+                self._communicate(worker.process, job, stdout_chunks, on_output),
+                timeout=self.wall_time_sec,
+            )
+        except asyncio.TimeoutError:
+            # Keep whatever the tests managed to print before the deadline
+            timed_out = True
+            worker.kill()
+            await worker.process.wait()
+            stderr = b""
+        except OutputLimitExceeded:
+            output_limited = True
+            worker.kill()
+            await worker.process.wait()
+            stderr = b""
+        except StopRun:
+            # The caller has its verdict, the remaining tests are not needed
+            stopped = True
+            worker.kill()
+            await worker.process.wait()
+            stderr = b""
+        except Exception as e:
+            worker.kill()
+            await worker.process.wait()
+            raise ExecutorError(str(e)) from e
+        finally:
+            worker.cleanup()
+        # Taken here, where the submission can't reach the clock
+        run_ms = (time.perf_counter() - started) * 1000
+
+        stdout = b"".join(stdout_chunks)
+        stderr = stderr.decode(errors="replace")
+        if timed_out:
+            stderr = f"Time limit exceeded ({self.wall_time_sec}s)\n" + stderr
+        if output_limited:
+            stderr = f"Output limit exceeded ({self.max_output_bytes} bytes)\n"
+        returncode = worker.returncode
+        if returncode == -signal.SIGXCPU:
+            stderr = f"CPU time limit exceeded ({self.cpu_time_sec}s)\n" + stderr
+        elif returncode < 0 and not stderr.strip() and not stopped:
+            # A native crash says nothing on its own, e.g. a segfault
+            stderr = f"Runtime error ({signal.Signals(-returncode).name})\n"
+
+        return {
+            "stdout": stdout.decode(errors="replace"),
+            "stderr": stderr,
+            "exit_code": returncode,
+            "timed_out": timed_out,
+            "stopped": stopped,
+            "compile_ms": compile_ms,
+            "run_ms": run_ms,
+        }
+
+
+# =====================================================
+# CONFIG
+# =====================================================
+def create_executor() -> Executor:
+    backend = os.getenv("JUDGE_BACKEND", "piston").lower()
+
+    if backend == "local":
+        return LocalExecutor(
+            pool_size=int(os.getenv("JUDGE_POOL_SIZE", "4")),
+            cpu_time_sec=int(os.getenv("JUDGE_CPU_TIME_SEC", "5")),
+            wall_time_sec=float(os.getenv("JUDGE_WALL_TIME_SEC", "10")),
+            memory_mb=int(os.getenv("JUDGE_MEMORY_MB", "256")),
+            max_output_mb=int(os.getenv("JUDGE_MAX_OUTPUT_MB", "16")),
+            build_cache_size=int(os.getenv("JUDGE_BUILD_CACHE_SIZE", "256")),
+            compile_time_sec=float(os.getenv("JUDGE_COMPILE_TIME_SEC", "30")),
+            sandbox=create_sandbox(),
+        )
+
+    if backend == "piston":
+        # e.g. "cpp=10.2.0,java=15.0.2"
+        versions = dict(
+            item.split("=", 1)
+            for item in os.getenv("PISTON_VERSIONS", "").split(",")
+            if "=" in item
+        )
+        return PistonExecutor(
+            os.getenv("PISTON_API_URL"),
+            versions=versions,
+            max_connections=int(os.getenv("PISTON_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("PISTON_MAX_KEEPALIVE", "20")),
+            keepalive_expiry_sec=float(os.getenv("PISTON_KEEPALIVE_SEC", "30")),
+            http2=os.getenv("PISTON_HTTP2", "false").lower() in ("1", "true", "yes"),
+            connect_timeout_sec=float(os.getenv("PISTON_CONNECT_TIMEOUT_SEC", "3")),
+            read_timeout_sec=float(os.getenv("PISTON_READ_TIMEOUT_SEC", "10")),
+            write_timeout_sec=float(os.getenv("PISTON_WRITE_TIMEOUT_SEC", "5")),
+            pool_timeout_sec=float(os.getenv("PISTON_POOL_TIMEOUT_SEC", "5")),
+            max_retries=int(os.getenv("PISTON_MAX_RETRIES", "2")),
+            backoff_sec=float(os.getenv("PISTON_BACKOFF_SEC", "0.1")),
+            max_retry_after_sec=float(os.getenv("PISTON_MAX_RETRY_AFTER_SEC", "5")),
+        )
+
+    raise ValueError(f"Unknown JUDGE_BACKEND: {backend}")
@@ -0,0 +1,97 @@
+"""
+AlgoArena Fast JSON
+orjson-backed encoding for Socket.IO emits and trusted REST responses.
+
+Opt-in with FAST_JSON=1 (needs `pip install orjson`). Without it, or if
+orjson isn't installed, the same interfaces fall back to the stdlib json
+module. Both sides write datetimes as isoformat strings, so payloads look
+the same either way. orjson refuses integers beyond 64 bits, so a payload
+holding one (say, a big expected answer) is encoded with json instead.
+
+See json_benchmark.py for what it buys on a 50-test submission.
+"""
+
+import json
+from datetime import date, datetime
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# =====================================================
+# SOCKET.IO JSON MODULES
+# =====================================================
+
+
+class StdJson:
+    """Stdlib json for socketio.AsyncServer(json=...), plus datetimes."""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        kwargs.setdefault("default", _default)
+        return json.dumps(obj, *args, **kwargs)
+
+    @staticmethod
+    def loads(*args, **kwargs):
+        return json.loads(*args, **kwargs)
+
+
+def _orjson_dumps(obj) -> bytes:
+    try:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        # Most likely an int beyond 64 bits: Python ints are unbounded and the
+        # stdlib encodes them as they are. Anything it can't encode either
+        # (an unknown type, a cycle) still raises from there.
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+class OrJson:
+    """orjson for socketio.AsyncServer(json=...). Always compact, so the
+    separators Socket.IO passes are ignored."""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return _orjson_dumps(obj).decode()
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+
+# =====================================================
+# REST RESPONSES
+# =====================================================
+
+
+class StdJSONResponse(Response):
+    """Encodes the dict as is: no response_model validation, no jsonable_encoder."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return json.dumps(content, default=_default).encode()
+
+
+class OrjsonResponse(StdJSONResponse):
+    def render(self, content) -> bytes:
+        return _orjson_dumps(content)
+
+
+def json_layer(fast: bool):
+    """(Socket.IO json module, response class for trusted dicts)."""
+    if fast and orjson is None:
+        print("[LOG] FAST_JSON is set but orjson is not installed, using json")
+    if fast and orjson is not None:
+        return OrJson, OrjsonResponse
+    return StdJson, StdJSONResponse
@@ -0,0 +1,347 @@
+"""
+AlgoArena Judge Harness
+Per-problem wrapper that runs a submission against every test case.
+
+The harness and the serialized test data are built once per problem and
+cached on the catalog snapshot (so a reload rebuilds them). Only the user's
+code changes between submissions. The tests are streamed to the executor on
+stdin instead of being pasted into the source as a Python literal.
+
+Results come back as length-prefixed frames (see FrameDecoder) on a channel
+the submission can't print into; its own output is captured per test and
+truncated.
+
+The judging policy decides whether a run may stop early, see
+JUDGE_POLICIES below. The harness itself never learns the expected answers
+(not even a hash of them): it reports every result as it goes, and the
+server compares them and kills the run at the first failure that ends it.
+
+This module holds the Python harness and what every language shares (the
+frame format, the solution's signature). languages.py builds the other
+languages' harnesses on top of it.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Judging policies
+POLICY_FULL = "full"  # run every test
+POLICY_FAIL_FAST = "fail_fast"  # stop at the first failing test
+POLICY_PUBLIC_FIRST = "public_first"  # only run hidden tests if all public ones pass
+JUDGE_POLICIES = (POLICY_FULL, POLICY_FAIL_FAST, POLICY_PUBLIC_FIRST)
+
+# Which tests a run gets. Backends that can't stream results judge
+# public_first in two runs: the public tests, then (if they all pass) the
+# hidden ones.
+TESTS_ALL = "all"
+TESTS_PUBLIC = "public"
+TESTS_HIDDEN = "hidden"
+
+# Per-test caps, shipped to the harness with the tests
+RESULT_LIMIT_BYTES = 64 * 1024  # one encoded result record
+CAPTURE_LIMIT_BYTES = 4 * 1024  # user stdout / stderr kept per test
+
+# Results travel as framed records: MAGIC, the payload length in ASCII
+# digits, a newline, then that many bytes of JSON. The last record is
+# {"done": true, ...}; a run without it crashed or was killed.
+FRAME_MAGIC = b"\x1e#"
+FRAME_HEADER_MAX = len(FRAME_MAGIC) + 12
+
+# Runs before the submission (_MAGIC is filled in below). It moves the result channel to a private copy
+# of fd 1, points fd 1 at /dev/null and captures sys.stdout / sys.stderr, so
+# nothing the submission prints can land between (or inside) two records.
+HARNESS_SETUP = """
+import io as _io, json as _json, os as _os, sys as _sys, time as _time, traceback as _traceback
+_JOB = _json.loads(_sys.stdin.read())
+_RES = _os.fdopen(_os.dup(1), 'wb', buffering=0)
+_null = _os.open(_os.devnull, _os.O_WRONLY)
+_os.dup2(_null, 1)
+_os.close(_null)
+
+class _Capture(_io.TextIOBase):
+    def __init__(self, limit):
+        self.limit, self.parts, self.size, self.dropped = limit, [], 0, 0
+    def writable(self):
+        return True
+    def write(self, text):
+        room = max(0, self.limit - self.size)
+        if room:
+            self.parts.append(text[:room])
+            self.size += min(room, len(text))
+        self.dropped += max(0, len(text) - room)
+        return len(text)
+    def take(self):
+        text, dropped = ''.join(self.parts), self.dropped
+        self.parts, self.size, self.dropped = [], 0, 0
+        return text, dropped
+
+_OUT, _ERR = _Capture(_JOB['capture_limit']), _Capture(_JOB['capture_limit'])
+_sys.stdout, _sys.stderr = _OUT, _ERR
+# Crashes outside a test still have to reach the real stderr
+_sys.excepthook = lambda *exc: _traceback.print_exception(*exc, file=_sys.__stderr__)
+
+def _emit(record, out=None, err=None):
+    (out, out_dropped), (err, err_dropped) = out or _OUT.take(), err or _ERR.take()
+    record.update(stdout=out, stderr=err, truncated=bool(out_dropped or err_dropped))
+    data = _json.dumps(record).encode()
+    if len(data) > _JOB['result_limit']:
+        record = {key: record[key] for key in ('i', 'wall_ms', 'cpu_ms', 'done') if key in record}
+        record['error'] = 'Output limit exceeded (%d bytes)' % len(data)
+        record['truncated'] = True
+        data = _json.dumps(record).encode()
+    _RES.write(_MAGIC + str(len(data)).encode() + b'\\n' + data)
+""".replace("_MAGIC", repr(FRAME_MAGIC), 1)
+
+# One line, so tracebacks in user code are only shifted by a single line.
+# Reading stdin first also stops user code from swallowing the test data.
+HARNESS_PRELUDE = "exec(" + repr(HARNESS_SETUP) + ")\n"
+
+HARNESS_RUNNER = """
+
+# Module-level output belongs to no test, it goes out with the closing record
+_top = _OUT.take(), _ERR.take()
+for _i, _t in enumerate(_JOB['tests']):
+    _wall, _cpu = _time.perf_counter(), _time.process_time()
+    try:
+        # Dynamic call: assumes a function named 'solution'
+        _res = solution(**_t['input'])
+        _out = {'i': _i, 'actual': _res}
+    except (Exception, SystemExit) as _e:
+        _out = {'i': _i, 'error': str(_e) or type(_e).__name__}
+    _out['wall_ms'] = (_time.perf_counter() - _wall) * 1000
+    _out['cpu_ms'] = (_time.process_time() - _cpu) * 1000
+    _emit(_out)
+_emit({'done': True}, *_top)
+"""
+
+
+def encode_frame(record: dict) -> bytes:
+    data = json.dumps(record).encode()
+    return FRAME_MAGIC + str(len(data)).encode() + b"\n" + data
+
+
+class FrameDecoder:
+    """
+    Incremental parser for the harness result channel.
+
+    feed() takes stdout in chunks of any size and returns the records that
+    are complete so far. At most one record is buffered, bytes outside a
+    frame are skipped, and frames over `max_frame_bytes` are dropped without
+    being buffered (an {"error": ...} record takes their place).
+    """
+
+    def __init__(self, max_frame_bytes: int = RESULT_LIMIT_BYTES):
+        self.max_frame_bytes = max_frame_bytes
+        self.skipped_bytes = 0
+        self._buffer = bytearray()
+        self._discard = 0
+
+    def feed(self, chunk: bytes) -> list:
+        if self._discard:
+            dropped = min(self._discard, len(chunk))
+            self._discard -= dropped
+            chunk = chunk[dropped:]
+        buffer = self._buffer
+        buffer += chunk
+        records = []
+
+        while buffer:
+            start = buffer.find(FRAME_MAGIC)
+            if start < 0:
+                # Keep a byte that might be the first half of the next magic
+                keep = len(FRAME_MAGIC) - 1
+                self.skipped_bytes += max(0, len(buffer) - keep)
+                del buffer[: max(0, len(buffer) - keep)]
+                break
+            if start:
+                self.skipped_bytes += start
+                del buffer[:start]
+
+            newline = buffer.find(b"\n", len(FRAME_MAGIC), FRAME_HEADER_MAX)
+            if newline < 0:
+                if len(buffer) < FRAME_HEADER_MAX:
+                    break  # header not complete yet
+                length = None
+            else:
+                digits = bytes(buffer[len(FRAME_MAGIC) : newline])
+                length = int(digits) if digits.isdigit() else None
+
+            if length is None:
+                # Not a real header, resync on the next magic
+                self.skipped_bytes += len(FRAME_MAGIC)
+                del buffer[: len(FRAME_MAGIC)]
+                continue
+
+            body = newline + 1
+            if length > self.max_frame_bytes:
+                records.append({"error": f"Result too large ({length} bytes)"})
+                available = len(buffer) - body
+                self._discard = max(0, length - available)
+                del buffer[: body + min(length, available)]
+                continue
+
+            if len(buffer) - body < length:
+                break  # wait for the rest of the payload
+            try:
+                records.append(json.loads(bytes(buffer[body : body + length])))
+            except ValueError:
+                records.append({"error": "Malformed result record"})
+            del buffer[: body + length]
+
+        return records
+
+
+# =====================================================
+# SIGNATURE
+# =====================================================
+# Parameter / return types, as typed languages need them: a scalar
+# ("int", "float", "bool", "string") followed by any number of "[]".
+SCALAR_TYPES = ("int", "float", "bool", "string")
+
+
+@dataclass(frozen=True, slots=True)
+class Signature:
+    params: tuple  # ((name, type), ...), type is None when it couldn't be inferred
+    returns: Optional[str]
+
+    @property
+    def names(self) -> list:
+        return [name for name, _ in self.params]
+
+    @property
+    def typed(self) -> bool:
+        return self.returns is not None and all(t is not None for _, t in self.params)
+
+
+_TYPE_PATTERN = re.compile(r"(%s)(\[\])*" % "|".join(SCALAR_TYPES))
+
+
+def _is_type(value) -> bool:
+    return isinstance(value, str) and _TYPE_PATTERN.fullmatch(value) is not None
+
+
+def _type_of(value) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        item = None
+        for element in value:
+            item = _merge_types(item, _type_of(element))
+        # "?" is an element type no test has shown yet (only empty lists)
+        return (item or "?") + "[]"
+    raise ValueError(f"no typed equivalent for {type(value).__name__}")
+
+
+def _merge_types(a, b):
+    if a is None or a == "?":
+        return b
+    if b is None or b == "?":
+        return a
+    if a == b:
+        return a
+    if a.endswith("[]") and b.endswith("[]"):
+        return _merge_types(a[:-2], b[:-2]) + "[]"
+    if {a, b} == {"int", "float"}:
+        return "float"
+    raise ValueError(f"mixed types {a} and {b}")
+
+
+def _infer(values) -> Optional[str]:
+    try:
+        merged = None
+        for value in values:
+            merged = _merge_types(merged, _type_of(value))
+    except ValueError:
+        return None
+    return merged.replace("?", "int") if merged else None
+
+
+def problem_signature(problem: dict) -> Signature:
+    """
+    Parameter names and types of `solution`. Names follow the first test's
+    input, types come from problem["signature"] when it is given
+    ({"params": {"nums": "int[]"}, "returns": "int"}) and are otherwise
+    inferred from every test's input and expected values.
+    """
+    tests = problem.get("public_tests", []) + problem.get("hidden_tests", [])
+    declared = problem.get("signature") or {}
+    declared_params = declared.get("params") or {}
+
+    names = list(declared_params) or (list(tests[0]["input"]) if tests else [])
+    params = []
+    for name in names:
+        declared_type = declared_params.get(name)
+        if _is_type(declared_type):
+            params.append((name, declared_type))
+        else:
+            params.append((name, _infer(test["input"].get(name) for test in tests)))
+
+    returns = declared.get("returns")
+    if not _is_type(returns):
+        returns = _infer(test["expected"] for test in tests)
+    return Signature(tuple(params), returns)
+
+
+def test_passed(record: dict, test: dict) -> bool:
+    """The verdict for one result record; only the server ever makes it."""
+    return "actual" in record and record["actual"] == test["expected"]
+
+
+def stops_run(policy: str, index: int, public_count: int) -> bool:
+    """Whether failing test `index` ends the run under `policy`."""
+    return policy == POLICY_FAIL_FAST or (
+        policy == POLICY_PUBLIC_FIRST and index < public_count
+    )
+
+
+class JudgeHarness:
+    def __init__(self, problem: dict):
+        self.problem_id = problem["id"]
+        # Combine public and hidden tests for the final judge
+        self.public_count = len(problem.get("public_tests", []))
+        self.tests = problem.get("public_tests", []) + problem.get("hidden_tests", [])
+        self.default_policy = problem.get("judge_policy")
+        self.signature = problem_signature(problem)
+        # Other languages' source templates and stdin, built by languages.py on first use
+        self.templates = {}
+        # Changes whenever a test input or expected answer changes
+        self.version = hashlib.sha256(
+            json.dumps(self.tests, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        self._stdin = {}
+
+    def source(self, user_code: str) -> str:
+        return HARNESS_PRELUDE + user_code + HARNESS_RUNNER
+
+    def tests_in(self, part: str = TESTS_ALL) -> tuple:
+        """(index of the first test, the tests) for TESTS_ALL / _PUBLIC / _HIDDEN."""
+        if part == TESTS_PUBLIC:
+            return 0, self.tests[: self.public_count]
+        if part == TESTS_HIDDEN:
+            return self.public_count, self.tests[self.public_count :]
+        return 0, self.tests
+
+    def stdin_for(self, part: str = TESTS_ALL) -> str:
+        # Serialized once per part, then reused for every submission.
+        # Inputs only: expected answers never leave the server.
+        payload = self._stdin.get(part)
+        if payload is None:
+            _, tests = self.tests_in(part)
+            payload = json.dumps(
+                {
+                    "result_limit": RESULT_LIMIT_BYTES,
+                    "capture_limit": CAPTURE_LIMIT_BYTES,
+                    "tests": [{"input": test["input"]} for test in tests],
+                }
+            )
+            self._stdin[part] = payload
+        return payload
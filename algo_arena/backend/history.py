@@ -0,0 +1,374 @@
+"""
+AlgoArena History
+Durable match, submission and per-test history in SQLite (WAL mode).
+
+Handlers never touch the disk: record_*() only append rows to an in-memory
+buffer. One background task writes the buffer out in a single transaction
+every `flush_interval_sec` (sooner once `batch_size` rows are waiting), on
+a worker thread. Reads use their own connection, which WAL lets run next to
+the writer. A compaction pass zlib-compresses the code of submissions older
+than `compact_after_sec`.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    room_id TEXT PRIMARY KEY,
+    problem_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    end_reason TEXT,
+    winner TEXT,
+    started_at TEXT,
+    ended_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS match_players (
+    room_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    ended_at TEXT NOT NULL,
+    PRIMARY KEY (room_id, username)
+);
+CREATE INDEX IF NOT EXISTS match_players_by_user ON match_players (username, ended_at);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id TEXT PRIMARY KEY,
+    room_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    problem_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total_passed INTEGER NOT NULL,
+    total_tests INTEGER NOT NULL,
+    execution_time_ms REAL,
+    submitted_at TEXT NOT NULL,
+    code BLOB,
+    code_codec TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS submissions_by_user ON submissions (username, submitted_at);
+CREATE INDEX IF NOT EXISTS submissions_by_problem ON submissions (problem_id, submitted_at);
+CREATE INDEX IF NOT EXISTS submissions_to_compact ON submissions (code_codec, submitted_at);
+
+CREATE TABLE IF NOT EXISTS test_results (
+    submission_id TEXT NOT NULL,
+    test_index INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    skipped INTEGER NOT NULL,
+    wall_time_ms REAL,
+    cpu_time_ms REAL,
+    error TEXT,
+    PRIMARY KEY (submission_id, test_index)
+) WITHOUT ROWID;
+"""
+
+INSERT_MATCH = "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?, ?)"
+INSERT_MATCH_PLAYER = "INSERT OR REPLACE INTO match_players VALUES (?, ?, ?)"
+INSERT_SUBMISSION = (
+    "INSERT OR REPLACE INTO submissions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, '')"
+)
+INSERT_TEST_RESULT = "INSERT OR REPLACE INTO test_results VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+SUBMISSION_COLUMNS = (
+    "submission_id, room_id, username, problem_id, language, status, "
+    "total_passed, total_tests, execution_time_ms, submitted_at"
+)
+# A match row is only written once the match is over; until then its
+# submissions (and their ids) stay out of the listings
+MATCH_OVER = "EXISTS (SELECT 1 FROM matches m WHERE m.room_id = s.room_id)"
+
+# Long error messages are cut, the live API still has the full text
+ERROR_LIMIT = 1000
+
+
+def _iso(value) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def decode_code(code, codec: str) -> str:
+    if code is None:
+        return None
+    if codec == "zlib":
+        code = zlib.decompress(code)
+    return code.decode()
+
+
+def _rows(cursor) -> list:
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+class HistoryStore:
+    def __init__(
+        self,
+        path: str,
+        flush_interval_sec: float = 0.2,
+        batch_size: int = 500,
+        max_pending: int = 50000,
+        compact_after_sec: float = 7 * 24 * 3600,
+        compact_batch: int = 500,
+    ):
+        self.path = path
+        self.flush_interval_sec = flush_interval_sec
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.compact_after_sec = compact_after_sec
+        self.compact_batch = compact_batch
+
+        self._pending = []  # (sql, params) in arrival order
+        self._wakeup = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._read_lock = asyncio.Lock()
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self._reader = self._connect()
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.dropped = 0
+        self.compacted = 0
+        self.flush_ms_total = 0.0
+
+    def _connect(self):
+        # Used from worker threads, one at a time (see the locks)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    # -------------------------------------------------
+    # Write-behind buffer
+    # -------------------------------------------------
+    def _queue(self, rows: list):
+        if len(self._pending) + len(rows) > self.max_pending:
+            # The disk can't keep up; losing history beats stalling matches
+            self.dropped += len(rows)
+            return
+        self._pending.extend(rows)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def record_submission(self, room_id: str, problem_id: str, details: dict):
+        """`details` is what save_details() keeps: the result plus code and ids."""
+        submission_id = details["submission_id"]
+        rows = [
+            (
+                INSERT_SUBMISSION,
+                (
+                    submission_id,
+                    room_id,
+                    details["username"],
+                    problem_id,
+                    details.get("language", "python"),
+                    details["status"],
+                    details.get("total_passed", 0),
+                    details.get("total_tests", 0),
+                    details.get("execution_time_ms"),
+                    _iso(details["submitted_at"]),
+                    (details.get("code") or "").encode(),
+                ),
+            )
+        ]
+        for index, test in enumerate(details.get("test_results") or []):
+            error = test.get("error")
+            rows.append(
+                (
+                    INSERT_TEST_RESULT,
+                    (
+                        submission_id,
+                        index,
+                        int(bool(test.get("passed"))),
+                        int(bool(test.get("skipped"))),
+                        test.get("wall_time_ms"),
+                        test.get("cpu_time_ms"),
+                        error[:ERROR_LIMIT] if error else None,
+                    ),
+                )
+            )
+        self._queue(rows)
+
+    def record_match(self, room, usernames: list = None):
+        """`usernames` defaults to the room's players (pass them if one just left)."""
+        ended_at = datetime.now().isoformat()
+        rows = [
+            (
+                INSERT_MATCH,
+                (
+                    room.room_id,
+                    room.problem_id,
+                    room.status,
+                    room.end_reason,
+                    room.winner,
+                    _iso(room.started_at),
+                    ended_at,
+                ),
+            )
+        ]
+        for username in usernames or room.usernames:
+            rows.append((INSERT_MATCH_PLAYER, (room.room_id, username, ended_at)))
+        self._queue(rows)
+
+    def _write(self, rows: list):
+        with self._writer:  # One transaction per batch
+            self._writer.execute("BEGIN")
+            for sql, params in rows:
+                self._writer.execute(sql, params)
+
+    async def flush(self):
+        async with self._write_lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except sqlite3.Error as e:
+                self.dropped += len(rows)
+                print(f"[LOG] History flush of {len(rows)} rows failed: {e}")
+                return
+            self.flush_ms_total += (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.rows_written += len(rows)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_sec)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    # -------------------------------------------------
+    # Compaction
+    # -------------------------------------------------
+    def _compact_batch(self, cutoff: str) -> int:
+        rows = self._writer.execute(
+            "SELECT submission_id, code FROM submissions "
+            "WHERE code_codec = '' AND submitted_at < ? LIMIT ?",
+            (cutoff, self.compact_batch),
+        ).fetchall()
+        if not rows:
+            return 0
+        with self._writer:
+            self._writer.execute("BEGIN")
+            self._writer.executemany(
+                "UPDATE submissions SET code = ?, code_codec = 'zlib' WHERE submission_id = ?",
+                [(zlib.compress(code or b"", 9), submission_id) for submission_id, code in rows],
+            )
+        return len(rows)
+
+    async def compact(self) -> int:
+        """Compresses code older than compact_after_sec, a batch per transaction."""
+        cutoff = (datetime.now() - timedelta(seconds=self.compact_after_sec)).isoformat()
+        total = 0
+        while True:
+            # Released between batches, so flushes aren't held up for long
+            async with self._write_lock:
+                done = await asyncio.to_thread(self._compact_batch, cutoff)
+            total += done
+            if done < self.compact_batch:
+                break
+        self.compacted += total
+        return total
+
+    async def run_compaction(self, interval_sec: float = 3600.0):
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                compacted = await self.compact()
+                if compacted:
+                    print(f"[LOG] Compressed code of {compacted} old submissions")
+            except sqlite3.Error as e:
+                print(f"[LOG] History compaction failed: {e}")
+
+    # -------------------------------------------------
+    # Queries (newest first, `before` is the cursor)
+    # -------------------------------------------------
+    async def _query(self, sql: str, params: tuple) -> list:
+        # Anything still buffered is written first, so callers read their own writes
+        await self.flush()
+        async with self._read_lock:
+            return await asyncio.to_thread(
+                lambda: _rows(self._reader.execute(sql, params))
+            )
+
+    async def submissions_by_user(self, username: str, limit: int = 20, before: str = None):
+        return await self._query(
+            f"SELECT {SUBMISSION_COLUMNS} FROM submissions s "
+            f"WHERE username = ? AND submitted_at < ? AND {MATCH_OVER} "
+            "ORDER BY submitted_at DESC LIMIT ?",
+            (username, before or "~", limit),
+        )
+
+    async def submissions_by_problem(
+        self, problem_id: str, limit: int = 20, before: str = None
+    ):
+        return await self._query(
+            f"SELECT {SUBMISSION_COLUMNS} FROM submissions s "
+            f"WHERE problem_id = ? AND submitted_at < ? AND {MATCH_OVER} "
+            "ORDER BY submitted_at DESC LIMIT ?",
+            (problem_id, before or "~", limit),
+        )
+
+    async def matches_by_user(self, username: str, limit: int = 20, before: str = None):
+        return await self._query(
+            "SELECT m.* FROM match_players p JOIN matches m ON m.room_id = p.room_id "
+            "WHERE p.username = ? AND p.ended_at < ? ORDER BY p.ended_at DESC LIMIT ?",
+            (username, before or "~", limit),
+        )
+
+    async def submission(self, submission_id: str):
+        """One submission with its code, per-test results and match status."""
+        rows = await self._query(
+            "SELECT s.*, m.status AS match_status FROM submissions s "
+            "LEFT JOIN matches m ON m.room_id = s.room_id WHERE s.submission_id = ?",
+            (submission_id,),
+        )
+        if not rows:
+            return None
+        submission = rows[0]
+        submission["code"] = decode_code(submission["code"], submission.pop("code_codec"))
+        submission["test_results"] = await self._query(
+            "SELECT test_index, passed, skipped, wall_time_ms, cpu_time_ms, error "
+            "FROM test_results WHERE submission_id = ? ORDER BY test_index",
+            (submission_id,),
+        )
+        return submission
+
+    # -------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------
+    async def close(self):
+        await self.flush()
+        self._writer.close()
+        self._reader.close()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "dropped": self.dropped,
+            "compacted": self.compacted,
+            "avg_flush_ms": round(self.flush_ms_total / self.flushes, 3) if self.flushes else 0.0,
+        }
+
+
+def create_history_store():
+    path = os.getenv("HISTORY_DB_PATH", "algoarena.db")
+    if not path:
+        return None
+    return HistoryStore(
+        path,
+        flush_interval_sec=float(os.getenv("HISTORY_FLUSH_MS", "200")) / 1000,
+        batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "500")),
+        max_pending=int(os.getenv("HISTORY_MAX_PENDING", "50000")),
+        compact_after_sec=float(os.getenv("HISTORY_COMPACT_AFTER_SEC", str(7 * 24 * 3600))),
+    )
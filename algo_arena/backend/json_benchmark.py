@@ -0,0 +1,184 @@
+"""
+AlgoArena JSON Micro-Benchmark
+Times every way a submission result can be encoded, stdlib json vs orjson
+
+The payload is what POST /rooms/{id}/submit returns for a realistic run:
+--tests results, each with list inputs, the echoed answer, a bit of
+captured stdout and a datetime. REST rows compare FastAPI's response_model
+path (validate, then Pydantic's own JSON encoder), an orjson
+default_response_class (validate, to dicts, orjson) and trusted dicts
+encoded directly. Socket.IO rows encode a submission_update-sized emit
+through metrics.MeteredJson, as the server does.
+
+Usage:
+    python json_benchmark.py --tests 50 --number 2000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import timeit
+from datetime import datetime
+
+# =====================================================
+# PAYLOAD
+# =====================================================
+
+
+def build_submission(tests: int, size: int = 100) -> dict:
+    rng = random.Random(7)
+    results = []
+    for i in range(tests):
+        nums = [rng.randint(-10**6, 10**6) for _ in range(size)]
+        results.append(
+            {
+                "input": {"nums": nums, "target": rng.randint(-10**6, 10**6)},
+                "expected": [i % size, (i + 1) % size],
+                "actual": [i % size, (i + 1) % size],
+                "passed": i % 7 != 0,
+                "skipped": False,
+                "wall_time_ms": round(rng.uniform(0.01, 5), 3),
+                "cpu_time_ms": round(rng.uniform(0.01, 5), 3),
+                "error": None if i % 7 else "AssertionError: wrong answer",
+                "stdout": f"checking test {i}\n" * 3,
+                "stderr": "",
+                "output_truncated": False,
+            }
+        )
+    return {
+        "submission_id": "0f8fad5b-d9cb-469f-a165-70867728950e",
+        "username": "bench_user",
+        "language": "python",
+        "code": "def solution(nums, target):\n    seen = {}\n" * 10,
+        "submitted_at": datetime.now(),
+        "status": "failed",
+        "total_passed": sum(r["passed"] for r in results),
+        "total_tests": tests,
+        "total_skipped": 0,
+        "execution_time_ms": 42.0,
+        "cpu_time_ms": 40.5,
+        "cached": False,
+        "queue_wait_ms": 0.3,
+        "stdout": "",
+        "stderr": "",
+        "test_results": results,
+    }
+
+
+# =====================================================
+# CANDIDATES
+# =====================================================
+
+
+def build_cases(payload: dict) -> list:
+    """[(group, name, fn)]; the first row of each group is its baseline."""
+    from pydantic import TypeAdapter
+
+    import fastjson
+    from metrics import MeteredJson, MetricsRegistry
+
+    # main reads its configuration at import time; keep it off the disk
+    os.environ.setdefault("RATINGS_PATH", "")
+    os.environ.setdefault("HISTORY_DB_PATH", "")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+
+    adapter = TypeAdapter(main.SubmissionResponse)
+    sizes = MetricsRegistry().histogram("bench_emit_bytes", "", ("event",))
+    std_socket = MeteredJson(sizes, backend=fastjson.StdJson)
+    event = ["submission_update", {"room_id": "a1b2c3d4", "seq": 3, **payload}]
+
+    cases = [
+        (
+            "rest",
+            "response_model (pydantic dump_json)",
+            lambda: adapter.dump_json(adapter.validate_python(payload)),
+        ),
+        (
+            "rest",
+            "response_model + stdlib json",
+            lambda: json.dumps(
+                adapter.dump_python(adapter.validate_python(payload), mode="json")
+            ).encode(),
+        ),
+        (
+            "rest",
+            "trusted dict, stdlib json",
+            lambda: fastjson.StdJSONResponse(payload).body,
+        ),
+        ("socket", "MeteredJson(stdlib json)", lambda: std_socket.dumps(event, separators=(",", ":"))),
+    ]
+
+    if fastjson.orjson is not None:
+        orjson = fastjson.orjson
+        or_socket = MeteredJson(sizes, backend=fastjson.OrJson)
+        cases += [
+            (
+                "rest",
+                "response_model + orjson default_response_class",
+                lambda: orjson.dumps(
+                    adapter.dump_python(adapter.validate_python(payload), mode="json")
+                ),
+            ),
+            ("rest", "trusted dict, orjson", lambda: fastjson.OrjsonResponse(payload).body),
+            ("socket", "MeteredJson(orjson)", lambda: or_socket.dumps(event, separators=(",", ":"))),
+        ]
+    return cases
+
+
+def run(args) -> dict:
+    payload = build_submission(args.tests)
+    cases = build_cases(payload)
+
+    rows = []
+    baselines = {}
+    for group, name, fn in sorted(cases, key=lambda case: case[0] != "rest"):
+        encoded = fn()
+        best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+        us = best / args.number * 1e6
+        baseline = baselines.setdefault(group, us)
+        rows.append(
+            {
+                "group": group,
+                "name": name,
+                "us_per_op": round(us, 2),
+                "speedup": round(baseline / us, 2),
+                "bytes": len(encoded),
+            }
+        )
+    return {"tests": args.tests, "number": args.number, "rows": rows}
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 84)
+    print(f"  JSON ENCODING, {report['tests']}-test submission")
+    print("=" * 84)
+    print(f"{'path':<56}{'us/op':>10}{'speedup':>9}{'bytes':>9}")
+    for row in report["rows"]:
+        print(
+            f"{row['group'] + ': ' + row['name']:<56}{row['us_per_op']:>10.1f}"
+            f"{row['speedup']:>8.2f}x{row['bytes']:>9}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tests", type=int, default=50, help="test results in the payload")
+    parser.add_argument("--number", type=int, default=500, help="encodes per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="timings, the best one counts")
+    parser.add_argument("--output", help="write the JSON report here")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
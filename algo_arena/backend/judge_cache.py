@@ -0,0 +1,110 @@
+"""
+AlgoArena Judge Result Cache
+Bounded LRU + TTL cache so identical resubmissions skip the executor.
+
+Keys are (problem_id, test-set version, judging policy, language, hash of
+normalized code). Python code is
+normalized by dropping comments, blank lines and cosmetic spacing, so
+re-submitting after only touching a comment is still a hit. Other languages
+are hashed as-is (a Python tokenizer would read `#include` as a comment).
+"""
+
+import hashlib
+import io
+import time
+import tokenize
+from collections import OrderedDict
+
+# Token types that never change what the code does
+_IGNORED_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.ENCODING}
+
+
+def normalize_code(code: str) -> str:
+    try:
+        tokens = []
+        depth = 0
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            if tok.type in _IGNORED_TOKENS:
+                continue
+            if tok.type == tokenize.INDENT:
+                # Same block structure hashes the same whatever the indent width
+                depth += 1
+                tokens.append((tok.type, "    " * depth))
+                continue
+            if tok.type == tokenize.DEDENT:
+                depth -= 1
+            tokens.append((tok.type, tok.string))
+        return tokenize.untokenize(tokens)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        # Not valid Python, fall back to trimming whitespace only
+        lines = (line.rstrip() for line in code.splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def code_hash(code: str, language: str = "python") -> str:
+    if language == "python":
+        code = normalize_code(code)
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+class JudgeCache:
+    def __init__(self, max_entries: int = 1024, ttl_sec: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        problem_id: str,
+        tests_version: str,
+        code: str,
+        policy: str = "full",
+        language: str = "python",
+    ) -> tuple:
+        # The policy is part of the key, a fail_fast verdict skips tests
+        return (problem_id, tests_version, policy, language, code_hash(code, language))
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: tuple, result: dict):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_sec, result)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_sec": self.ttl_sec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
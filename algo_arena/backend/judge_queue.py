@@ -0,0 +1,131 @@
+"""
+AlgoArena Judge Scheduler
+Bounded priority queue in front of the executor.
+
+A fixed number of worker tasks pull jobs, so at most `concurrency` judge
+calls are ever in flight. Final submissions jump ahead of practice runs,
+and when the queue is full new jobs are rejected with a retry hint instead
+of piling up until every match times out.
+"""
+
+import asyncio
+import itertools
+import math
+import time
+
+# Lower number = judged first
+PRIORITY_FINAL = 0
+PRIORITY_PRACTICE = 1
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Judge queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Job:
+    def __init__(self, fn, args, future):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class JudgeScheduler:
+    def __init__(self, concurrency: int = 4, max_queue: int = 100):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+
+        self._queue = None
+        self._seq = itertools.count()
+        self._workers = []
+
+        # Moving average of how long one judge call takes, for wait estimates
+        self.avg_judge_sec = 1.0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def estimated_wait_sec(self, depth: int = None) -> float:
+        if depth is None:
+            depth = self.depth
+        return depth / self.concurrency * self.avg_judge_sec
+
+    async def submit(self, priority: int, fn, *args, on_queued=None):
+        """
+        Runs `await fn(*args)` on a judge worker.
+        Returns (result, queue_wait_ms) or raises QueueFull.
+        """
+        if not self._workers:
+            await self.start()
+
+        depth = self.depth
+        if depth >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(retry_after=max(1, math.ceil(self.estimated_wait_sec(depth))))
+
+        job = _Job(fn, args, asyncio.get_running_loop().create_future())
+        self._queue.put_nowait((priority, next(self._seq), job))
+
+        if on_queued:
+            await on_queued(
+                {
+                    "queue_depth": depth + 1,
+                    "estimated_wait_sec": round(self.estimated_wait_sec(depth), 2),
+                }
+            )
+
+        return await job.future
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            if job.future.cancelled():
+                continue
+
+            started = time.monotonic()
+            wait_ms = (started - job.enqueued_at) * 1000
+            self.in_flight += 1
+            try:
+                result = await job.fn(*job.args)
+                if not job.future.cancelled():
+                    job.future.set_result((result, wait_ms))
+            except Exception as e:
+                if not job.future.cancelled():
+                    job.future.set_exception(e)
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+                self.avg_judge_sec = (
+                    0.8 * self.avg_judge_sec + 0.2 * (time.monotonic() - started)
+                )
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "queue_depth": self.depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_judge_sec": round(self.avg_judge_sec, 3),
+        }
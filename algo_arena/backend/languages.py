@@ -0,0 +1,755 @@
+"""
+AlgoArena Languages
+One adapter per submission language: harness source, stdin and commands.
+
+Every harness speaks the same protocol back (framed JSON records, see
+harness.py), so run_judge doesn't care which language produced them. The
+per-problem parts of a harness (argument parsing, the call to `solution`)
+are generated once and cached on the JudgeHarness next to its tests.
+
+- Python and JavaScript read the JSON job from stdin.
+- C++ and Java read a flat token stream (see plain_stdin) so they need no
+  JSON parser; they take their argument types from the problem's Signature.
+- None of them sees an expected answer. Early stopping (fail_fast /
+  public_first) is done by the server, which kills the run, so it works
+  the same for every language.
+
+Compiled languages are built once per source (see artifacts.py), and the
+one binary runs every test. JUDGE_LANGUAGES picks the languages offered.
+"""
+
+import json
+import os
+import re
+
+from harness import (
+    CAPTURE_LIMIT_BYTES,
+    FRAME_MAGIC,
+    HARNESS_PRELUDE,
+    HARNESS_RUNNER,
+    RESULT_LIMIT_BYTES,
+    TESTS_ALL,
+)
+
+
+def plain_stdin(harness, part: str = TESTS_ALL) -> str:
+    """
+    Tests for C++ / Java, one line each: every argument as whitespace
+    separated tokens. Numbers as-is, bools as 1/0, strings as
+    <utf-8 length>:<raw bytes>, lists as <length> then their items.
+    """
+    payload = harness.templates.get(("plain_stdin", part))
+    if payload is None:
+        _, tests = harness.tests_in(part)
+        lines = [f"{CAPTURE_LIMIT_BYTES} {RESULT_LIMIT_BYTES} {len(tests)}"]
+        for test in tests:
+            lines.append(
+                " ".join(
+                    _plain(test["input"].get(name), type_)
+                    for name, type_ in harness.signature.params
+                )
+            )
+        payload = harness.templates[("plain_stdin", part)] = "\n".join(lines) + "\n"
+    return payload
+
+
+def _plain(value, type_: str) -> str:
+    if type_.endswith("[]"):
+        items = value or []
+        return " ".join([str(len(items))] + [_plain(item, type_[:-2]) for item in items])
+    if type_ == "string":
+        text = value or ""
+        return f"{len(text.encode())}:{text}"
+    if type_ == "bool":
+        return "1" if value else "0"
+    if type_ == "float":
+        return repr(float(value or 0))
+    return str(int(value or 0))
+
+
+class LanguageAdapter:
+    name = ""  # what clients send as "language"
+    label = ""
+    filename = ""  # source file name, for Piston and local builds
+    piston_language = ""
+    piston_version = ""
+    compiled = False
+    memory_rlimit = True  # False for runtimes that reserve far more address space than they use
+
+    def supports(self, signature) -> bool:
+        return True
+
+    def starter(self, signature) -> str:
+        raise NotImplementedError
+
+    def source(self, harness, user_code: str) -> str:
+        prefix, suffix = self._template(harness)
+        return prefix + user_code + suffix
+
+    def _template(self, harness) -> tuple:
+        template = harness.templates.get(self.name)
+        if template is None:
+            template = harness.templates[self.name] = self.build_template(
+                harness.signature
+            )
+        return template
+
+    def build_template(self, signature) -> tuple:
+        """(code before the submission, code after it)"""
+        raise NotImplementedError
+
+    def stdin(self, harness, part: str = TESTS_ALL) -> str:
+        """The tests of `part` (harness.TESTS_*) in the form the harness reads."""
+        return harness.stdin_for(part)
+
+    def build_command(self) -> list:
+        """Compiler argv, run inside the build directory next to `filename`."""
+        raise NotImplementedError
+
+    def run_command(self, target: str, memory_mb: int) -> list:
+        """argv for the local backend; `target` is the build dir or the source file."""
+        raise NotImplementedError
+
+
+# =====================================================
+# PYTHON
+# =====================================================
+class PythonAdapter(LanguageAdapter):
+    name = "python"
+    label = "Python"
+    filename = "main.py"
+    piston_language = "python"
+    piston_version = "3.10.0"
+
+    def starter(self, signature) -> str:
+        return f"def solution({', '.join(signature.names)}):\n    # Your code here\n    pass"
+
+    def build_template(self, signature) -> tuple:
+        return HARNESS_PRELUDE, HARNESS_RUNNER
+
+    def run_command(self, target: str, memory_mb: int) -> list:
+        # The local pool's workers are Python already and exec the source in place
+        return None
+
+
+# =====================================================
+# JAVASCRIPT
+# =====================================================
+# Node can't duplicate fd 1, so user output is captured by replacing the
+# console and process.stdout / stderr writers before the submission loads.
+# Joined into one line below, so error line numbers are only shifted by one.
+JS_SETUP = """const _fs = require('fs'), _util = require('util');
+const _JOB = JSON.parse(_fs.readFileSync(0, 'utf8'));
+const _MAGIC = Buffer.from(%s);
+const _writeResult = process.stdout.write.bind(process.stdout);
+class _Capture {
+  constructor(limit) { this.limit = limit; this.parts = []; this.size = 0; this.dropped = 0; }
+  write(text) {
+    text = String(text);
+    const room = Math.max(0, this.limit - this.size);
+    if (room) { this.parts.push(text.slice(0, room)); this.size += Math.min(room, text.length); }
+    this.dropped += Math.max(0, text.length - room);
+    return true;
+  }
+  take() {
+    const taken = [this.parts.join(''), this.dropped];
+    this.parts = []; this.size = 0; this.dropped = 0;
+    return taken;
+  }
+}
+const _OUT = new _Capture(_JOB.capture_limit), _ERR = new _Capture(_JOB.capture_limit);
+console.log = console.info = console.debug = (...args) => _OUT.write(_util.format(...args) + '\\n');
+console.error = console.warn = console.trace = (...args) => _ERR.write(_util.format(...args) + '\\n');
+process.stdout.write = (chunk) => _OUT.write(chunk);
+process.stderr.write = (chunk) => _ERR.write(chunk);
+""" % json.dumps(list(FRAME_MAGIC))
+JS_PRELUDE = " ".join(line.strip() for line in JS_SETUP.splitlines()) + "\n"
+
+JS_RUNNER = """
+;(() => {
+  const _emit = (record, out, err) => {
+    [out, err] = [out || _OUT.take(), err || _ERR.take()];
+    Object.assign(record, { stdout: out[0], stderr: err[0], truncated: Boolean(out[1] || err[1]) });
+    let data = Buffer.from(JSON.stringify(record));
+    if (data.length > _JOB.result_limit) {
+      const small = { i: record.i, wall_ms: record.wall_ms, cpu_ms: record.cpu_ms, done: record.done };
+      small.error = `Output limit exceeded (${data.length} bytes)`;
+      small.truncated = true;
+      data = Buffer.from(JSON.stringify(small));
+    }
+    _writeResult(Buffer.concat([_MAGIC, Buffer.from(data.length + '\\n'), data]));
+  };
+  // Module-level output belongs to no test, it goes out with the closing record
+  const _top = [_OUT.take(), _ERR.take()];
+  _JOB.tests.forEach((_t, _i) => {
+    const _args = %s.map((name) => _t.input[name]);
+    const _wall = process.hrtime.bigint(), _cpu = process.cpuUsage();
+    let _out;
+    try {
+      const _res = solution(..._args);
+      JSON.stringify(_res);  // unserializable results (BigInt, cycles) become errors
+      _out = { i: _i, actual: _res === undefined ? null : _res };
+    } catch (_e) {
+      _out = { i: _i, error: String((_e && _e.message) || _e) };
+    }
+    const _used = process.cpuUsage(_cpu);
+    _out.wall_ms = Number(process.hrtime.bigint() - _wall) / 1e6;
+    _out.cpu_ms = (_used.user + _used.system) / 1000;
+    _emit(_out);
+  });
+  _emit({ done: true }, ..._top);
+})();
+"""
+
+
+class JavaScriptAdapter(LanguageAdapter):
+    name = "javascript"
+    label = "JavaScript"
+    filename = "main.js"
+    piston_language = "javascript"
+    piston_version = "18.15.0"
+    memory_rlimit = False  # V8 reserves gigabytes up front, --max-old-space-size caps the heap
+
+    def starter(self, signature) -> str:
+        return f"function solution({', '.join(signature.names)}) {{\n  // Your code here\n}}\n"
+
+    def build_template(self, signature) -> tuple:
+        return JS_PRELUDE, JS_RUNNER % json.dumps(signature.names)
+
+    def run_command(self, target: str, memory_mb: int) -> list:
+        return ["node", f"--max-old-space-size={memory_mb}", target]
+
+
+# =====================================================
+# C++
+# =====================================================
+# Before the submission: headers, reading / JSON helpers and the result
+# channel, which (as in Python) is a private copy of fd 1. fd 1 itself goes
+# to a scratch file that is read back and emptied after every test.
+CPP_PRELUDE = r"""#include <algorithm>
+#include <chrono>
+#include <climits>
+#include <cmath>
+#include <cstdio>
+#include <cstring>
+#include <ctime>
+#include <deque>
+#include <exception>
+#include <functional>
+#include <iostream>
+#include <map>
+#include <numeric>
+#include <queue>
+#include <set>
+#include <sstream>
+#include <stack>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <unordered_map>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+#include <fcntl.h>
+#include <unistd.h>
+using namespace std;
+
+namespace arena_judge {
+static std::istringstream in;
+static int results_fd = -1, capture_fd = -1;
+static size_t capture_limit = 4096, result_limit = 65536;
+
+static void read(long long& v) { in >> v; }
+static void read(double& v) { in >> v; }
+static void read(bool& v) { int b = 0; in >> b; v = b != 0; }
+static void read(std::string& v) {
+    size_t n = 0; char colon = 0;
+    in >> n >> colon;
+    v.assign(n, '\0');
+    if (n) in.read(&v[0], n);
+}
+template <class T> static void read(std::vector<T>& v) {
+    size_t n = 0; in >> n;
+    v.clear(); v.reserve(n);
+    for (size_t i = 0; i < n; i++) { T item; read(item); v.push_back(item); }
+}
+
+static void put_string(std::string& o, std::string_view s) {
+    o += '"';
+    for (unsigned char c : s) {
+        if (c == '"' || c == '\\') { o += '\\'; o += (char) c; }
+        else if (c < 0x20) { char buf[8]; snprintf(buf, sizeof buf, "\\u%04x", c); o += buf; }
+        else o += (char) c;
+    }
+    o += '"';
+}
+template <class T> static void put(std::string& o, const T& v) {
+    if constexpr (std::is_same_v<T, bool>) o += v ? "true" : "false";
+    else if constexpr (std::is_integral_v<T>) o += std::to_string(v);
+    else if constexpr (std::is_floating_point_v<T>) {
+        if (!std::isfinite(v)) { o += "null"; return; }
+        char buf[32]; snprintf(buf, sizeof buf, "%.17g", (double) v); o += buf;
+    }
+    else if constexpr (std::is_convertible_v<const T&, std::string_view>) put_string(o, v);
+    else {
+        o += '[';
+        bool first = true;
+        for (const auto& item : v) { if (!first) o += ", "; first = false; put(o, item); }
+        o += ']';
+    }
+}
+
+static void setup() {
+    std::ostringstream all; all << std::cin.rdbuf();
+    in.str(all.str());
+    // The submission reads an empty stdin, it can't swallow the tests
+    if (!freopen("/dev/null", "r", stdin)) {}
+    std::cin.clear();
+    in >> capture_limit >> result_limit;
+    std::fflush(stdout);
+    results_fd = dup(1);
+    FILE* scratch = tmpfile();
+    capture_fd = scratch ? dup(fileno(scratch)) : open("/dev/null", O_WRONLY);
+    dup2(capture_fd, 1);
+}
+static std::string take_output(bool& truncated) {
+    std::cout.flush(); std::fflush(stdout);
+    std::string text;
+    off_t size = lseek(capture_fd, 0, SEEK_CUR);
+    if (size <= 0) return text;
+    size_t keep = std::min<size_t>(size, capture_limit);
+    text.resize(keep);
+    ssize_t got = pread(capture_fd, &text[0], keep, 0);
+    text.resize(got > 0 ? got : 0);
+    if ((size_t) size > keep) {
+        truncated = true;
+        // Don't cut a UTF-8 character in half
+        while (!text.empty() && (text.back() & 0xC0) == 0x80) text.pop_back();
+        if (!text.empty() && (text.back() & 0x80)) text.pop_back();
+    }
+    if (ftruncate(capture_fd, 0)) {}
+    lseek(capture_fd, 0, SEEK_SET);
+    return text;
+}
+static void write_all(const std::string& data) {
+    size_t sent = 0;
+    while (sent < data.size()) {
+        ssize_t n = write(results_fd, data.data() + sent, data.size() - sent);
+        if (n <= 0) return;
+        sent += n;
+    }
+}
+// `fields` is the record's JSON body without braces, e.g. "\"i\": 0, \"actual\": 5"
+static void emit(const std::string& fields, const std::string& timing) {
+    bool truncated = false;
+    std::string out = take_output(truncated);
+    std::string record = "{" + fields + timing + ", \"stdout\": ";
+    put_string(record, out);
+    record += ", \"stderr\": \"\", \"truncated\": ";
+    record += truncated ? "true}" : "false}";
+    if (record.size() > result_limit) {
+        std::string body = fields.substr(0, fields.find(", "));
+        std::string message = "Output limit exceeded (" + std::to_string(record.size()) + " bytes)";
+        record = "{" + body + timing + ", \"error\": ";
+        put_string(record, message);
+        record += ", \"truncated\": true}";
+    }
+    write_all(std::string("\x1e#") + std::to_string(record.size()) + "\n" + record);
+}
+}  // namespace arena_judge
+
+"""
+
+CPP_RUNNER = r"""
+
+int main() {
+    arena_judge::setup();
+    // Module-level output belongs to no test, it goes out with the closing record
+    bool top_truncated = false;
+    std::string top = arena_judge::take_output(top_truncated);
+    size_t count = 0;
+    arena_judge::in >> count;
+    for (size_t i = 0; i < count; i++) {
+%(declarations)s
+        auto wall = std::chrono::steady_clock::now();
+        std::clock_t cpu = std::clock();
+        std::string fields = "\"i\": " + std::to_string(i);
+        try {
+            auto result = solution(%(arguments)s);
+            fields += ", \"actual\": ";
+            arena_judge::put(fields, result);
+        } catch (const std::exception& e) {
+            fields += ", \"error\": ";
+            arena_judge::put_string(fields, e.what());
+        } catch (...) {
+            fields += ", \"error\": \"unknown exception\"";
+        }
+        double wall_ms = std::chrono::duration<double, std::milli>(
+            std::chrono::steady_clock::now() - wall).count();
+        double cpu_ms = 1000.0 * (std::clock() - cpu) / CLOCKS_PER_SEC;
+        std::string timing = ", \"wall_ms\": ";
+        arena_judge::put(timing, wall_ms);
+        timing += ", \"cpu_ms\": ";
+        arena_judge::put(timing, cpu_ms);
+        arena_judge::emit(fields, timing);
+    }
+    std::string stdout_json;
+    arena_judge::put_string(stdout_json, top);
+    std::string closing = "{\"done\": true, \"stdout\": " + stdout_json +
+        ", \"stderr\": \"\", \"truncated\": " + (top_truncated ? "true" : "false") + "}";
+    arena_judge::write_all("\x1e#" + std::to_string(closing.size()) + "\n" + closing);
+    return 0;
+}
+"""
+
+CPP_TYPES = {"int": "long long", "float": "double", "bool": "bool", "string": "string"}
+
+
+def cpp_type(type_: str) -> str:
+    if type_.endswith("[]"):
+        return f"vector<{cpp_type(type_[:-2])}>"
+    return CPP_TYPES[type_]
+
+
+class CppAdapter(LanguageAdapter):
+    name = "cpp"
+    label = "C++"
+    filename = "main.cpp"
+    piston_language = "c++"
+    piston_version = "10.2.0"
+    compiled = True
+
+    def supports(self, signature) -> bool:
+        return signature.typed
+
+    def starter(self, signature) -> str:
+        params = ", ".join(
+            f"{cpp_type(t)}{'&' if t.endswith('[]') or t == 'string' else ''} {name}"
+            for name, t in signature.params
+        )
+        return (
+            f"{cpp_type(signature.returns)} solution({params}) {{\n"
+            "    // Your code here\n}\n"
+        )
+
+    def build_template(self, signature) -> tuple:
+        declarations = "\n".join(
+            f"        {cpp_type(t)} a{i}; arena_judge::read(a{i});"
+            for i, (_, t) in enumerate(signature.params)
+        )
+        arguments = ", ".join(f"a{i}" for i in range(len(signature.params)))
+        runner = CPP_RUNNER % {"declarations": declarations, "arguments": arguments}
+        # Compiler errors in the submission point at its own line numbers
+        return (
+            CPP_PRELUDE + '#line 1 "solution.cpp"\n',
+            '\n#line 1 "judge_main.cpp"\n' + runner,
+        )
+
+    def stdin(self, harness, part: str = TESTS_ALL) -> str:
+        return plain_stdin(harness, part)
+
+    def build_command(self) -> list:
+        return ["g++", "-O2", "-std=c++17", "-pipe", "-o", "main", self.filename]
+
+    def run_command(self, target: str, memory_mb: int) -> list:
+        return [f"{target}/main"]
+
+
+# =====================================================
+# JAVA
+# =====================================================
+# Main comes first, so Piston's single-file launcher picks it as the entry
+# point; the submission's `class Solution` follows it. Its imports are moved
+# to the top of the file.
+JAVA_PRELUDE = r"""import java.io.*;
+import java.lang.management.ManagementFactory;
+import java.lang.management.ThreadMXBean;
+import java.nio.charset.StandardCharsets;
+import java.util.*;
+import java.util.function.IntFunction;
+
+public class Main {
+    interface Reader<T> { T read() throws IOException; }
+
+    static DataInputStream in;
+    static OutputStream results = new FileOutputStream(FileDescriptor.out);
+    static int captureLimit, resultLimit;
+    // Keeps one byte past the limit, so takeOutput can tell it was cut
+    static ByteArrayOutputStream captured = new ByteArrayOutputStream() {
+        public synchronized void write(int b) {
+            if (count <= captureLimit) super.write(b);
+        }
+        public synchronized void write(byte[] b, int off, int len) {
+            super.write(b, off, Math.min(len, Math.max(0, captureLimit + 1 - count)));
+        }
+    };
+
+    static String token() throws IOException {
+        StringBuilder sb = new StringBuilder();
+        int c = in.read();
+        while (c == ' ' || c == '\n' || c == '\r' || c == '\t') c = in.read();
+        while (c != -1 && c != ' ' && c != '\n' && c != '\r' && c != '\t' && c != ':') {
+            sb.append((char) c);
+            c = in.read();
+        }
+        return sb.toString();
+    }
+    static int readSize() throws IOException { return Integer.parseInt(token()); }
+    static long readLong() throws IOException { return Long.parseLong(token()); }
+    static double readDouble() throws IOException { return Double.parseDouble(token()); }
+    static boolean readBool() throws IOException { return token().equals("1"); }
+    static String readString() throws IOException {
+        byte[] bytes = new byte[readSize()];
+        in.readFully(bytes);
+        return new String(bytes, StandardCharsets.UTF_8);
+    }
+    static long[] readLongArray() throws IOException {
+        long[] a = new long[readSize()];
+        for (int i = 0; i < a.length; i++) a[i] = readLong();
+        return a;
+    }
+    static double[] readDoubleArray() throws IOException {
+        double[] a = new double[readSize()];
+        for (int i = 0; i < a.length; i++) a[i] = readDouble();
+        return a;
+    }
+    static boolean[] readBoolArray() throws IOException {
+        boolean[] a = new boolean[readSize()];
+        for (int i = 0; i < a.length; i++) a[i] = readBool();
+        return a;
+    }
+    static <T> T[] readArray(IntFunction<T[]> make, Reader<T> item) throws IOException {
+        T[] a = make.apply(readSize());
+        for (int i = 0; i < a.length; i++) a[i] = item.read();
+        return a;
+    }
+
+    static void putString(StringBuilder o, String s) {
+        o.append('"');
+        for (int i = 0; i < s.length(); i++) {
+            char c = s.charAt(i);
+            if (c == '"' || c == '\\') o.append('\\').append(c);
+            else if (c < 0x20) o.append(String.format("\\u%%04x", (int) c));
+            else o.append(c);
+        }
+        o.append('"');
+    }
+    static void put(StringBuilder o, Object v) {
+        if (v == null) o.append("null");
+        else if (v instanceof Boolean) o.append(v);
+        else if (v instanceof Double || v instanceof Float) {
+            double d = ((Number) v).doubleValue();
+            o.append(Double.isFinite(d) ? Double.toString(d) : "null");
+        }
+        else if (v instanceof Number) o.append(v);
+        else if (v instanceof Iterable) {
+            o.append('[');
+            boolean first = true;
+            for (Object item : (Iterable<?>) v) {
+                if (!first) o.append(", ");
+                first = false;
+                put(o, item);
+            }
+            o.append(']');
+        }
+        else if (v.getClass().isArray()) {
+            o.append('[');
+            for (int i = 0; i < java.lang.reflect.Array.getLength(v); i++) {
+                if (i > 0) o.append(", ");
+                put(o, java.lang.reflect.Array.get(v, i));
+            }
+            o.append(']');
+        }
+        else putString(o, v.toString());
+    }
+
+    static String takeOutput(boolean[] truncated) {
+        byte[] bytes = captured.toByteArray();
+        captured.reset();
+        if (bytes.length > captureLimit) truncated[0] = true;
+        return new String(bytes, 0, Math.min(bytes.length, captureLimit), StandardCharsets.UTF_8);
+    }
+    static void write(String record) throws IOException {
+        byte[] data = record.getBytes(StandardCharsets.UTF_8);
+        results.write(("\u001e#" + data.length + "\n").getBytes(StandardCharsets.UTF_8));
+        results.write(data);
+        results.flush();
+    }
+    static void emit(String fields, String timing) throws IOException {
+        boolean[] truncated = {false};
+        StringBuilder record = new StringBuilder("{").append(fields).append(timing);
+        record.append(", \"stdout\": ");
+        putString(record, takeOutput(truncated));
+        record.append(", \"stderr\": \"\", \"truncated\": ").append(truncated[0]).append('}');
+        int size = record.toString().getBytes(StandardCharsets.UTF_8).length;
+        if (size > resultLimit) {
+            record = new StringBuilder("{").append(fields, 0, fields.indexOf(", ")).append(timing);
+            record.append(", \"error\": \"Output limit exceeded (").append(size).append(" bytes)\"");
+            record.append(", \"truncated\": true}");
+        }
+        write(record.toString());
+    }
+
+    public static void main(String[] args) throws Exception {
+        in = new DataInputStream(new ByteArrayInputStream(System.in.readAllBytes()));
+        // The submission reads an empty stdin, it can't swallow the tests
+        System.setIn(new ByteArrayInputStream(new byte[0]));
+        System.setOut(new PrintStream(captured, true, "UTF-8"));
+        captureLimit = readSize();
+        resultLimit = readSize();
+        ThreadMXBean threads = ManagementFactory.getThreadMXBean();
+        // Static initializers ran at class load, nothing to collect at module level
+        int count = readSize();
+        for (int i = 0; i < count; i++) {
+%(declarations)s
+            long wall = System.nanoTime(), cpu = threads.getCurrentThreadCpuTime();
+            StringBuilder fields = new StringBuilder("\"i\": ").append(i);
+            try {
+                Object result = new Solution().solution(%(arguments)s);
+                fields.append(", \"actual\": ");
+                put(fields, result);
+            } catch (Throwable e) {
+                fields.append(", \"error\": ");
+                putString(fields, e.getMessage() != null ? e.getMessage() : e.getClass().getSimpleName());
+            }
+            double wallMs = (System.nanoTime() - wall) / 1e6;
+            double cpuMs = (threads.getCurrentThreadCpuTime() - cpu) / 1e6;
+            emit(fields.toString(), ", \"wall_ms\": " + wallMs + ", \"cpu_ms\": " + cpuMs);
+        }
+        write("{\"done\": true}");
+    }
+}
+
+"""
+
+JAVA_TYPES = {"int": "long", "float": "double", "bool": "boolean", "string": "String"}
+JAVA_READERS = {
+    "int": "readLong()",
+    "float": "readDouble()",
+    "bool": "readBool()",
+    "string": "readString()",
+    "int[]": "readLongArray()",
+    "float[]": "readDoubleArray()",
+    "bool[]": "readBoolArray()",
+}
+JAVA_IMPORT = re.compile(r"^\s*import\s+(static\s+)?[\w.*\s]+;\s*$")
+JAVA_PACKAGE = re.compile(r"^\s*package\s+[\w.\s]+;\s*$")
+JAVA_PUBLIC_CLASS = re.compile(r"^(\s*)public\s+(?:final\s+)?class\s+(?=Solution\b)")
+
+
+def java_type(type_: str) -> str:
+    if type_.endswith("[]"):
+        return java_type(type_[:-2]) + "[]"
+    return JAVA_TYPES[type_]
+
+
+def java_reader(type_: str) -> str:
+    if type_ in JAVA_READERS:
+        return JAVA_READERS[type_]
+    item = type_[:-2]
+    return f"readArray({java_type(type_)}::new, () -> {java_reader(item)})"
+
+
+class JavaAdapter(LanguageAdapter):
+    name = "java"
+    label = "Java"
+    filename = "Main.java"
+    piston_language = "java"
+    piston_version = "15.0.2"
+    compiled = True
+    memory_rlimit = False  # the JVM reserves far more than it uses, -Xmx caps the heap
+
+    def supports(self, signature) -> bool:
+        return signature.typed
+
+    def starter(self, signature) -> str:
+        params = ", ".join(f"{java_type(t)} {name}" for name, t in signature.params)
+        return (
+            "class Solution {\n"
+            f"    public {java_type(signature.returns)} solution({params}) {{\n"
+            "        // Your code here\n    }\n}\n"
+        )
+
+    def build_template(self, signature) -> tuple:
+        declarations = "\n".join(
+            f"            {java_type(t)} a{i} = {java_reader(t)};"
+            for i, (_, t) in enumerate(signature.params)
+        )
+        arguments = ", ".join(f"a{i}" for i in range(len(signature.params)))
+        return (
+            JAVA_PRELUDE % {"declarations": declarations, "arguments": arguments},
+            "",
+        )
+
+    def source(self, harness, user_code: str) -> str:
+        prefix, _ = self._template(harness)
+        # Imports have to come before Main, everything else follows it.
+        # A public Solution would have to live in Solution.java.
+        imports, body = [], []
+        for line in user_code.splitlines():
+            if JAVA_PACKAGE.match(line):
+                continue
+            if JAVA_IMPORT.match(line):
+                imports.append(line)
+            else:
+                body.append(JAVA_PUBLIC_CLASS.sub(r"\1class ", line))
+        return "".join(line + "\n" for line in imports) + prefix + "\n".join(body) + "\n"
+
+    def stdin(self, harness, part: str = TESTS_ALL) -> str:
+        return plain_stdin(harness, part)
+
+    def build_command(self) -> list:
+        return ["javac", "-encoding", "UTF-8", "-nowarn", "-d", ".", self.filename]
+
+    def run_command(self, target: str, memory_mb: int) -> list:
+        return [
+            "java",
+            f"-Xmx{memory_mb}m",
+            "-Xss64m",
+            "-XX:+UseSerialGC",
+            "-XX:TieredStopAtLevel=1",
+            "-cp",
+            target,
+            "Main",
+        ]
+
+
+# =====================================================
+# REGISTRY
+# =====================================================
+DEFAULT_LANGUAGE = "python"
+ALL_LANGUAGES = {
+    adapter.name: adapter
+    for adapter in (PythonAdapter(), JavaScriptAdapter(), CppAdapter(), JavaAdapter())
+}
+# Java is opt-in until its adapter has been run end to end (test_languages.py
+# skips it where no JDK is installed)
+DEFAULT_ENABLED_LANGUAGES = "python,javascript,cpp"
+
+
+def enabled_languages(spec: str) -> dict:
+    names = [name.strip().lower() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ALL_LANGUAGES]
+    if unknown:
+        raise ValueError(f"Unknown JUDGE_LANGUAGES: {', '.join(unknown)}")
+    if DEFAULT_LANGUAGE not in names:
+        raise ValueError(f"JUDGE_LANGUAGES must include {DEFAULT_LANGUAGE}")
+    return {name: ALL_LANGUAGES[name] for name in names}
+
+
+# What submissions may use and problems advertise
+LANGUAGES = enabled_languages(os.getenv("JUDGE_LANGUAGES", DEFAULT_ENABLED_LANGUAGES))
+
+
+def starter_codes(problem: dict, signature) -> dict:
+    """{language: starter code} for every language that can judge the problem."""
+    given = problem.get("starter_codes") or {}
+    codes = {}
+    for name, adapter in LANGUAGES.items():
+        if not adapter.supports(signature):
+            continue
+        if name == DEFAULT_LANGUAGE and problem.get("starter_code"):
+            codes[name] = problem["starter_code"]
+        else:
+            codes[name] = given.get(name) or adapter.starter(signature)
+    return codes
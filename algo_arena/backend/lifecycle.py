@@ -0,0 +1,128 @@
+"""
+AlgoArena Room Lifecycle
+Evicts rooms once they have sat in a state longer than its TTL.
+
+Every status change calls track(room), which (re)schedules the room's
+expiry on a TimerHeap (an active room's runs from its ends_at). One background task drains the expired entries, so
+a sweep only touches rooms that are actually due. Before a room is dropped
+its results can be handed to an archive (e.g. JsonlArchive).
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from timers import TimerHeap
+
+DEFAULT_TTLS = {
+    "waiting": 30 * 60,
+    # Counted from the match's ends_at, not from the status change: a safety
+    # net for a match the timer failed to end, whatever its time limit
+    "active": 5 * 60,
+    "finished": 10 * 60,
+    "abandoned": 5 * 60,
+}
+
+
+def _isoformat(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class JsonlArchive:
+    """Appends one JSON line per evicted room. Hidden tests are left out."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def summarize(room) -> dict:
+        return {
+            "room_id": room.room_id,
+            "status": room.status,
+            "created_at": room.created_at,
+            "archived_at": datetime.now(),
+            "problem_id": room.problem_id,
+            "players": room.usernames,
+            "submissions": room.scores(),
+        }
+
+    def _append(self, line: str):
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    async def save(self, room):
+        line = json.dumps(self.summarize(room), default=_isoformat)
+        # File I/O off the event loop
+        await asyncio.to_thread(self._append, line)
+
+
+class RoomLifecycle:
+    def __init__(self, store, ttls: dict = None, archive=None):
+        self.store = store
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.archive = archive
+        self.timers = TimerHeap()
+
+        self.evicted = 0
+        self.archived = 0
+
+    def track(self, room):
+        status = room.status
+        ttl = self.ttls.get(status)
+        if ttl is None:
+            self.timers.cancel(room.room_id)
+            return
+        if status == "active" and room.ends_at is not None:
+            ttl += (room.ends_at - datetime.now()).total_seconds()
+        self.timers.schedule(room.room_id, time.monotonic() + max(0.0, ttl), status)
+
+    async def sweep(self):
+        for room_id, status in self.timers.pop_expired(time.monotonic()):
+            room = await self.store.get(room_id)
+            if room is None:
+                continue
+
+            # Another worker may have moved it on, restart the clock for that state
+            if room.status != status:
+                self.track(room)
+                continue
+
+            if self.archive is not None:
+                try:
+                    await self.archive.save(room)
+                    self.archived += 1
+                except OSError as e:
+                    print(f"[LOG] Failed to archive room {room_id}: {e}")
+
+            await self.store.delete(room_id)
+            self.evicted += 1
+            print(f"[LOG] Evicted {status} room {room_id}")
+
+    async def run(self, interval_sec: float = 1.0):
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[LOG] Room sweep failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self.timers),
+            "evicted": self.evicted,
+            "archived": self.archived,
+        }
+
+
+def create_lifecycle(store) -> RoomLifecycle:
+    ttls = {
+        status: float(os.getenv(f"ROOM_TTL_{status.upper()}_SEC", default))
+        for status, default in DEFAULT_TTLS.items()
+    }
+    archive_path = os.getenv("ROOM_ARCHIVE_PATH")
+    archive = JsonlArchive(archive_path) if archive_path else None
+    return RoomLifecycle(store, ttls, archive)
@@ -1,15 +1,45 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request, Response
 import json
-from typing import Optional, List, Any, Dict
+import time
+from typing import Optional, List, Any, Dict, Literal
 from pydantic import BaseModel
 import uuid
-import random
 from datetime import datetime
+from contextlib import asynccontextmanager
+import asyncio
+import math
 import socketio
-import httpx
 from dotenv import load_dotenv
 import os
 from fastapi.middleware.cors import CORSMiddleware
+from executor import ExecutorError, StopRun, create_executor
+from fastjson import json_layer
+from history import create_history_store
+from catalog import ProblemCatalog
+from judge_cache import JudgeCache
+from coalesce import EventCoalescer
+from room_store import RedisRoomStore, create_room_store
+from lifecycle import create_lifecycle
+from match_timer import MatchTimer, RedisClockLease
+from matchmaking import Matchmaker
+from ratings import create_rating_book
+from rate_limit import create_rate_limiter
+from rooms import Room, Submission
+from spectators import SpectatorFeed, spectator_channel
+from metrics import SIZE_BUCKETS, MeteredJson, MetricsRegistry
+from harness import (
+    JUDGE_POLICIES,
+    POLICY_FULL,
+    POLICY_PUBLIC_FIRST,
+    TESTS_ALL,
+    TESTS_HIDDEN,
+    TESTS_PUBLIC,
+    FrameDecoder,
+    stops_run,
+    test_passed,
+)
+from languages import DEFAULT_LANGUAGE, LANGUAGES
+from judge_queue import JudgeScheduler, QueueFull, PRIORITY_FINAL, PRIORITY_PRACTICE
 
 # =====================================================
 # APP
@@ -18,7 +48,46 @@ app = FastAPI()
 load_dotenv()
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up the judge backend before the first submission arrives
+    await executor.start()
+    await judge_scheduler.start()
+    await ratings.load()
+    # Pick up edits to problems.json without restarting the app
+    catalog_watcher = asyncio.create_task(
+        catalog.watch(float(os.getenv("CATALOG_RELOAD_SEC", "5")))
+    )
+    room_sweeper = asyncio.create_task(lifecycle.run())
+    match_clock = asyncio.create_task(match_timer.run())
+    matchmaking_sweeper = asyncio.create_task(run_matchmaking())
+    spectator_sender = asyncio.create_task(spectator_feed.run())
+    limiter_sweeper = asyncio.create_task(limiter.run())
+    history_tasks = []
+    if history is not None:
+        history_tasks = [
+            asyncio.create_task(history.run()),
+            asyncio.create_task(
+                history.run_compaction(float(os.getenv("HISTORY_COMPACT_EVERY_SEC", "3600")))
+            ),
+        ]
+    yield
+    for task in history_tasks:
+        task.cancel()
+    limiter_sweeper.cancel()
+    spectator_sender.cancel()
+    matchmaking_sweeper.cancel()
+    match_clock.cancel()
+    room_sweeper.cancel()
+    catalog_watcher.cancel()
+    await judge_scheduler.close()
+    await executor.close()
+    await room_store.close()
+    if history is not None:
+        await history.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add this block!
 app.add_middleware(
@@ -38,6 +107,14 @@ class TestResults(BaseModel):
     expected: Any
     actual: Any
     passed: bool
+    skipped: bool = False
+    wall_time_ms: float = 0.0
+    cpu_time_ms: float = 0.0
+    error: Optional[str] = None
+    # What the submission printed during this test, capped per test
+    stdout: str = ""
+    stderr: str = ""
+    output_truncated: bool = False
 
 
 # What a problem summary looks like
@@ -45,6 +122,7 @@ class ProblemSummary(BaseModel):
     id: str
     title: str
     difficulty: str
+    tags: List[str] = []
 
 
 # This is fancy code for a "Dictionary." It means the input will look like { "name": "value" }. The Any part just means the value could be a string, a number, or a list.
@@ -75,43 +153,70 @@ class PlayerStatus(BaseModel):
 class SubmissionRequest(BaseModel):
     username: str
     code: str
+    language: str = DEFAULT_LANGUAGE  # one of JUDGE_LANGUAGES (python / javascript / cpp)
+    practice: bool = False  # judged at low priority and not recorded
 
 
 class CreateRoomRequest(BaseModel):
     username: str
     difficulty: str
     time_limit_sec: int = 600
+    judge_policy: Optional[Literal[JUDGE_POLICIES]] = None  # full / fail_fast / public_first
 
 
 class JoinRoomRequest(BaseModel):
     username: str
 
 
+class MatchmakingRequest(BaseModel):
+    username: str
+    difficulty: str
+
+
 # =====================================================
 # RESPONSE MODELS
 # =====================================================
 class SubmissionResponse(BaseModel):
     submission_id: str
     username: str
+    language: str = DEFAULT_LANGUAGE
     status: str
     total_passed: int
     total_tests: int
-    execution_time_ms: int
+    total_skipped: int = 0
+    execution_time_ms: float
+    cpu_time_ms: float = 0.0
+    measured_time_ms: Optional[float] = None
+    cached: bool = False
+    queue_wait_ms: float = 0.0
+    stdout: str = ""
+    stderr: str = ""
     test_results: List[TestResults]
 
 
+# What GET /rooms/{room_id}/submissions/{username} returns
+class SubmissionDetailsResponse(SubmissionResponse):
+    code: str
+    submitted_at: datetime
+
+
 # Define the structure of the final response
 class ProblemResponse(BaseModel):
     items: List[ProblemSummary]
     count: int
+    total: int  # matching problems across all pages
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page
 
 
 class ProblemDetailsResponse(BaseModel):
     id: str
     title: str
     difficulty: str
+    tags: List[str] = []
     description: str
     starter_code: str
+    starter_codes: Dict[str, str] = {}  # language -> starter code
+    languages: List[str] = [DEFAULT_LANGUAGE]
     public_tests: List[TestCase]
 
 
@@ -135,13 +240,111 @@ class RoomStatusResponse(BaseModel):
 # =====================================================
 # DATA
 # =====================================================
-with open("problems.json", "r") as f:
-    problems_db = json.load(f)
+catalog = ProblemCatalog("problems.json")
+
+
+# Rooms and online users, in memory or shared through Redis (ROOM_STORE)
+room_store = create_room_store()
+
+# Token buckets per event type, by username and by socket (RATE_LIMIT_<EVENT>),
+# shared through Redis when the rooms are
+limiter = create_rate_limiter(room_store)
+
+# Pairs players looking for an opponent (per worker)
+matchmaker = Matchmaker(
+    band_width=int(os.getenv("MATCH_RATING_BAND", "100")),
+    widen_every_sec=float(os.getenv("MATCH_WIDEN_EVERY_SEC", "10")),
+    max_bands=int(os.getenv("MATCH_MAX_BANDS", "5")),
+)
+MATCH_TIME_LIMIT_SEC = int(os.getenv("MATCH_TIME_LIMIT_SEC", "600"))
+
+# Matches, submissions and per-test results in SQLite (HISTORY_DB_PATH),
+# written behind the handlers in batches; None if disabled
+history = create_history_store()
+
+# Elo per player, updated by every finished match. In memory with a JSONL log
+# (RATINGS_PATH), or in Redis with ROOM_STORE=redis so every worker shares it
+ratings = create_rating_book(room_store)
+
+# One heap-driven clock for every running match (ends_at). With the Redis
+# store a per-room lease picks the one worker that ticks and ends each match
+match_timer = MatchTimer(
+    on_timeout=lambda room_id: end_match_on_timeout(room_id),
+    on_tick=lambda room_id, remaining: send_time_remaining(room_id, remaining),
+    tick_sec=float(os.getenv("MATCH_TICK_SEC", "10")),
+    lease=RedisClockLease(
+        room_store.client,
+        prefix=room_store.prefix,
+        ttl_sec=float(os.getenv("MATCH_CLOCK_LEASE_SEC", "30")),
+    )
+    if isinstance(room_store, RedisRoomStore)
+    else None,
+)
+
+# Evicts rooms that outlive their state's TTL (ROOM_TTL_<STATE>_SEC)
+lifecycle = create_lifecycle(room_store)
+
+# Judge backend, picked by JUDGE_BACKEND ("piston" or "local")
+executor = create_executor()
 
+judge_cache = JudgeCache(
+    max_entries=int(os.getenv("JUDGE_CACHE_SIZE", "1024")),
+    ttl_sec=float(os.getenv("JUDGE_CACHE_TTL_SEC", "600")),
+)
+
+# Used when neither the room nor the problem sets a judge_policy
+DEFAULT_JUDGE_POLICY = os.getenv("JUDGE_POLICY", POLICY_FULL)
 
-rooms_db = {}
+# Read-only watchers get the whole room at most SPECTATOR_UPDATES_PER_SEC times
+# a second, sent from their own task so players never wait on them
+spectator_feed = SpectatorFeed(
+    emit=lambda room: send_spectator_update(room),
+    updates_per_sec=float(os.getenv("SPECTATOR_UPDATES_PER_SEC", "2")),
+    only_watched=not isinstance(room_store, RedisRoomStore),
+)
 
-online_users = {}
+# FAST_JSON=1 encodes Socket.IO emits and trusted responses with orjson.
+# TRUST_INTERNAL_RESPONSES=1 sends the big submission dicts the server built
+# itself as they are, skipping response_model revalidation (extra keys such
+# as "code" or an error "message" then pass through).
+SOCKET_JSON, TrustedJSONResponse = json_layer(os.getenv("FAST_JSON", "0") == "1")
+TRUST_INTERNAL_RESPONSES = os.getenv("TRUST_INTERNAL_RESPONSES", "0") == "1"
+
+# Problem details only change when problems.json does; the ETag catches that
+PROBLEM_MAX_AGE_SEC = int(os.getenv("PROBLEM_CACHE_MAX_AGE_SEC", "86400"))
+
+# At most one test_progress emit per room per interval
+PROGRESS_INTERVAL_SEC = float(os.getenv("PROGRESS_INTERVAL_MS", "100")) / 1000
+
+# Caps how many judge calls are in flight; extra ones wait in a bounded queue
+judge_scheduler = JudgeScheduler(
+    concurrency=int(os.getenv("JUDGE_CONCURRENCY", "4")),
+    max_queue=int(os.getenv("JUDGE_QUEUE_SIZE", "100")),
+)
+
+# Served on /metrics in the Prometheus text format (per worker)
+metrics = MetricsRegistry()
+judge_phase_seconds = metrics.histogram(
+    "judge_phase_seconds",
+    "Judge time by phase: queue_wait, compile (local builds), execute (the Piston HTTP call or local run), parse",
+    ("phase",),
+)
+submissions_total = metrics.counter(
+    "submissions_total", "Judged submissions by verdict", ("status", "kind")
+)
+socket_emit_bytes = metrics.histogram(
+    "socket_emit_bytes",
+    "Encoded size of outgoing Socket.IO events (a room broadcast counts once)",
+    ("event",),
+    buckets=SIZE_BUCKETS,
+)
+catalog_lookups_total = metrics.counter(
+    "catalog_lookups_total", "Problem catalog lookups", ("lookup", "result")
+)
+rooms_gauge = metrics.gauge("rooms", "Rooms by status", ("status",))
+online_users_gauge = metrics.gauge("online_users", "Connected and identified sockets")
+judge_queue_gauge = metrics.gauge("judge_queue", "Judge scheduler state", ("state",))
+judge_cache_gauge = metrics.gauge("judge_cache", "Judge cache counters", ("counter",))
 
 
 # =====================================================
@@ -149,82 +352,496 @@ online_users = {}
 # =====================================================
 
 
-async def validate_submission(problem_id: str, user_code: str):
-    # 1. Fetch full problem data (including hidden tests)
-    problem = next((p for p in problems_db if p["id"] == problem_id), None)
-    if not problem:
-        return {"status": "error", "message": "Problem database mismatch"}
+def decide_winner(room):
+    # Most tests passed wins, equal scores go to the faster solution.
+    # Players who never submitted count as 0 passed. Speed is the executor's
+    # measurement, never the per-test times the submission reported itself;
+    # without one for both players an equal score stays a tie.
+    submissions = room.submissions
+    names = room.usernames
+    names += [name for name in submissions if name not in room.players]
+
+    def rank(name):
+        sub = submissions.get(name)
+        if not sub:
+            return (0, None)
+        return (sub.total_passed, sub.measured_time_ms)
+
+    def order(name):
+        passed, measured = rank(name)
+        return (-passed, measured if measured is not None else float("inf"))
+
+    ranked = sorted(names, key=order)
+    if not ranked or rank(ranked[0])[0] == 0:
+        return None  # Nobody passed anything
+    if len(ranked) > 1:
+        (best, best_ms), (second, second_ms) = rank(ranked[0]), rank(ranked[1])
+        if best == second and (best_ms is None or second_ms is None or best_ms == second_ms):
+            return None  # Tie
+    return ranked[0]
+
+
+def finish_match(room, reason: str):
+    # Called inside a room update, in the same change as the last submission or timeout
+    room.status = "finished"
+    room.end_reason = reason
+    room.winner = decide_winner(room)
+
+
+def room_changed(room):
+    # Keep the eviction TTL and the match clock in step with the room status
+    lifecycle.track(room)
+    if room.status == "active":
+        # From the stored end time: a room this worker hasn't seen before may
+        # have started elsewhere, or be past its end already
+        if room.room_id not in match_timer.deadlines:
+            match_timer.start(room.room_id, room.ends_at)
+    else:
+        match_timer.cancel(room.room_id)
+    spectator_feed.publish(room)
+
+
+def problem_summary(problem_id: str) -> dict:
+    # Rooms only keep the problem id, the title lives in the catalog
+    problem = catalog.get(problem_id) or {}
+    return {
+        "id": problem_id,
+        "title": problem.get("title", ""),
+        "difficulty": problem.get("difficulty", ""),
+    }
+
 
-    # Combine public and hidden tests for the final judge
-    all_tests = problem.get("public_tests", []) + problem.get("hidden_tests", [])
+async def send_snapshot(sid: str, room):
+    # Full state for a socket that just joined or lost track of the seq
+    await sio.emit(
+        "room_snapshot", room.snapshot(problem_summary(room.problem_id)), to=sid
+    )
 
-    test_results = []
-    passed_count = 0
 
-    # 2. Prepare the Wrapper Script
-    # We wrap the user's code to execute each test case and print results in a parsable way
-    # This example assumes Python.
-    full_code = user_code + "\n\n"
-    full_code += "import json\n"
-    full_code += f"tests = {json.dumps(all_tests)}\n"
-    full_code += "results = []\n"
-    full_code += "for t in tests:\n"
-    full_code += "    try:\n"
-    full_code += "        # Dynamic call: assumes a function named 'solution'\n"
-    full_code += "        res = solution(**t['input'])\n"
-    full_code += "        print(json.dumps({'actual': res}))\n"
-    full_code += "    except Exception as e:\n"
-    full_code += "        print(json.dumps({'error': str(e)}))\n"
-
-    # 3. Call Piston API
-    PISTON_URL = os.getenv("PISTON_API_URL")
-    payload = {
-        "language": "python",
-        "version": "3.10.0",
-        "files": [{"content": full_code}],
+async def send_spectator_update(room):
+    # Same body as room_snapshot, encoded once for the whole spectator room
+    await sio.emit(
+        "spectator_update",
+        room.snapshot(problem_summary(room.problem_id)),
+        room=spectator_channel(room.room_id),
+    )
+
+
+def trusted(body: dict):
+    # A Response skips FastAPI's response_model handling altogether
+    if TRUST_INTERNAL_RESPONSES:
+        return TrustedJSONResponse(body)
+    return body
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/"x" matches "x" too
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in header.split(",")
+    )
+
+
+def cached_response(request: Request, etag: str, cache_control: str, content):
+    """200 with `content()` or a bodiless 304 when the client's copy is current."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content(), media_type="application/json", headers=headers)
+
+
+def room_status_response(room, status_code: int = 200):
+    # Encoded once per room change instead of revalidated on every request
+    return Response(
+        content=room.status_json(problem_summary(room.problem_id)),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+async def end_match_on_timeout(room_id: str):
+    ended = False
+
+    def finish(room):
+        nonlocal ended
+        ended = False  # set afresh on every attempt, update may retry
+        if room.status == "active":
+            finish_match(room, "timeout")
+            room.bump()
+            ended = True
+
+    room = await room_store.update(room_id, finish)
+    if room is None or not ended:
+        return
+
+    room_changed(room)
+    print(f"[LOG] Match in room {room_id} ran out of time")
+
+    # Scored on whatever was submitted before the deadline
+    await sio.emit("match_ended", room.ended_payload(), room=room_id)
+    await record_match(room)
+
+
+async def record_match(room):
+    # Called once per finished match, after match_ended went out
+    if history is not None:
+        history.record_match(room)
+
+    # Only finished 1v1s count, an abandoned match leaves ratings alone
+    changes = await ratings.record_match(room.usernames, room.winner, room.room_id)
+    if not changes:
+        return
+    await sio.emit(
+        "rating_update", {"room_id": room.room_id, "ratings": changes}, room=room.room_id
+    )
+    await ratings.save(list(changes))
+
+
+async def send_time_remaining(room_id: str, remaining_sec: float):
+    await sio.emit(
+        "time_remaining",
+        {"room_id": room_id, "remaining_sec": math.ceil(remaining_sec)},
+        room=room_id,
+    )
+
+
+def build_room(difficulty: str, time_limit_sec: int, judge_policy, usernames: list):
+    # pick a random problem matchin the difficulty
+    selected_problem = catalog.random_problem(difficulty)
+    if not selected_problem:
+        return None
+
+    room = Room(
+        room_id=str(uuid.uuid4())[:8],  # Short unique ID like 'a1b2c3d4'
+        problem_id=selected_problem["id"],
+        time_limit_sec=time_limit_sec,
+        judge_policy=judge_policy,
+    )
+    for name in usernames:
+        room.add_player(name, room.created_at)
+    return room
+
+
+async def open_match(first, second):
+    # Both players are already known, so the match starts right away
+    room = build_room(
+        first.difficulty,
+        MATCH_TIME_LIMIT_SEC,
+        None,
+        [first.username, second.username],
+    )
+    if room is None:
+        for ticket in (first, second):
+            if ticket.sid:
+                await sio.emit(
+                    "error", {"detail": "No problems found for this difficuly"}, to=ticket.sid
+                )
+        return None
+
+    room.start()
+    await room_store.create(room)
+    room_changed(room)
+
+    room_id = room.room_id
+    print(f"[LOG] Matched {first.username} vs {second.username} in room {room_id}")
+
+    for ticket, opponent in ((first, second), (second, first)):
+        matchmaker.remember_match(ticket.username, room_id)
+        if not ticket.sid:
+            continue
+        await sio.save_session(ticket.sid, {"username": ticket.username, "room_id": room_id})
+        await sio.enter_room(ticket.sid, room_id)
+        await sio.emit(
+            "match_found",
+            {
+                "room_id": room_id,
+                "opponent": opponent.username,
+                "problem": problem_summary(room.problem_id),
+                "ends_at": room.update_payload()["ends_at"],
+            },
+            to=ticket.sid,
+        )
+        # Both players are new to the room, so each gets the full state
+        await send_snapshot(ticket.sid, room)
+
+    return room
+
+
+async def run_matchmaking(interval_sec: float = 1.0):
+    # Pairs players whose rating search has widened enough to meet
+    while True:
+        await asyncio.sleep(interval_sec)
+        for first, second in matchmaker.sweep():
+            try:
+                await open_match(first, second)
+            except Exception as e:
+                print(f"[LOG] Opening match failed: {e}")
+
+
+def error_result(message: str, total_tests: int = 0):
+    # Same shape as a normal verdict, so callers can always read the totals.
+    # The reason goes in stderr too, the only text field the response model has
+    return {
+        "status": "error",
+        "message": message,
+        "stderr": message,
+        "total_passed": 0,
+        "total_tests": total_tests,
+        "execution_time_ms": 0,
+        "cpu_time_ms": 0,
+        "measured_time_ms": None,
+        "test_results": [],
     }
 
-    async with httpx.AsyncClient() as client:
+
+def client_key(http_request: Request) -> str:
+    # The username in a REST body is only a claim, the caller's address is not
+    host = http_request.client.host if http_request.client else "unknown"
+    return f"addr:{host}"
+
+
+async def check_rate_rest(event: str, http_request: Request = None, username: str = None):
+    """
+    Charges the caller's address, or with `username` that user's bucket.
+    Charge the user only once the request has checked out, so nobody can
+    drain someone else's budget with requests that were going to fail.
+    """
+    if username:
+        retry_after = await limiter.check(event, username=username)
+    else:
+        retry_after = await limiter.check(event, sid=client_key(http_request))
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail={"message": "Too many requests, slow down", "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+async def check_rate_socket(event: str, sid: str, username: str = None) -> bool:
+    # The socket's bucket, or with `username` the user's (same rule as REST).
+    # Tells the socket when to retry; the caller just returns on False
+    if username:
+        retry_after = await limiter.check(event, username=username)
+    else:
+        retry_after = await limiter.check(event, sid=sid)
+    if retry_after:
+        await sio.emit(
+            "error",
+            {"detail": "Too many requests, slow down", "event": event, "retry_after": retry_after},
+            to=sid,
+        )
+        return False
+    return True
+
+
+def require_history():
+    if history is None:
+        raise HTTPException(status_code=503, detail="History is disabled")
+    return history
+
+
+def language_error(problem_id: str, language: str) -> Optional[str]:
+    # Checked before judging, so a bad language doesn't use up the submission
+    adapter = LANGUAGES.get(language)
+    if adapter is None:
+        return f"Unsupported language: {language}"
+    harness = catalog.harness(problem_id)
+    if harness is not None and not adapter.supports(harness.signature):
+        return f"{adapter.label} is not available for this problem"
+    return None
+
+
+async def validate_submission(
+    problem_id: str,
+    user_code: str,
+    policy: Optional[str] = None,
+    priority=PRIORITY_FINAL,
+    on_queued=None,
+    on_progress=None,
+    language: str = DEFAULT_LANGUAGE,
+):
+    # 1. Fetch the problem's prebuilt harness (public + hidden tests)
+    kind = "practice" if priority == PRIORITY_PRACTICE else "final"
+    harness = catalog.harness(problem_id)
+    if not harness:
+        submissions_total.inc("error", kind)
+        return error_result("Problem database mismatch")
+
+    adapter = LANGUAGES[language]
+    # Room policy wins, then the problem's own, then the server default
+    policy = policy or harness.default_policy or DEFAULT_JUDGE_POLICY
+
+    # Identical resubmissions are answered from the cache, without the executor
+    cache_key = judge_cache.make_key(
+        problem_id, harness.version, user_code, policy, language
+    )
+    cached = judge_cache.get(cache_key)
+    if cached is not None:
+        submissions_total.inc(cached["status"], kind)
+        return {**cached, "cached": True}
+
+    # Raises QueueFull when the judge is saturated
+    result, wait_ms = await judge_scheduler.submit(
+        priority,
+        run_judge,
+        harness,
+        user_code,
+        policy,
+        on_progress,
+        adapter,
+        on_queued=on_queued,
+    )
+    judge_phase_seconds.observe(wait_ms / 1000, "queue_wait")
+    submissions_total.inc(result["status"], kind)
+
+    # Engine failures and crashes may be transient, so only cache real verdicts
+    if result["status"] != "error":
+        judge_cache.put(cache_key, result)
+
+    return {**result, "queue_wait_ms": round(wait_ms, 3)}
+
+
+async def run_judge(
+    harness,
+    user_code: str,
+    policy: str = POLICY_FULL,
+    on_progress=None,
+    language=LANGUAGES[DEFAULT_LANGUAGE],
+):
+    all_tests = harness.tests
+    # Result records by test index, decoded as soon as the executor hands bytes over
+    outputs = {}
+    done = None  # the current run's closing record
+    top = None  # the first run's, it has the module-level output
+    stopped = False
+    parse_sec = 0.0
+
+    def collector(first: int):
+        # `first` is the index of the run's first test; records count from 0
+        decoder = FrameDecoder()
+
+        def collect(chunk: bytes):
+            nonlocal done, stopped, parse_sec
+            started = time.perf_counter()
+            try:
+                for data in decoder.feed(chunk):
+                    if data.get("done"):
+                        done = data
+                        continue
+                    index = data.get("i")
+                    if not isinstance(index, int) or not 0 <= first + index < len(all_tests):
+                        continue
+                    index += first
+                    outputs[index] = data
+                    passed = test_passed(data, all_tests[index])
+                    if on_progress:
+                        on_progress(
+                            {
+                                "index": index,
+                                "total": len(all_tests),
+                                "passed": passed,
+                                "wall_time_ms": round(data.get("wall_ms", 0.0), 3),
+                            }
+                        )
+                    # The verdict is made here, never in the sandbox: the
+                    # harness has no answers, the executor kills the run
+                    if not passed and stops_run(policy, index, harness.public_count):
+                        stopped = True
+                        raise StopRun
+            finally:
+                parse_sec += time.perf_counter() - started
+
+        return collect
+
+    test_results = []
+    passed_count = 0
+    skipped_count = 0
+    total_wall_ms = 0.0
+    measured_ms = 0.0
+    total_cpu_ms = 0.0
+
+    # 2. Splice the user's code into the language's cached wrapper
+    # The test inputs travel separately on stdin, serialized once per problem
+    full_code = language.source(harness, user_code)
+
+    # A backend that can't stream can't be stopped after the public tests,
+    # so public_first runs them on their own first
+    parts = [TESTS_ALL]
+    if (
+        policy == POLICY_PUBLIC_FIRST
+        and not executor.streams
+        and 0 < harness.public_count < len(all_tests)
+    ):
+        parts = [TESTS_PUBLIC, TESTS_HIDDEN]
+
+    # 3. Run it on the configured execution backend (Piston or local pool)
+    for part in parts:
+        first, _ = harness.tests_in(part)
+        started = time.perf_counter()
+        parse_before = parse_sec
+        compile_sec = 0.0
+        done = None
         try:
-            response = await client.post(PISTON_URL, json=payload, timeout=10.0)
-            execution = response.json()
-        except Exception as e:
-            return {"status": "error", "message": f"Execution engine unreachable: {e}"}
-
-    # 4. Parse Output
-    run_data = execution.get("run", {})
-    stdout_lines = run_data.get("stdout", "").strip().split("\n")
-    stderr = run_data.get("stderr", "")
-
-    if stderr:
-        return {
-            "status": "error",
-            "message": stderr,
-            "total_passed": 0,
-            "total_tests": len(all_tests),
-            "execution_time_ms": 0,
-            "test_results": [],
-        }
+            execution = await executor.run(
+                full_code,
+                stdin=language.stdin(harness, part),
+                on_output=collector(first),
+                language=language,
+            )
+            # Only when this call had to build; cached builds report nothing
+            compile_sec = execution.get("compile_ms", 0.0) / 1000
+            if measured_ms is not None and execution.get("run_ms") is not None:
+                measured_ms += execution["run_ms"]
+            else:
+                measured_ms = None
+            if compile_sec:
+                judge_phase_seconds.observe(compile_sec, "compile")
+        except ExecutorError as e:
+            return error_result(f"Execution engine unreachable: {e}", len(all_tests))
+        finally:
+            judge_phase_seconds.observe(
+                time.perf_counter() - started - (parse_sec - parse_before) - compile_sec,
+                "execute",
+            )
+
+        # 4. No closing record means the run never finished (syntax error, crash,
+        # time or output limit), unless it was stopped on purpose. Warnings on
+        # stderr alone don't fail a submission.
+        if stopped:
+            break
+        if done is None:
+            stderr = execution["stderr"].strip()
+            if not stderr:
+                stderr = f"Judge exited with code {execution['exit_code']} before finishing"
+            return error_result(stderr, len(all_tests))
+        top = top or done
+    started = time.perf_counter()
+    top = top or {}
 
     # 5. Compare Actual vs Expected
     for i, test in enumerate(all_tests):
-        try:
-            actual_data = json.loads(stdout_lines[i])
-            actual_val = actual_data.get("actual")
-
-            is_passed = actual_val == test["expected"]
-            if is_passed:
-                passed_count += 1
+        actual_data = outputs.get(i)
 
+        # The run was stopped early under fail_fast / public_first
+        if actual_data is None and stopped:
+            skipped_count += 1
             test_results.append(
                 {
                     "input": test["input"],
                     "expected": test["expected"],
-                    "actual": actual_val,
-                    "passed": is_passed,
+                    "actual": None,
+                    "passed": False,
+                    "skipped": True,
                 }
             )
-        except:
+            continue
+
+        if actual_data is None:
             test_results.append(
                 {
                     "input": test["input"],
@@ -233,12 +850,48 @@ async def validate_submission(problem_id: str, user_code: str):
                     "passed": False,
                 }
             )
+            continue
+
+        actual_val = actual_data.get("actual")
+        wall_ms = actual_data.get("wall_ms", 0.0)
+        cpu_ms = actual_data.get("cpu_ms", 0.0)
+        total_wall_ms += wall_ms
+        total_cpu_ms += cpu_ms
+
+        is_passed = test_passed(actual_data, test)
+        if is_passed:
+            passed_count += 1
+
+        test_results.append(
+            {
+                "input": test["input"],
+                "expected": test["expected"],
+                "actual": actual_val,
+                "passed": is_passed,
+                "wall_time_ms": round(wall_ms, 3),
+                "cpu_time_ms": round(cpu_ms, 3),
+                "error": actual_data.get("error"),
+                "stdout": actual_data.get("stdout", ""),
+                "stderr": actual_data.get("stderr", ""),
+                "output_truncated": actual_data.get("truncated", False),
+            }
+        )
 
+    judge_phase_seconds.observe(time.perf_counter() - started + parse_sec, "parse")
     return {
         "status": "passed" if passed_count == len(all_tests) else "failed",
         "total_passed": passed_count,
         "total_tests": len(all_tests),
-        "execution_time_ms": 100,  # Piston doesn't always provide raw MS, can be estimated
+        "total_skipped": skipped_count,
+        # Summed from the harness's per-test timers, so process start-up is excluded
+        "execution_time_ms": round(total_wall_ms, 3),
+        "cpu_time_ms": round(total_cpu_ms, 3),
+        # Taken by the executor from outside the submission; the per-test
+        # timers above are the submission's own word, so only this breaks ties
+        "measured_time_ms": round(measured_ms, 3) if measured_ms is not None else None,
+        # Printed at module level, outside any test
+        "stdout": top.get("stdout", ""),
+        "stderr": top.get("stderr", ""),
         "test_results": test_results,
     }
 
@@ -253,114 +906,315 @@ def health():
     return {"Status": "Ok", "Service": "algoarena-backend"}
 
 
-@app.get("/problems", response_model=ProblemResponse)
-def get_problems(difficulty: Optional[str] = None, limit: int = 10):
-    filtered_items = []
+@app.get("/judge/stats")
+def judge_stats():
+    return {
+        "cache": judge_cache.stats(),
+        "queue": judge_scheduler.stats(),
+        "rate_limit": limiter.stats(),
+        **executor.stats(),
+    }
 
-    for i in problems_db:
-        # filtering logic
-        if difficulty and i["difficulty"] != difficulty.lower():
-            continue
 
-        filtered_items.append(i)
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Copy state that lives elsewhere into gauges, only when scraped
+    rooms_gauge.replace(await room_store.count_by_status())
+    online_users_gauge.set(await room_store.online_count())
+    catalog_lookups_total.replace(catalog.lookups)
 
-        if len(filtered_items) >= limit:
-            break
+    queue = judge_scheduler.stats()
+    judge_queue_gauge.replace(
+        {state: queue[state] for state in ("queue_depth", "in_flight", "rejected")}
+    )
+    cache = judge_cache.stats()
+    judge_cache_gauge.replace(
+        {counter: cache[counter] for counter in ("hits", "misses", "evictions")}
+    )
 
-    return {"items": filtered_items, "count": len(filtered_items)}
+    return Response(
+        content=metrics.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/rooms/stats")
+async def room_stats():
+    return {
+        "rooms": await room_store.count(),
+        "lifecycle": lifecycle.stats(),
+        "match_timer": match_timer.stats(),
+        "spectators": spectator_feed.stats(),
+        "history": history.stats() if history is not None else None,
+    }
+
+
+@app.get("/problems", response_model=ProblemResponse)
+def get_problems(
+    request: Request,
+    difficulty: Optional[str] = None,
+    tags: Optional[str] = None,  # comma-separated, a problem needs all of them
+    title: Optional[str] = None,  # case-insensitive title prefix
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    tag_list = [tag.strip() for tag in (tags or "").split(",") if tag.strip()]
+
+    def render():
+        # served straight from the pre-built listing indexes
+        try:
+            items, total, next_cursor = catalog.page(
+                difficulty, tag_list, title, limit, cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return json.dumps(
+            {"items": items, "count": len(items), "total": total, "next_cursor": next_cursor}
+        ).encode()
+
+    # The same query over the same problem set gives the same page, so the
+    # catalog's content hash is all the ETag needs (ETags are per URL anyway)
+    return cached_response(request, f'"{catalog.version}"', "no-cache", render)
 
 
 @app.get("/problems/{problem_id}", response_model=ProblemDetailsResponse)
-def get_problem_by_id(problem_id: str):
-    # search for the problem in our database
+def get_problem_by_id(problem_id: str, request: Request):
+    # the catalog keeps every problem's response (and its ETag) already encoded
+    payload = catalog.details_json(problem_id)
 
-    for i in problems_db:
-        if i["id"] == problem_id:
-            return i
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Problem not found")
 
-    raise HTTPException(status_code=404, detail="Problem not found")
+    return cached_response(
+        request,
+        catalog.details_etag(problem_id),
+        f"public, max-age={PROBLEM_MAX_AGE_SEC}",
+        lambda: payload,
+    )
 
 
 @app.post("/rooms", response_model=RoomStatusResponse, status_code=201)
-def create_room(request: CreateRoomRequest):
-    # pick a random problem matchin the difficulty
-    matching_problems = [
-        i for i in problems_db if i["difficulty"] == request.difficulty.lower()
-    ]
+async def create_room(request: CreateRoomRequest, http_request: Request):
+    await check_rate_rest("create_room", http_request)
 
-    if not matching_problems:
+    # create the room object
+    new_room = build_room(
+        request.difficulty,
+        request.time_limit_sec,
+        request.judge_policy,
+        [request.username],
+    )
+
+    if not new_room:
         raise HTTPException(
             status_code=404, detail="No problems found for this difficuly"
         )
 
-    selected_problem = random.choice(matching_problems)
+    await check_rate_rest("create_room", username=request.username)
+    await room_store.create(new_room)
+    room_changed(new_room)
 
-    # generate room id
-    room_id = str(uuid.uuid4())[:8]  # Short unique ID like 'a1b2c3d4'
+    return room_status_response(new_room, status_code=201)
 
-    # create the room object
-    new_room = {
-        "room_id": room_id,
-        "status": "waiting",
-        "created_at": datetime.now(),
-        "time_limit_sec": request.time_limit_sec,
-        "problem": selected_problem,
-        "players": [{"username": request.username, "joined_at": datetime.now()}],
+
+@app.post("/matchmaking")
+async def find_match_rest(request: MatchmakingRequest, http_request: Request):
+    await check_rate_rest("matchmaking", http_request)
+
+    if not catalog.summaries(request.difficulty, 1):
+        raise HTTPException(
+            status_code=404, detail="No problems found for this difficuly"
+        )
+
+    await check_rate_rest("matchmaking", username=request.username)
+
+    # Paired on the server-side rating, never on one the client claims
+    ticket, opponent = matchmaker.enqueue(
+        request.username, request.difficulty, await ratings.rating_of(request.username)
+    )
+    if opponent is None:
+        return {"status": "queued", **matchmaker.stats()}
+
+    room = await open_match(opponent, ticket)
+    if room is None:
+        raise HTTPException(
+            status_code=404, detail="No problems found for this difficuly"
+        )
+    return {"status": "matched", "room_id": room.room_id}
+
+
+@app.get("/matchmaking/stats")
+def matchmaking_stats():
+    return matchmaker.stats()
+
+
+@app.get("/leaderboard")
+async def leaderboard(
+    limit: int = Query(10, ge=1, le=100), offset: int = Query(0, ge=0)
+):
+    return {"players": await ratings.count(), "entries": await ratings.top(limit, offset)}
+
+
+@app.get("/ratings/{username}")
+async def player_rating(username: str):
+    player = await ratings.get(username)
+    if player is None:
+        raise HTTPException(status_code=404, detail="Player has no rated matches")
+    return {
+        "rank": await ratings.rank(username),
+        "players": await ratings.count(),
+        **player.to_dict(),
     }
 
-    rooms_db[room_id] = new_room
 
-    return new_room
+@app.get("/ratings/{username}/around")
+async def players_around(username: str, radius: int = Query(5, ge=0, le=50)):
+    entries = await ratings.around(username, radius)
+    if not entries:
+        raise HTTPException(status_code=404, detail="Player has no rated matches")
+    return {"players": await ratings.count(), "entries": entries}
+
+
+@app.get("/history/users/{username}/submissions")
+async def user_submission_history(
+    username: str, limit: int = Query(20, ge=1, le=100), before: Optional[str] = None
+):
+    # Newest first; pass the last submitted_at as `before` for the next page.
+    # Only submissions from matches that are over are listed.
+    return {"entries": await require_history().submissions_by_user(username, limit, before)}
+
+
+@app.get("/history/users/{username}/matches")
+async def user_match_history(
+    username: str, limit: int = Query(20, ge=1, le=100), before: Optional[str] = None
+):
+    return {"entries": await require_history().matches_by_user(username, limit, before)}
+
+
+@app.get("/history/problems/{problem_id}/submissions")
+async def problem_submission_history(
+    problem_id: str, limit: int = Query(20, ge=1, le=100), before: Optional[str] = None
+):
+    return {
+        "entries": await require_history().submissions_by_problem(problem_id, limit, before)
+    }
+
+
+@app.get("/history/submissions/{submission_id}")
+async def submission_history(submission_id: str):
+    submission = await require_history().submission(submission_id)
+    if submission is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    # Same rule as the live room: code stays private until the match is over,
+    # whoever asks
+    if submission["match_status"] is None:
+        raise HTTPException(
+            status_code=403, detail="Submissions are hidden until the match ends"
+        )
+    return submission
+
+
+@app.get("/matchmaking/{username}")
+def matchmaking_status(username: str):
+    if username in matchmaker.matched:
+        return {"status": "matched", "room_id": matchmaker.matched[username]}
+    if username in matchmaker:
+        return {"status": "queued"}
+    raise HTTPException(status_code=404, detail="Not in the matchmaking queue")
+
+
+@app.delete("/matchmaking/{username}")
+def cancel_match_rest(username: str):
+    if not matchmaker.cancel(username):
+        raise HTTPException(status_code=404, detail="Not in the matchmaking queue")
+    return {"status": "cancelled"}
 
 
 @app.post("/rooms/{room_id}/join", response_model=RoomStatusResponse)
-def join_room(room_id: str, request: JoinRoomRequest):
+async def join_room(room_id: str, request: JoinRoomRequest, http_request: Request):
+    await check_rate_rest("join", http_request)
 
-    # check if room exits
-    if room_id not in rooms_db:
+    if await room_store.get(room_id) is None:
         raise HTTPException(status_code=404, detail="Room not found")
+    await check_rate_rest("join", username=request.username)
 
-    room = rooms_db[room_id]
+    def add_player(room):
+        if request.username not in room.players:
+            # check if full
+            if len(room.players) >= 2:
+                raise HTTPException(status_code=409, detail="Room full")
+            if room.is_over:
+                raise HTTPException(status_code=409, detail="Match is over")
 
-    # check if full
-    if len(room["players"]) >= 2:
-        raise HTTPException(status_code=409, detail="Room full")
+        # add second player
+        room.add_player(request.username)
 
-    # add second player
-    room["players"].append({"username": request.username, "joined_at": datetime.now()})
+        if len(room.players) == 2 and room.status == "waiting":
+            room.start()
+        room.bump()
 
-    room["status"] = "active"
+    room = await room_store.update(room_id, add_player)
 
-    return room
+    # check if room exits
+    if room is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    room_changed(room)
+    # Sockets already in the room hear about REST joins too
+    await sio.emit("room_update", room.update_payload(), room=room_id)
+
+    return room_status_response(room)
 
 
 @app.get("/rooms/{room_id}", response_model=RoomStatusResponse)
-def get_room_status(room_id: str):
+async def get_room_status(room_id: str):
     # look for room
-    if room_id not in rooms_db:
+    room = await room_store.get(room_id)
+    if room is None:
         raise HTTPException(status_code=404, detail="Room not found")
 
-    return rooms_db[room_id]
+    return room_status_response(room)
 
 
 @app.post("/rooms/{room_id}/submit", response_model=SubmissionResponse)
-async def submit_code(room_id: str, request: SubmissionRequest):
-    if room_id not in rooms_db:
+async def submit_code(room_id: str, request: SubmissionRequest, http_request: Request):
+    await check_rate_rest("submit", http_request)
+
+    room = await room_store.get(room_id)
+    if room is None:
         raise HTTPException(status_code=404, detail="Room not fount")
 
-    room = rooms_db[room_id]
     # test
-    if room["status"] != "active":
+    if room.status != "active":
         raise HTTPException(status_code=400, detail="Room is not active")
 
-    player_names = [p["username"] for p in room["players"]]
-
-    if request.username not in player_names:
+    if request.username not in room.players:
         raise HTTPException(
             status_code=403, detail="User is not a participant in this room"
         )
 
-    result = await validate_submission(room["problem"]["id"], request.code)
+    error = language_error(room.problem_id, request.language)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    # Every accepted submission costs a full run, charged to the player
+    await check_rate_rest("submit", username=request.username)
+
+    priority = PRIORITY_PRACTICE if request.practice else PRIORITY_FINAL
+    try:
+        result = await validate_submission(
+            room.problem_id,
+            request.code,
+            policy=room.judge_policy,
+            priority=priority,
+            language=request.language,
+        )
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail={"message": str(e), "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
     # MOCK RESULT FOR TESTING:
     # result = {
@@ -375,32 +1229,105 @@ async def submit_code(room_id: str, request: SubmissionRequest):
     submission_data = {
         "submission_id": submission_id,
         "username": request.username,
+        "language": request.language,
         "code": request.code,
         "submitted_at": datetime.now(),
         **result,
     }
 
-    if "submissions" not in room:
-        room["submissions"] = {}
+    # Practice runs only report back to the player
+    if request.practice:
+        return trusted(submission_data)
 
-    room["submissions"][request.username] = submission_data
+    match_over = False
 
-    if len(room["submissions"]) == len(room["players"]):
-        room["status"] = "finished"
-        await sio.emit(
-            "match_finished",
-            {"room_id": room_id, "results": room["submissions"]},
-            room=room_id,
+    def record_submission(room):
+        nonlocal match_over
+        match_over = False  # set afresh on every attempt, update may retry
+        # The match may have ended while this submission was being judged
+        if room.status != "active":
+            raise HTTPException(status_code=400, detail="Room is not active")
+
+        # The room keeps the scoreboard entry, the full result goes back to the caller
+        room.record(
+            Submission.from_result(
+                request.username, result, submission_id, request.language
+            )
         )
 
-    return submission_data
+        if room.all_submitted:
+            finish_match(room, "both_submitted")
+            match_over = True
+        room.bump()
+
+    room = await room_store.update(room_id, record_submission)
+    if room is None:
+        raise HTTPException(status_code=404, detail="Room not fount")
+
+    room_changed(room)
+
+    # Code and test details are only sent when someone asks for them
+    details = {
+        **submission_data,
+        "submitted_at": submission_data["submitted_at"].isoformat(),
+    }
+    await room_store.save_details(room_id, request.username, details)
+    if history is not None:
+        history.record_submission(room_id, room.problem_id, details)
+    await sio.emit(
+        "submission_update", room.submission_delta(request.username), room=room_id
+    )
+
+    if match_over:
+        await sio.emit("match_finished", room.ended_payload(), room=room_id)
+        await record_match(room)
+
+    return trusted(submission_data)
+
+
+@app.get(
+    "/rooms/{room_id}/submissions/{username}", response_model=SubmissionDetailsResponse
+)
+async def get_submission_details(room_id: str, username: str):
+    room = await room_store.get(room_id)
+    if room is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    # No peeking at the opponent's code while the match is still running. A
+    # username in the request is only a claim, so this holds for everyone;
+    # players already have their own code in the editor.
+    if room.status == "active":
+        raise HTTPException(
+            status_code=403, detail="Submissions are hidden until the match ends"
+        )
+
+    details = await room_store.get_details(room_id, username)
+    if details is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    return trusted(details)
 
 
 # =====================================================
 # SOCKETS
 # =====================================================
 # create socket IO server
-sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+# With the Redis store, broadcasts go through Redis so `room=room_id`
+# reaches sockets connected to any worker
+if isinstance(room_store, RedisRoomStore):
+    client_manager = socketio.AsyncRedisManager(
+        os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    )
+else:
+    client_manager = None
+
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=client_manager,
+    # Counts and sizes every emit while encoding it, see metrics.MeteredJson
+    json=MeteredJson(socket_emit_bytes, backend=SOCKET_JSON),
+)
 socket_app = socketio.ASGIApp(sio, app)
 
 
@@ -416,11 +1343,15 @@ async def identify(sid, data):
     if not username:
         return await sio.emit("error", {"detail": "Username is required"}, to=sid)
 
+    # Only the socket pays, the username is a claim nobody has checked yet
+    if not await check_rate_socket("identify", sid):
+        return
+
     # save username into socket's session (memory)
     await sio.save_session(sid, {"username": username})
 
     # track them globally for logging
-    online_users[sid] = username
+    await room_store.add_online(sid, username)
 
     print(f"[LOG] Socket {sid} identified as {username}")
 
@@ -438,35 +1369,99 @@ async def join_room(sid, data):
         await sio.emit("error", {"detail": "You must identify first!"}, to=sid)
         return
 
-    if room_id not in rooms_db:
+    if not await check_rate_socket("join", sid):
+        return
+
+    if await room_store.get(room_id) is None:
+        await sio.emit("error", {"detail": "Room not found"}, to=sid)
+        return
+    if not await check_rate_socket("join", sid, username):
+        return
+
+    refused = None
+    changed = False
+
+    def add_player(room):
+        nonlocal refused, changed
+        refused, changed = None, False  # set afresh on every attempt, update may retry
+        if username not in room.players:
+            if len(room.players) >= 2:
+                refused = "Room is full"
+                return
+            # An old match can be watched (watch_room), not joined
+            if room.is_over:
+                refused = "Match is over"
+                return
+            room.add_player(username)
+            changed = True
+
+        # Only a waiting room starts the match, rejoining must not restart it
+        if len(room.players) == 2 and room.status == "waiting":
+            room.start()
+            changed = True
+
+        if changed:
+            room.bump()
+
+    room = await room_store.update(room_id, add_player)
+
+    if room is None:
         await sio.emit("error", {"detail": "Room not found"}, to=sid)
         return
 
-    room = rooms_db[room_id]
-    player_names = [p["username"] for p in room["players"]]
+    room_changed(room)
 
-    if username not in player_names:
-        if len(room["players"]) >= 2:
-            await sio.emit("error", {"detail": "Room is full"}, to=sid)
-            return
-        room["players"].append({"username": username, "joined_at": datetime.now()})
+    if refused:
+        await sio.emit("error", {"detail": refused}, to=sid)
+        return
 
     # IMPORTANT: Update the session to include room_id so disconnect works!
     await sio.save_session(sid, {"username": username, "room_id": room_id})
 
     await sio.enter_room(sid, room_id)
 
-    if len(room["players"]) == 2:
-        room["status"] = "active"
+    print(f"[LOG] {username} joined room {room_id}. Status: {room.status}")
+    # The newcomer gets the full state, everyone else only the change
+    await send_snapshot(sid, room)
+    if changed:
+        await sio.emit("room_update", room.update_payload(), room=room_id)
 
-    update_payload = {
-        "room_id": room_id,
-        "status": room["status"],
-        "players": [p["username"] for p in room["players"]],
-    }
 
-    print(f"[LOG] {username} joined room {room_id}. Status: {room['status']}")
-    await sio.emit("room_update", update_payload, room=room_id)
+@sio.event
+async def watch_room(sid, data):
+    # Spectators need no identity and never become players
+    if not await check_rate_socket("join", sid):
+        return
+
+    room_id = data.get("room_id")
+    room = await room_store.get(room_id)
+    if room is None:
+        return await sio.emit("error", {"detail": "Room not found"}, to=sid)
+
+    previous = spectator_feed.unwatch(sid)
+    if previous is not None:
+        await sio.leave_room(sid, spectator_channel(previous))
+    await sio.enter_room(sid, spectator_channel(room_id))
+    spectator_feed.watch(sid, room_id)
+
+    # Snapshot first, spectator_update carries the same body from then on
+    await send_snapshot(sid, room)
+
+
+@sio.event
+async def unwatch_room(sid, data=None):
+    room_id = spectator_feed.unwatch(sid)
+    if room_id is not None:
+        await sio.leave_room(sid, spectator_channel(room_id))
+
+
+@sio.event
+async def resync(sid, data):
+    # A client that missed a seq asks for the whole room again
+    room = await room_store.get(data.get("room_id"))
+    if room is None:
+        return await sio.emit("error", {"detail": "Room not found"}, to=sid)
+    await send_snapshot(sid, room)
 
 
 @sio.event
@@ -477,107 +1472,224 @@ async def disconnect(sid):
 
     print(f"[LOG] {username} disconnected from room {room_id}")
 
-    if room_id and room_id in rooms_db:
-        room = rooms_db[room_id]
-        old_status = room["status"]  # Remember what it was
+    await room_store.remove_online(sid)
+    matchmaker.cancel(username, sid=sid)
+    spectator_feed.unwatch(sid)
+    limiter.forget(sid)
+    match_abandoned = False
+    left = False
+
+    def remove_player(room):
+        nonlocal match_abandoned, left
+        match_abandoned = left = False  # set afresh on every attempt, update may retry
+        # The roster of a finished or abandoned match is part of its result
+        if room.is_over:
+            return
+        left = True
+        old_status = room.status  # Remember what it was
+        match_abandoned = old_status == "active"
 
         # Remove the player
-        room["players"] = [p for p in room["players"] if p["username"] != username]
+        room.remove_player(username)
 
-        if len(room["players"]) == 0:
-            room["status"] = "abandoned"
+        if len(room.players) == 0:
+            room.status = "abandoned"
         else:
             # Logic Change:
             if old_status == "active":
                 # If they were mid-game, don't let a new person join an old match
-                room["status"] = "abandoned"
+                room.status = "abandoned"
             else:
                 # If they were just waiting in the lobby, stay in waiting mode
-                room["status"] = "waiting"
+                room.status = "waiting"
+        room.bump()
+
+    room = await room_store.update(room_id, remove_player) if room_id else None
+
+    if room is not None and left:
+        room_changed(room)
+        # Kept in the history (with the leaver), but not rated
+        if match_abandoned and history is not None:
+            history.record_match(room, room.usernames + [username])
 
         # Notify the survivor
         await sio.emit(
             "room_update",
             {
-                "room_id": room_id,
-                "status": room["status"],
-                "players": [p["username"] for p in room["players"]],
-                "message": f"Opponent {username} disconnected. Room is now {room['status']}.",
+                **room.update_payload(),
+                "message": f"Opponent {username} disconnected. Room is now {room.status}.",
             },
             room=room_id,
         )
 
 
+@sio.event
+async def find_match(sid, data):
+    session = await sio.get_session(sid)
+    username = session.get("username")
+    difficulty = data.get("difficulty")
+
+    if not username:
+        return await sio.emit("error", {"detail": "You must identify first!"}, to=sid)
+
+    if not await check_rate_socket("matchmaking", sid):
+        return
+
+    if not difficulty or not catalog.summaries(difficulty, 1):
+        return await sio.emit(
+            "error", {"detail": "No problems found for this difficuly"}, to=sid
+        )
+
+    if not await check_rate_socket("matchmaking", sid, username):
+        return
+
+    ticket, opponent = matchmaker.enqueue(
+        username, difficulty, await ratings.rating_of(username), sid=sid
+    )
+
+    if opponent is None:
+        await sio.emit(
+            "match_queued", {"difficulty": ticket.difficulty, **matchmaker.stats()}, to=sid
+        )
+        return
+
+    await open_match(opponent, ticket)
+
+
+@sio.event
+async def cancel_match(sid, data=None):
+    session = await sio.get_session(sid)
+    cancelled = matchmaker.cancel(session.get("username"), sid=sid)
+    await sio.emit("match_cancelled", {"ok": cancelled}, to=sid)
+
+
 @sio.event
 async def submit_code(sid, data):
     session = await sio.get_session(sid)
     username = session.get("username")
     room_id = data.get("room_id")
     user_code = data.get("code")
+    language = data.get("language") or DEFAULT_LANGUAGE
 
     if not username or not room_id:
         return await sio.emit(
             "error", {"detail": "Missing session or room data"}, to=sid
         )
 
-    if room_id not in rooms_db:
-        return await sio.emit("error", {"detail": "Room not found"}, to=sid)
+    if not await check_rate_socket("submit", sid):
+        return
 
-    room = rooms_db[room_id]
+    room = await room_store.get(room_id)
+    if room is None:
+        return await sio.emit("error", {"detail": "Room not found"}, to=sid)
 
     # 1. Logic Check
-    if room["status"] != "active":
+    if room.status != "active":
         return await sio.emit("error", {"detail": "Match is not active"}, to=sid)
 
+    # Spectators (or anyone else) can't submit into someone else's match
+    if username not in room.players:
+        return await sio.emit(
+            "error", {"detail": "You are not a player in this room"}, to=sid
+        )
+
+    error = language_error(room.problem_id, language)
+    if error:
+        return await sio.emit("error", {"detail": error}, to=sid)
+
+    # Every accepted submission costs a full run, charged to the player
+    if not await check_rate_socket("submit", sid, username):
+        return
+
     # 2. Validate Code
     # Note: Using the function we built in Task 2/3
-    result = await validate_submission(room["problem"]["id"], user_code)
+    practice = bool(data.get("practice"))
+
+    async def notify_queued(info):
+        await sio.emit("judge_queued", {"room_id": room_id, **info}, to=sid)
+
+    # Per-test results are batched so a big suite doesn't flood the socket
+    async def send_progress(batch):
+        payload = {"room_id": room_id, "username": username, "tests": batch}
+        if practice:
+            await sio.emit("test_progress", payload, to=sid)
+        else:
+            await sio.emit("test_progress", payload, room=room_id)
+
+    progress = EventCoalescer(send_progress, PROGRESS_INTERVAL_SEC)
+
+    try:
+        result = await validate_submission(
+            room.problem_id,
+            user_code,
+            policy=room.judge_policy,
+            priority=PRIORITY_PRACTICE if practice else PRIORITY_FINAL,
+            on_queued=notify_queued,
+            on_progress=progress.add,
+            language=language,
+        )
+    except QueueFull as e:
+        return await sio.emit(
+            "error", {"detail": str(e), "retry_after": e.retry_after}, to=sid
+        )
+    finally:
+        # Everything streamed so far lands before the final result
+        await progress.flush()
+
+    # Practice runs go back to the sender only and don't count as a submission
+    if practice:
+        return await sio.emit(
+            "practice_result", {"room_id": room_id, **result}, to=sid
+        )
 
     # 3. Store Result
-    if "submissions" not in room:
-        room["submissions"] = {}
+    submission_entry = Submission.from_result(
+        username, result, str(uuid.uuid4()), language
+    )
+    recorded = False
+    match_over = False
+
+    def record_submission(room):
+        nonlocal recorded, match_over
+        recorded = match_over = False  # set afresh on every attempt, update may retry
+        # The match may have ended while this submission was being judged
+        if room.status != "active":
+            return
+
+        room.record(submission_entry)
+        recorded = True
+
+        if room.all_submitted:
+            finish_match(room, "both_submitted")
+            match_over = True
+        room.bump()
 
-    submission_entry = {
+    room = await room_store.update(room_id, record_submission)
+    if room is None:
+        return await sio.emit("error", {"detail": "Room not found"}, to=sid)
+
+    room_changed(room)
+
+    if not recorded:
+        return await sio.emit("error", {"detail": "Match is not active"}, to=sid)
+
+    # Code and test details are only sent when someone asks for them
+    details = {
+        "submission_id": submission_entry.submission_id,
         "username": username,
-        "status": result["status"],
-        "total_passed": result["total_passed"],
-        "total_tests": result["total_tests"],
-        "submitted_at": datetime.now().isoformat(),
+        "language": language,
+        "code": user_code,
+        "submitted_at": submission_entry.submitted_at.isoformat(),
+        **result,
     }
-    room["submissions"][username] = submission_entry
+    await room_store.save_details(room_id, username, details)
+    if history is not None:
+        history.record_submission(room_id, room.problem_id, details)
 
-    # 4. Event B: submission_update (Broadcast to room)
-    both_submitted = len(room["submissions"]) == len(room["players"])
+    # 4. Event B: submission_update, only this player's entry (Broadcast to room)
+    await sio.emit("submission_update", room.submission_delta(username), room=room_id)
 
-    update_payload = {
-        "room_id": room_id,
-        "submissions": room["submissions"],
-        "both_submitted": both_submitted,
-    }
-    await sio.emit("submission_update", update_payload, room=room_id)
-
-    # 5. Event C: match_ended (If both submitted)
-    if both_submitted:
-        room["status"] = "finished"
-
-        # Determine winner logic
-        players = list(room["submissions"].keys())
-        p1, p2 = players[0], players[1]
-        score1 = room["submissions"][p1]["total_passed"]
-        score2 = room["submissions"][p2]["total_passed"]
-
-        winner = None
-        if score1 > score2:
-            winner = p1
-        elif score2 > score1:
-            winner = p2
-        else:
-            winner = None  # Tie
-
-        end_payload = {
-            "room_id": room_id,
-            "winner": winner,
-            "reason": "both_submitted",
-            "final_scores": room["submissions"],
-        }
-        await sio.emit("match_ended", end_payload, room=room_id)
+    # 5. Event C: match_ended (If both submitted), winner was decided in the update
+    if match_over:
+        await sio.emit("match_ended", room.ended_payload(), room=room_id)
+        await record_match(room)
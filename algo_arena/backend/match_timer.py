@@ -0,0 +1,131 @@
+"""
+AlgoArena Match Timer
+Ends matches at their ends_at and sends periodic countdown ticks.
+
+All rooms share two TimerHeaps (deadlines and next tick) drained by one
+asyncio task, so the cost per pass is O(due log n) no matter how many
+matches are running, instead of one sleeping task per room.
+
+With several workers, each one schedules every active room it sees, but
+only the holder of the room's ClockLease sends its ticks and ends it.
+The others keep checking back, so when the holder dies its lease runs out
+and one of them takes over.
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+from timers import TimerHeap
+
+
+class RedisClockLease:
+    """
+    Per-room clock ownership: a Redis key set with NX that expires after
+    `ttl_sec` unless the holder renews it (on every tick it sends).
+    """
+
+    def __init__(self, client, prefix: str = "algoarena", ttl_sec: float = 30.0):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_ms = int(ttl_sec * 1000)
+        self.ttl_sec = ttl_sec
+        self.owner = uuid.uuid4().hex  # this worker
+
+    def _key(self, room_id: str) -> str:
+        return f"{self.prefix}:clock:{room_id}"
+
+    async def held(self, room_id: str) -> bool:
+        """Takes or renews the lease; False while another worker holds it."""
+        key = self._key(room_id)
+        if await self.client.set(key, self.owner, nx=True, px=self.ttl_ms):
+            return True
+        holder = await self.client.get(key)
+        if holder is not None and holder.decode() == self.owner:
+            await self.client.pexpire(key, self.ttl_ms)
+            return True
+        return False
+
+
+class MatchTimer:
+    def __init__(self, on_timeout, on_tick=None, tick_sec: float = 10.0, lease=None):
+        """
+        on_timeout(room_id): awaited when a match hits its deadline
+        on_tick(room_id, remaining_sec): awaited every `tick_sec` while it runs
+        lease: a RedisClockLease when several workers run matches, else None
+        """
+        self.on_timeout = on_timeout
+        self.on_tick = on_tick
+        self.tick_sec = tick_sec
+        self.lease = lease
+
+        self.deadlines = TimerHeap()
+        self.ticks = TimerHeap()
+        self.timeouts = 0
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def start(self, room_id: str, ends_at: datetime):
+        """Schedules the match to end at `ends_at`; on the next poll if that has passed."""
+        now = time.monotonic()
+        deadline = now + max(0.0, (ends_at - datetime.now()).total_seconds())
+        self.deadlines.schedule(room_id, deadline)
+        if self.on_tick and self.tick_sec > 0 and deadline > now + self.tick_sec:
+            self.ticks.schedule(room_id, now + self.tick_sec, deadline)
+
+    def cancel(self, room_id: str):
+        self.deadlines.cancel(room_id)
+        self.ticks.cancel(room_id)
+
+    def remaining(self, room_id: str):
+        deadline = self.deadlines.deadline(room_id)
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    async def _owns(self, room_id: str) -> bool:
+        if self.lease is None:
+            return True
+        try:
+            return await self.lease.held(room_id)
+        except Exception as e:
+            print(f"[LOG] Match clock lease for {room_id} failed: {e}")
+            return False
+
+    async def poll(self):
+        now = time.monotonic()
+
+        for room_id, _ in self.deadlines.pop_expired(now):
+            if not await self._owns(room_id):
+                # Its holder ends it; look again in case the holder is gone
+                self.deadlines.schedule(room_id, now + self.lease.ttl_sec)
+                continue
+            self.ticks.cancel(room_id)
+            self.timeouts += 1
+            try:
+                await self.on_timeout(room_id)
+            except Exception as e:
+                print(f"[LOG] Ending match {room_id} on timeout failed: {e}")
+
+        for room_id, deadline in self.ticks.pop_expired(now):
+            remaining = deadline - now
+            if remaining <= 0:
+                continue
+            # Queue the next tick before sending, so a slow emit can't drop it
+            self.ticks.schedule(room_id, now + self.tick_sec, deadline)
+            if not await self._owns(room_id):
+                continue
+            try:
+                await self.on_tick(room_id, remaining)
+            except Exception as e:
+                print(f"[LOG] time_remaining for {room_id} failed: {e}")
+
+    async def run(self, resolution_sec: float = 0.25):
+        while True:
+            await asyncio.sleep(resolution_sec)
+            await self.poll()
+
+    def stats(self) -> dict:
+        return {"running": len(self.deadlines), "timeouts": self.timeouts}
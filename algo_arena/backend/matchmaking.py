@@ -0,0 +1,173 @@
+"""
+AlgoArena Matchmaking
+Pairs waiting players by difficulty and (optionally) rating.
+
+Players are bucketed per difficulty into rating bands of `band_width`
+points (everyone without a rating shares one unrated band). A newcomer is paired at
+once with whoever waits in the same band, so a band never holds more than
+one ticket and pairing is O(1). A player's search widens by one band every
+`widen_every_sec` seconds of waiting, up to `max_bands` away. A periodic
+sweep pairs neighbouring bands whose searches now overlap; its cost
+depends on the number of occupied bands, not on the number of waiting players.
+"""
+
+import statistics
+import time
+from collections import OrderedDict, deque
+
+
+class Ticket:
+    __slots__ = ("username", "sid", "difficulty", "rating", "band", "enqueued_at")
+
+    def __init__(self, username, sid, difficulty, rating, band):
+        self.username = username
+        self.sid = sid
+        self.difficulty = difficulty
+        self.rating = rating
+        self.band = band
+        self.enqueued_at = time.monotonic()
+
+    def wait_sec(self, now: float) -> float:
+        return now - self.enqueued_at
+
+
+class Matchmaker:
+    def __init__(
+        self,
+        band_width: int = 100,
+        widen_every_sec: float = 10.0,
+        max_bands: int = 5,
+        wait_samples: int = 500,
+    ):
+        self.band_width = band_width
+        self.widen_every_sec = widen_every_sec
+        self.max_bands = max_bands
+
+        self._bands = {}  # difficulty -> {band: Ticket}
+        self._tickets = {}  # username -> Ticket
+        self._recent_waits = deque(maxlen=wait_samples)
+        # REST players poll for their room, so remember it for a while
+        self.matched = OrderedDict()
+        self.matched_limit = 10000
+        self.pairs_made = 0
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, username):
+        return username in self._tickets
+
+    def _band_of(self, rating) -> int:
+        if rating is None:
+            return None
+        return int(rating) // self.band_width
+
+    def _radius(self, ticket: Ticket, now: float) -> int:
+        # Unrated players only ever meet other unrated players
+        if ticket.rating is None or self.widen_every_sec <= 0:
+            return 0
+        return min(self.max_bands, int(ticket.wait_sec(now) // self.widen_every_sec))
+
+    # -------------------------------------------------
+    # Queue
+    # -------------------------------------------------
+    def enqueue(self, username: str, difficulty: str, rating=None, sid=None):
+        """Returns (ticket, opponent); opponent is None if nobody fits yet."""
+        self.cancel(username)
+        self.matched.pop(username, None)
+
+        difficulty = difficulty.lower()
+        ticket = Ticket(username, sid, difficulty, rating, self._band_of(rating))
+        bands = self._bands.setdefault(difficulty, {})
+        now = time.monotonic()
+
+        # Same band first, then the nearest neighbour whose search reaches us
+        opponent = bands.get(ticket.band)
+        if opponent is None and rating is not None:
+            for distance in range(1, self.max_bands + 1):
+                for band in (ticket.band - distance, ticket.band + distance):
+                    other = bands.get(band)
+                    if other is not None and self._radius(other, now) >= distance:
+                        opponent = other
+                        break
+                if opponent is not None:
+                    break
+
+        if opponent is not None:
+            self._remove(opponent)
+            self._record_pair(opponent, ticket, now)
+            return ticket, opponent
+
+        bands[ticket.band] = ticket
+        self._tickets[username] = ticket
+        return ticket, None
+
+    def cancel(self, username: str, sid=None) -> bool:
+        ticket = self._tickets.get(username)
+        # With a sid, only cancel the ticket that socket created
+        if ticket is None or (sid is not None and ticket.sid != sid):
+            return False
+        self._remove(ticket)
+        return True
+
+    def _remove(self, ticket: Ticket):
+        self._tickets.pop(ticket.username, None)
+        bands = self._bands.get(ticket.difficulty, {})
+        if bands.get(ticket.band) is ticket:
+            del bands[ticket.band]
+
+    def _record_pair(self, first: Ticket, second: Ticket, now: float):
+        self.pairs_made += 1
+        self._recent_waits.append(first.wait_sec(now))
+        self._recent_waits.append(second.wait_sec(now))
+
+    def remember_match(self, username: str, room_id: str):
+        self.matched[username] = room_id
+        self.matched.move_to_end(username)
+        while len(self.matched) > self.matched_limit:
+            self.matched.popitem(last=False)
+
+    # -------------------------------------------------
+    # Widening sweep
+    # -------------------------------------------------
+    def sweep(self) -> list:
+        """Pairs neighbouring bands whose searches overlap now. Returns [(a, b)]."""
+        now = time.monotonic()
+        pairs = []
+
+        for bands in self._bands.values():
+            if len(bands) < 2:
+                continue
+
+            occupied = sorted(band for band in bands if band is not None)
+            i = 0
+            while i < len(occupied) - 1:
+                first = bands[occupied[i]]
+                second = bands[occupied[i + 1]]
+                distance = occupied[i + 1] - occupied[i]
+                reach = max(self._radius(first, now), self._radius(second, now))
+
+                if distance <= reach:
+                    self._remove(first)
+                    self._remove(second)
+                    self._record_pair(first, second, now)
+                    pairs.append((first, second))
+                    i += 2
+                else:
+                    i += 1
+
+        return pairs
+
+    # -------------------------------------------------
+    # Stats
+    # -------------------------------------------------
+    def stats(self) -> dict:
+        waits = list(self._recent_waits)
+        return {
+            "waiting": len(self._tickets),
+            "queue_lengths": {
+                difficulty: len(bands) for difficulty, bands in self._bands.items()
+            },
+            "median_wait_sec": round(statistics.median(waits), 2) if waits else 0.0,
+            "pairs_made": self.pairs_made,
+        }
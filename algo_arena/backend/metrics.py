@@ -0,0 +1,155 @@
+"""
+AlgoArena Metrics
+Counters, gauges and histograms rendered in the Prometheus text format.
+
+Recording is a dict lookup plus an add (a bisect for histograms), so it can
+sit on the socket hot paths. Values that already live elsewhere (rooms,
+online users, queue depth) are copied into gauges only when /metrics is
+scraped. Metrics are per worker; Prometheus sums them across workers.
+"""
+
+import bisect
+import json
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def replace(self, values: dict):
+        """Swaps in a whole {labels: value} mapping kept by someone else."""
+        self._values = {
+            labels if isinstance(labels, tuple) else (labels,): value
+            for labels, value in values.items()
+        }
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name + _labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple = (), buckets=LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        # Counts are stored per bucket and only made cumulative on render
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        for labels, series in self._series.items():
+            running = 0
+            for bound, hits in zip(self.buckets + (float("inf"),), series[:-1]):
+                running += hits
+                le = 'le="' + _number(bound) + '"'
+                yield self.name + "_bucket" + _labels(self.labelnames, labels, le), running
+            yield self.name + "_sum" + _labels(self.labelnames, labels), series[-1]
+            yield self.name + "_count" + _labels(self.labelnames, labels), running
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "algoarena"):
+        self.prefix = prefix
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._add(Counter(f"{self.prefix}_{name}", help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple = ()) -> Gauge:
+        return self._add(Gauge(f"{self.prefix}_{name}", help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: tuple = (), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(f"{self.prefix}_{name}", help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MeteredJson:
+    """
+    JSON module for socketio.AsyncServer(json=...) that records every
+    outgoing event's name and encoded size.
+
+    Socket.IO encodes an event as the list [event, *args], once per emit
+    (a room broadcast is encoded once, not once per member), so measuring
+    here costs a len() on a string that is built anyway.
+    """
+
+    def __init__(self, sizes: Histogram, backend=json):
+        self.sizes = sizes
+        self.backend = backend
+
+    def dumps(self, obj, *args, **kwargs):
+        encoded = self.backend.dumps(obj, *args, **kwargs)
+        if type(obj) is list and obj and type(obj[0]) is str:
+            self.sizes.observe(len(encoded), obj[0])
+        return encoded
+
+    def loads(self, *args, **kwargs):
+        return self.backend.loads(*args, **kwargs)
@@ -0,0 +1,118 @@
+"""
+AlgoArena Rank Index
+Order statistics over player ratings: rank of a player, player at a rank.
+
+Ratings are bucketed by whole points into a Fenwick tree of counts, highest
+bucket first, so "how many players are above me" is a prefix sum and "who is
+at rank k" is one descent, both O(log B) for B buckets. Each bucket keeps its
+players sorted by exact rating (then username), so ties are ordered the same
+way every time. Nothing ever sorts the whole player list.
+"""
+
+import bisect
+
+
+class RankIndex:
+    def __init__(self, lowest: int = 0, highest: int = 4000):
+        self.lowest = lowest
+        self.highest = highest
+        self._size = highest - lowest + 1
+        self._tree = [0] * (self._size + 1)  # 1-based Fenwick tree of counts
+        self._buckets = {}  # position -> sorted [(-rating, username)]
+        self._top_bit = 1 << (self._size.bit_length() - 1)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _position(self, rating: float) -> int:
+        # 1 = highest bucket; out-of-range ratings share the end buckets
+        bucket = min(self.highest, max(self.lowest, int(rating // 1)))
+        return self.highest - bucket + 1
+
+    def _add_count(self, position: int, delta: int):
+        while position <= self._size:
+            self._tree[position] += delta
+            position += position & -position
+
+    def _count_before(self, position: int) -> int:
+        """Players in buckets above `position`."""
+        total = 0
+        position -= 1
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def _find(self, rank: int):
+        """(position, players in buckets above it) of the bucket holding `rank`."""
+        position = 0
+        above = 0
+        step = self._top_bit
+        while step:
+            nxt = position + step
+            if nxt <= self._size and above + self._tree[nxt] < rank:
+                position = nxt
+                above += self._tree[nxt]
+            step >>= 1
+        return position + 1, above
+
+    # -------------------------------------------------
+    # Updates
+    # -------------------------------------------------
+    def add(self, username: str, rating: float):
+        position = self._position(rating)
+        bisect.insort(self._buckets.setdefault(position, []), (-rating, username))
+        self._add_count(position, 1)
+        self._count += 1
+
+    def remove(self, username: str, rating: float) -> bool:
+        position = self._position(rating)
+        bucket = self._buckets.get(position)
+        entry = (-rating, username)
+        if not bucket:
+            return False
+        i = bisect.bisect_left(bucket, entry)
+        if i == len(bucket) or bucket[i] != entry:
+            return False
+        del bucket[i]
+        if not bucket:
+            del self._buckets[position]
+        self._add_count(position, -1)
+        self._count -= 1
+        return True
+
+    def move(self, username: str, old_rating: float, new_rating: float):
+        self.remove(username, old_rating)
+        self.add(username, new_rating)
+
+    # -------------------------------------------------
+    # Queries (ranks are 1-based)
+    # -------------------------------------------------
+    def rank(self, username: str, rating: float) -> int:
+        position = self._position(rating)
+        bucket = self._buckets.get(position, [])
+        return self._count_before(position) + bisect.bisect_left(bucket, (-rating, username)) + 1
+
+    def at(self, rank: int):
+        """(username, rating) at `rank`, None past the end."""
+        if rank < 1 or rank > self._count:
+            return None
+        position, above = self._find(rank)
+        neg_rating, username = self._buckets[position][rank - above - 1]
+        return username, -neg_rating
+
+    def range(self, first_rank: int, count: int) -> list:
+        """[(rank, username, rating)] for ranks first_rank .. first_rank + count - 1."""
+        first_rank = max(1, first_rank)
+        last_rank = min(self._count, first_rank + count - 1)
+        entries = []
+        rank = first_rank
+        while rank <= last_rank:
+            # One descent per bucket, then read the bucket in order
+            position, above = self._find(rank)
+            bucket = self._buckets[position]
+            for neg_rating, username in bucket[rank - above - 1 : last_rank - above]:
+                entries.append((rank, username, -neg_rating))
+                rank += 1
+        return entries
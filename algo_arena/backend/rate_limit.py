@@ -0,0 +1,229 @@
+"""
+AlgoArena Rate Limiting
+Token buckets per event type, keyed by username and by socket id (or client address).
+
+Every event type has its own Budget: `capacity` tokens that refill evenly
+over `period_sec`. A call spends one token from each bucket it is checked
+against (the socket's and, when known, the user's), or none if any of them
+is empty, and then learns how long to wait (retry_after).
+
+- MemoryRateLimiter: per-event dicts of buckets updated in place, so a check
+  is two dict lookups and some float math with nothing allocated once the
+  buckets exist. A bucket left idle refills completely, and a periodic
+  sweep drops those.
+- RedisRateLimiter: the same buckets as Redis hashes, shared by every
+  worker, updated with the WATCH/MULTI retry loop the room store uses. The
+  keys expire once they would be full again.
+"""
+
+import asyncio
+import math
+import os
+import time
+
+from room_store import RedisRoomStore
+
+DEFAULT_BUDGETS = {
+    "submit": "5/30",  # judging is the expensive part
+    "join": "20/60",  # join_room, watch_room and REST joins
+    "identify": "10/60",
+    "matchmaking": "20/60",
+    "create_room": "10/60",
+}
+
+
+class Budget:
+    __slots__ = ("capacity", "per_sec")
+
+    def __init__(self, capacity: float, period_sec: float):
+        self.capacity = capacity
+        self.per_sec = capacity / period_sec
+
+    @classmethod
+    def parse(cls, spec: str):
+        """"5/30" is 5 tokens per 30 seconds; empty or "0" means unlimited."""
+        if not spec or spec.strip() in ("0", "off"):
+            return None
+        capacity, _, period = spec.partition("/")
+        return cls(float(capacity), float(period or 1))
+
+    def retry_after(self, tokens: float) -> int:
+        # Whole seconds, like the Retry-After header
+        return max(1, math.ceil((1 - tokens) / self.per_sec))
+
+
+class Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    def __init__(self, budgets: dict):
+        self.budgets = {event: b for event, b in budgets.items() if b is not None}
+        self.limited = {event: 0 for event in self.budgets}
+
+    async def check(self, event: str, username: str = None, sid: str = None) -> int:
+        """0 if allowed (and charged), else seconds until it would be."""
+        raise NotImplementedError
+
+    def forget(self, sid: str):
+        """Drops a disconnected socket's buckets."""
+
+    async def run(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"limited": dict(self.limited)}
+
+
+# =====================================================
+# IN-MEMORY
+# =====================================================
+class MemoryRateLimiter(RateLimiter):
+    def __init__(self, budgets: dict):
+        super().__init__(budgets)
+        self._by_user = {event: {} for event in self.budgets}
+        self._by_sid = {event: {} for event in self.budgets}
+
+    @staticmethod
+    def _refill(buckets: dict, key: str, budget: Budget, now: float) -> Bucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = Bucket(budget.capacity, now)
+            return bucket
+        bucket.tokens = min(
+            budget.capacity, bucket.tokens + (now - bucket.updated) * budget.per_sec
+        )
+        bucket.updated = now
+        return bucket
+
+    async def check(self, event: str, username: str = None, sid: str = None) -> int:
+        budget = self.budgets.get(event)
+        if budget is None:
+            return 0
+        now = time.monotonic()
+        user = self._refill(self._by_user[event], username, budget, now) if username else None
+        sock = self._refill(self._by_sid[event], sid, budget, now) if sid else None
+
+        lowest = min(
+            user.tokens if user else budget.capacity,
+            sock.tokens if sock else budget.capacity,
+        )
+        if lowest < 1:
+            self.limited[event] += 1
+            return budget.retry_after(lowest)
+
+        if user:
+            user.tokens -= 1
+        if sock:
+            sock.tokens -= 1
+        return 0
+
+    def forget(self, sid: str):
+        for buckets in self._by_sid.values():
+            buckets.pop(sid, None)
+
+    def sweep(self) -> int:
+        # A bucket that has refilled completely is the same as no bucket
+        now = time.monotonic()
+        dropped = 0
+        for event, budget in self.budgets.items():
+            for buckets in (self._by_user[event], self._by_sid[event]):
+                full = [
+                    key
+                    for key, bucket in buckets.items()
+                    if bucket.tokens + (now - bucket.updated) * budget.per_sec
+                    >= budget.capacity
+                ]
+                for key in full:
+                    del buckets[key]
+                dropped += len(full)
+        return dropped
+
+    async def run(self, interval_sec: float = 60.0):
+        while True:
+            await asyncio.sleep(interval_sec)
+            self.sweep()
+
+    def stats(self) -> dict:
+        return {
+            "buckets": sum(
+                len(self._by_user[event]) + len(self._by_sid[event])
+                for event in self.budgets
+            ),
+            **super().stats(),
+        }
+
+
+# =====================================================
+# REDIS
+# =====================================================
+class RedisRateLimiter(RateLimiter):
+    def __init__(self, client, budgets: dict, prefix: str = "algoarena"):
+        super().__init__(budgets)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, event: str, kind: str, name: str) -> str:
+        return f"{self.prefix}:ratelimit:{event}:{kind}:{name}"
+
+    async def check(self, event: str, username: str = None, sid: str = None) -> int:
+        from redis.exceptions import WatchError
+
+        budget = self.budgets.get(event)
+        if budget is None:
+            return 0
+        keys = []
+        if username:
+            keys.append(self._key(event, "user", username))
+        if sid:
+            keys.append(self._key(event, "sid", sid))
+        if not keys:
+            return 0
+        # Expires when it would have refilled anyway
+        ttl_ms = math.ceil(budget.capacity / budget.per_sec * 1000)
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Optimistic lock: retry if another worker spent in between
+                    await pipe.watch(*keys)
+                    now = time.time()
+                    levels = []
+                    for key in keys:
+                        tokens, updated = await pipe.hmget(key, "tokens", "updated")
+                        if tokens is None:
+                            levels.append(budget.capacity)
+                        else:
+                            refill = (now - float(updated)) * budget.per_sec
+                            levels.append(min(budget.capacity, float(tokens) + refill))
+
+                    lowest = min(levels)
+                    if lowest < 1:
+                        await pipe.unwatch()
+                        self.limited[event] += 1
+                        return budget.retry_after(lowest)
+
+                    pipe.multi()
+                    for key, tokens in zip(keys, levels):
+                        pipe.hset(key, mapping={"tokens": tokens - 1, "updated": now})
+                        pipe.pexpire(key, ttl_ms)
+                    await pipe.execute()
+                    return 0
+                except WatchError:
+                    continue
+
+
+def create_rate_limiter(room_store) -> RateLimiter:
+    # RATE_LIMIT_<EVENT>="<tokens>/<seconds>", empty or 0 turns that one off
+    budgets = {
+        event: Budget.parse(os.getenv(f"RATE_LIMIT_{event.upper()}", default))
+        for event, default in DEFAULT_BUDGETS.items()
+    }
+    # Multi-worker setups share the buckets through the room store's Redis
+    if isinstance(room_store, RedisRoomStore):
+        return RedisRateLimiter(room_store.client, budgets, prefix=room_store.prefix)
+    return MemoryRateLimiter(budgets)
@@ -0,0 +1,452 @@
+"""
+AlgoArena Ratings
+Elo ratings for finished matches, with an O(log n) leaderboard.
+
+Every player starts at `default_rating`. A match moves both players by
+K * (score - expected), where K is larger for the first `provisional_games`
+so new players settle quickly. Each room is rated at most once.
+
+- MemoryRatingBook: one worker. Ratings live in memory, ranked by a
+  RankIndex, and every change is appended to a JSONL log, which is replayed
+  and compacted on startup. Remembers the last `remembered_rooms` rated
+  room ids.
+- RedisRatingBook: every worker shares one book in Redis, a JSON string per
+  player plus a sorted set of ratings for the ranks. A match is rated with
+  the WATCH/MULTI retry loop the room store uses, and a rated room leaves a
+  marker key behind that expires after `rated_ttl_sec`. Starting with an
+  empty book, it imports the JSONL log once.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+
+from rank_index import RankIndex
+from room_store import RedisRoomStore
+
+
+class PlayerRating:
+    __slots__ = ("username", "rating", "games", "wins", "losses", "draws", "updated_at")
+
+    def __init__(
+        self,
+        username: str,
+        rating: float,
+        games: int = 0,
+        wins: int = 0,
+        losses: int = 0,
+        draws: int = 0,
+        updated_at: str = None,
+    ):
+        self.username = username
+        self.rating = rating
+        self.games = games
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+        self.updated_at = updated_at
+
+    def to_dict(self) -> dict:
+        return {
+            "username": self.username,
+            "rating": round(self.rating, 1),
+            "games": self.games,
+            "wins": self.wins,
+            "losses": self.losses,
+            "draws": self.draws,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            data["username"],
+            float(data["rating"]),
+            data.get("games", 0),
+            data.get("wins", 0),
+            data.get("losses", 0),
+            data.get("draws", 0),
+            data.get("updated_at"),
+        )
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+
+# =====================================================
+# PERSISTENCE
+# =====================================================
+
+
+class JsonlRatingLog:
+    """One JSON line per rating change; the last line per player wins."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict:
+        players = {}
+        lines = 0
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    lines += 1
+                    try:
+                        player = PlayerRating.from_dict(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue  # A torn last line from a crash
+                    players[player.username] = player
+        except FileNotFoundError:
+            return players
+
+        # Mostly superseded lines, rewrite the log with one line per player
+        if lines > 2 * len(players) + 100:
+            self.compact(players.values())
+        return players
+
+    def compact(self, players):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            for player in players:
+                f.write(json.dumps(player.to_dict()) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _append(self, lines: list):
+        with open(self.path, "a") as f:
+            f.write("".join(line + "\n" for line in lines))
+
+    async def save(self, players: list):
+        lines = [json.dumps(player.to_dict()) for player in players]
+        # File I/O off the event loop
+        await asyncio.to_thread(self._append, lines)
+
+
+# =====================================================
+# RATING BOOK
+# =====================================================
+
+
+class RatingBook:
+    """The Elo math; subclasses keep the players."""
+
+    def __init__(
+        self,
+        default_rating: float = 1200.0,
+        k_factor: float = 20.0,
+        provisional_k: float = 40.0,
+        provisional_games: int = 20,
+    ):
+        self.default_rating = default_rating
+        self.k_factor = k_factor
+        self.provisional_k = provisional_k
+        self.provisional_games = provisional_games
+        self.matches_rated = 0
+
+    def _k(self, player: PlayerRating) -> float:
+        if player.games < self.provisional_games:
+            return self.provisional_k
+        return self.k_factor
+
+    @staticmethod
+    def _rateable(usernames: list, winner) -> bool:
+        if len(usernames) != 2:
+            return False
+        if winner is not None and winner not in usernames:
+            raise ValueError(f"Winner {winner!r} is not one of {usernames}")
+        return True
+
+    def _rate(self, first: PlayerRating, second: PlayerRating, winner) -> dict:
+        """Updates both players in place, returns {username: rating before}."""
+        now = datetime.now().isoformat()
+        old = {first.username: first.rating, second.username: second.rating}
+
+        for player, opponent in ((first, second), (second, first)):
+            if winner is None:
+                score = 0.5
+                player.draws += 1
+            elif winner == player.username:
+                score = 1.0
+                player.wins += 1
+            else:
+                score = 0.0
+                player.losses += 1
+
+            # Both sides use the ratings from before the match
+            expected = expected_score(old[player.username], old[opponent.username])
+            player.rating = old[player.username] + self._k(player) * (score - expected)
+            player.games += 1
+            player.updated_at = now
+        return old
+
+    @staticmethod
+    def _changes(players: tuple, old: dict, ranks: dict) -> dict:
+        return {
+            player.username: {
+                "rating": round(player.rating, 1),
+                "delta": round(player.rating - old[player.username], 1),
+                "rank": ranks[player.username],
+            }
+            for player in players
+        }
+
+    async def load(self):
+        pass
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def get(self, username: str):
+        raise NotImplementedError
+
+    async def rating_of(self, username: str) -> float:
+        player = await self.get(username)
+        return player.rating if player else self.default_rating
+
+    async def record_match(self, usernames: list, winner=None, room_id: str = None) -> dict:
+        """
+        Rates a finished 1v1 (winner None is a draw). Returns
+        {username: {"rating", "delta", "rank"}}, empty if it isn't a 1v1 or
+        `room_id` was rated already. A winner who didn't play is a ValueError.
+        """
+        raise NotImplementedError
+
+    async def save(self, usernames: list):
+        """Persists the given players after record_match, if the book needs to."""
+
+    async def rank(self, username: str):
+        raise NotImplementedError
+
+    async def top(self, limit: int = 10, offset: int = 0) -> list:
+        raise NotImplementedError
+
+    async def around(self, username: str, radius: int = 5) -> list:
+        rank = await self.rank(username)
+        if rank is None:
+            return []
+        offset = max(0, rank - 1 - radius)
+        return await self.top(rank + radius - offset, offset)
+
+    def stats(self) -> dict:
+        return {"matches_rated": self.matches_rated}
+
+
+# =====================================================
+# IN-MEMORY
+# =====================================================
+
+
+class MemoryRatingBook(RatingBook):
+    def __init__(self, log=None, remembered_rooms: int = 10000, **kwargs):
+        super().__init__(**kwargs)
+        self.log = log
+        self.remembered_rooms = remembered_rooms
+
+        self._players = {}  # username -> PlayerRating
+        self.index = RankIndex()
+        self._rated_rooms = OrderedDict()  # room_id -> None, oldest first
+
+    def __len__(self):
+        return len(self._players)
+
+    async def load(self):
+        if self.log is None:
+            return
+        for player in self.log.load().values():
+            self._players[player.username] = player
+            self.index.add(player.username, player.rating)
+        print(f"[LOG] Loaded {len(self)} player ratings")
+
+    async def count(self) -> int:
+        return len(self._players)
+
+    async def get(self, username: str):
+        return self._players.get(username)
+
+    def _player(self, username: str) -> PlayerRating:
+        player = self._players.get(username)
+        if player is None:
+            player = self._players[username] = PlayerRating(username, self.default_rating)
+            self.index.add(username, player.rating)
+        return player
+
+    def _first_rating(self, room_id: str) -> bool:
+        if room_id is None:
+            return True
+        if room_id in self._rated_rooms:
+            return False
+        self._rated_rooms[room_id] = None
+        if len(self._rated_rooms) > self.remembered_rooms:
+            self._rated_rooms.popitem(last=False)
+        return True
+
+    async def record_match(self, usernames: list, winner=None, room_id: str = None) -> dict:
+        if not self._rateable(usernames, winner) or not self._first_rating(room_id):
+            return {}
+
+        players = tuple(self._player(name) for name in usernames)
+        old = self._rate(*players, winner)
+        for player in players:
+            self.index.move(player.username, old[player.username], player.rating)
+
+        self.matches_rated += 1
+        ranks = {player.username: self._rank(player) for player in players}
+        return self._changes(players, old, ranks)
+
+    async def save(self, usernames: list):
+        if self.log is None:
+            return
+        players = [self._players[name] for name in usernames if name in self._players]
+        try:
+            await self.log.save(players)
+        except OSError as e:
+            print(f"[LOG] Failed to save ratings: {e}")
+
+    # -------------------------------------------------
+    # Leaderboard (all O(log n) per returned player)
+    # -------------------------------------------------
+    def _rank(self, player: PlayerRating) -> int:
+        return self.index.rank(player.username, player.rating)
+
+    async def rank(self, username: str):
+        player = self._players.get(username)
+        return self._rank(player) if player else None
+
+    async def top(self, limit: int = 10, offset: int = 0) -> list:
+        return [
+            {"rank": rank, **self._players[username].to_dict()}
+            for rank, username, _ in self.index.range(offset + 1, limit)
+        ]
+
+    def stats(self) -> dict:
+        return {"players": len(self), **super().stats()}
+
+
+# =====================================================
+# REDIS
+# =====================================================
+
+
+class RedisRatingBook(RatingBook):
+    """
+    Works with anything that speaks the redis.asyncio API. Equal ratings
+    rank in reverse username order (the sorted set's tie-break).
+    """
+
+    def __init__(
+        self, client, prefix: str = "algoarena", seed=None, rated_ttl_sec: int = 86400, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+        self.seed = seed  # a JsonlRatingLog to import into an empty book
+        self.rated_ttl_sec = rated_ttl_sec
+        self.rank_key = f"{prefix}:ratings:rank"
+
+    def _key(self, username: str) -> str:
+        return f"{self.prefix}:rating:{username}"
+
+    def _rated_key(self, room_id: str) -> str:
+        return f"{self.prefix}:ratings:rated:{room_id}"
+
+    @staticmethod
+    def _encode(player: PlayerRating) -> str:
+        # Unrounded, or every match would round the stored rating again
+        return json.dumps({**player.to_dict(), "rating": player.rating})
+
+    def _decode(self, username: str, raw) -> PlayerRating:
+        if raw is None:
+            return PlayerRating(username, self.default_rating)
+        return PlayerRating.from_dict(json.loads(raw))
+
+    async def load(self):
+        if self.seed is None or await self.client.zcard(self.rank_key):
+            return
+        players = self.seed.load()
+        if not players:
+            return
+        # Workers starting together all write the same values
+        async with self.client.pipeline(transaction=True) as pipe:
+            for player in players.values():
+                pipe.set(self._key(player.username), self._encode(player), nx=True)
+                pipe.zadd(self.rank_key, {player.username: player.rating}, nx=True)
+            await pipe.execute()
+        print(f"[LOG] Imported {len(players)} player ratings into Redis")
+
+    async def count(self) -> int:
+        return await self.client.zcard(self.rank_key)
+
+    async def get(self, username: str):
+        raw = await self.client.get(self._key(username))
+        return self._decode(username, raw) if raw is not None else None
+
+    async def record_match(self, usernames: list, winner=None, room_id: str = None) -> dict:
+        from redis.exceptions import WatchError
+
+        if not self._rateable(usernames, winner):
+            return {}
+        keys = [self._key(name) for name in usernames]
+        rated_key = self._rated_key(room_id) if room_id is not None else None
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Optimistic lock: retry if another worker rated either player
+                    await pipe.watch(*keys, *([rated_key] if rated_key else []))
+                    if rated_key and await pipe.exists(rated_key):
+                        await pipe.unwatch()
+                        return {}
+                    raws = await pipe.mget(keys)
+                    players = tuple(
+                        self._decode(name, raw) for name, raw in zip(usernames, raws)
+                    )
+                    old = self._rate(*players, winner)
+
+                    pipe.multi()
+                    for key, player in zip(keys, players):
+                        pipe.set(key, self._encode(player))
+                        pipe.zadd(self.rank_key, {player.username: player.rating})
+                    if rated_key:
+                        pipe.set(rated_key, 1, ex=self.rated_ttl_sec)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        self.matches_rated += 1
+        ranks = {player.username: await self.rank(player.username) for player in players}
+        return self._changes(players, old, ranks)
+
+    async def rank(self, username: str):
+        rank = await self.client.zrevrank(self.rank_key, username)
+        return rank + 1 if rank is not None else None
+
+    async def top(self, limit: int = 10, offset: int = 0) -> list:
+        usernames = await self.client.zrevrange(self.rank_key, offset, offset + limit - 1)
+        if not usernames:
+            return []
+        names = [name.decode() if isinstance(name, bytes) else name for name in usernames]
+        raws = await self.client.mget([self._key(name) for name in names])
+        return [
+            {"rank": offset + i + 1, **self._decode(name, raw).to_dict()}
+            for i, (name, raw) in enumerate(zip(names, raws))
+        ]
+
+
+def create_rating_book(room_store=None) -> RatingBook:
+    path = os.getenv("RATINGS_PATH", "ratings.jsonl")
+    log = JsonlRatingLog(path) if path else None
+    elo = dict(
+        default_rating=float(os.getenv("RATING_DEFAULT", "1200")),
+        k_factor=float(os.getenv("RATING_K_FACTOR", "20")),
+        provisional_k=float(os.getenv("RATING_PROVISIONAL_K", "40")),
+        provisional_games=int(os.getenv("RATING_PROVISIONAL_GAMES", "20")),
+    )
+    # Multi-worker setups share the book through the room store's Redis
+    if isinstance(room_store, RedisRoomStore):
+        return RedisRatingBook(room_store.client, prefix=room_store.prefix, seed=log, **elo)
+    return MemoryRatingBook(log=log, **elo)
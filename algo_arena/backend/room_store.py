@@ -0,0 +1,246 @@
+"""
+AlgoArena Room Store
+Where room state and online users live.
+
+- MemoryRoomStore: plain dicts, only valid for a single uvicorn worker
+- RedisRoomStore: shared through Redis, so any number of workers can serve
+  the same rooms (pair it with socketio.AsyncRedisManager for broadcasts)
+
+Rooms are rooms.Room objects. Changes go through update(room_id, mutate),
+which runs `mutate(room)` as an atomic read-modify-write and then drops the
+room's cached payloads. `mutate` must be a regular (non-async) function;
+raising inside it aborts the update.
+"""
+
+import json
+import os
+
+from rooms import Room
+
+
+class RoomStore:
+    async def get(self, room_id: str):
+        raise NotImplementedError
+
+    async def create(self, room: Room):
+        raise NotImplementedError
+
+    async def update(self, room_id: str, mutate):
+        """
+        Applies `mutate` atomically. Returns the new room, or None if missing.
+        `mutate` may run more than once (a conflicting write means a retry on
+        the newer room), so it must reset anything it reports back.
+        """
+        raise NotImplementedError
+
+    async def delete(self, room_id: str):
+        """Removes the room and its submission details."""
+        raise NotImplementedError
+
+    async def save_details(self, room_id: str, username: str, details: dict):
+        """Keeps a submission's code and test results out of the room itself."""
+        raise NotImplementedError
+
+    async def get_details(self, room_id: str, username: str):
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def count_by_status(self) -> dict:
+        """{status: number of rooms}. Walks every room, so keep it off hot paths."""
+        raise NotImplementedError
+
+    async def add_online(self, sid: str, username: str):
+        raise NotImplementedError
+
+    async def remove_online(self, sid: str):
+        raise NotImplementedError
+
+    async def online_count(self) -> int:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+# =====================================================
+# IN-MEMORY
+# =====================================================
+class MemoryRoomStore(RoomStore):
+    def __init__(self):
+        self.rooms = {}
+        self.details = {}  # room_id -> {username: details}
+        self.online_users = {}
+
+    async def get(self, room_id: str):
+        return self.rooms.get(room_id)
+
+    async def create(self, room: Room):
+        room.touch()
+        self.rooms[room.room_id] = room
+
+    async def update(self, room_id: str, mutate):
+        # Nothing awaits between read and write, so this is already atomic
+        room = self.rooms.get(room_id)
+        if room is None:
+            return None
+        try:
+            mutate(room)
+        finally:
+            # Also after a raise, mutate may have changed something first
+            room.touch()
+        return room
+
+    async def delete(self, room_id: str):
+        self.rooms.pop(room_id, None)
+        self.details.pop(room_id, None)
+
+    async def save_details(self, room_id: str, username: str, details: dict):
+        self.details.setdefault(room_id, {})[username] = details
+
+    async def get_details(self, room_id: str, username: str):
+        return self.details.get(room_id, {}).get(username)
+
+    async def count(self) -> int:
+        return len(self.rooms)
+
+    async def count_by_status(self) -> dict:
+        counts = {}
+        for room in self.rooms.values():
+            counts[room.status] = counts.get(room.status, 0) + 1
+        return counts
+
+    async def add_online(self, sid: str, username: str):
+        self.online_users[sid] = username
+
+    async def remove_online(self, sid: str):
+        self.online_users.pop(sid, None)
+
+    async def online_count(self) -> int:
+        return len(self.online_users)
+
+
+# =====================================================
+# REDIS
+# =====================================================
+def _encode(room: Room) -> str:
+    return json.dumps(room.to_dict())
+
+
+def _decode(raw) -> Room:
+    return Room.from_dict(json.loads(raw))
+
+
+class RedisRoomStore(RoomStore):
+    """
+    Works with anything that speaks the redis.asyncio API, including
+    fakeredis.aioredis.FakeRedis for local testing.
+    """
+
+    def __init__(self, url: str = None, client=None, prefix: str = "algoarena"):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.prefix = prefix
+        self.online_key = f"{prefix}:online"
+
+    def _key(self, room_id: str) -> str:
+        return f"{self.prefix}:room:{room_id}"
+
+    def _details_key(self, room_id: str) -> str:
+        return f"{self.prefix}:details:{room_id}"
+
+    async def get(self, room_id: str):
+        raw = await self.client.get(self._key(room_id))
+        return _decode(raw) if raw is not None else None
+
+    async def create(self, room: Room):
+        room.touch()
+        await self.client.set(self._key(room.room_id), _encode(room))
+
+    async def update(self, room_id: str, mutate):
+        from redis.exceptions import WatchError
+
+        key = self._key(room_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Optimistic lock: retry if another worker wrote in between
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    if raw is None:
+                        return None
+                    room = _decode(raw)
+                    mutate(room)
+                    room.touch()
+                    pipe.multi()
+                    pipe.set(key, _encode(room))
+                    await pipe.execute()
+                    return room
+                except WatchError:
+                    continue
+
+    async def delete(self, room_id: str):
+        await self.client.delete(self._key(room_id), self._details_key(room_id))
+
+    async def save_details(self, room_id: str, username: str, details: dict):
+        await self.client.hset(self._details_key(room_id), username, json.dumps(details))
+
+    async def get_details(self, room_id: str, username: str):
+        raw = await self.client.hget(self._details_key(room_id), username)
+        return json.loads(raw) if raw is not None else None
+
+    async def count(self) -> int:
+        count = 0
+        async for _ in self.client.scan_iter(match=self._key("*"), count=500):
+            count += 1
+        return count
+
+    async def count_by_status(self) -> dict:
+        counts = {}
+        keys = []
+
+        async def tally():
+            for raw in await self.client.mget(keys):
+                if raw is not None:
+                    status = json.loads(raw)["status"]
+                    counts[status] = counts.get(status, 0) + 1
+            keys.clear()
+
+        async for key in self.client.scan_iter(match=self._key("*"), count=500):
+            keys.append(key)
+            if len(keys) >= 500:
+                await tally()
+        if keys:
+            await tally()
+        return counts
+
+    async def add_online(self, sid: str, username: str):
+        await self.client.hset(self.online_key, sid, username)
+
+    async def remove_online(self, sid: str):
+        await self.client.hdel(self.online_key, sid)
+
+    async def online_count(self) -> int:
+        return await self.client.hlen(self.online_key)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+# =====================================================
+# CONFIG
+# =====================================================
+def create_room_store() -> RoomStore:
+    backend = os.getenv("ROOM_STORE", "memory").lower()
+
+    if backend == "memory":
+        return MemoryRoomStore()
+
+    if backend == "redis":
+        return RedisRoomStore(os.getenv("REDIS_URL"))
+
+    raise ValueError(f"Unknown ROOM_STORE: {backend}")
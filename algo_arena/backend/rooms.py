@@ -0,0 +1,280 @@
+"""
+AlgoArena Rooms
+Typed room state: rooms, their players and their submissions.
+
+Players live in a username -> Player dict, so membership checks are O(1)
+and iteration order is still join order. A room only references its
+problem by id; the statement and hidden tests stay in the catalog.
+
+Serialized forms (the stored dict, the REST status body, the room_update
+payload, the snapshot) are built on first use and cached on the room.
+RoomStore.update calls touch() after every mutation, which drops them.
+
+Every change that gets broadcast bumps `seq`, inside the same atomic update.
+Broadcasts only carry what changed plus the new seq; a client that sees a
+jump of more than one asks for a full snapshot (the `resync` event). Events
+from one change share its seq, e.g. the last submission_update and the
+match_ended it triggers.
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+# A room in one of these never changes status again
+TERMINAL_STATUSES = ("finished", "abandoned")
+
+
+def _iso(value: Optional[datetime]):
+    return value.isoformat() if value is not None else None
+
+
+def _parse(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+@dataclass(slots=True)
+class Player:
+    username: str
+    joined_at: datetime
+
+    def to_dict(self) -> dict:
+        return {"username": self.username, "joined_at": _iso(self.joined_at)}
+
+
+@dataclass(slots=True)
+class Submission:
+    username: str
+    status: str
+    total_passed: int
+    total_tests: int
+    total_skipped: int = 0
+    execution_time_ms: float = 0.0
+    cpu_time_ms: float = 0.0
+    # Taken outside the submission, unlike the two above; what ties are broken on
+    measured_time_ms: Optional[float] = None
+    submitted_at: datetime = field(default_factory=datetime.now)
+    submission_id: Optional[str] = None
+    language: str = "python"
+
+    @classmethod
+    def from_result(
+        cls,
+        username: str,
+        result: dict,
+        submission_id: str = None,
+        language: str = "python",
+    ):
+        return cls(
+            username=username,
+            status=result["status"],
+            total_passed=result["total_passed"],
+            total_tests=result["total_tests"],
+            total_skipped=result.get("total_skipped", 0),
+            execution_time_ms=result.get("execution_time_ms", 0),
+            cpu_time_ms=result.get("cpu_time_ms", 0),
+            measured_time_ms=result.get("measured_time_ms"),
+            submission_id=submission_id,
+            language=language,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{**data, "submitted_at": _parse(data.get("submitted_at"))})
+
+    def to_dict(self) -> dict:
+        return {
+            "submission_id": self.submission_id,
+            "username": self.username,
+            "status": self.status,
+            "total_passed": self.total_passed,
+            "total_tests": self.total_tests,
+            "total_skipped": self.total_skipped,
+            "execution_time_ms": self.execution_time_ms,
+            "cpu_time_ms": self.cpu_time_ms,
+            "measured_time_ms": self.measured_time_ms,
+            "submitted_at": _iso(self.submitted_at),
+            "language": self.language,
+        }
+
+
+@dataclass(slots=True)
+class Room:
+    room_id: str
+    problem_id: str
+    time_limit_sec: int
+    status: str = "waiting"
+    created_at: datetime = field(default_factory=datetime.now)
+    judge_policy: Optional[str] = None
+    players: dict = field(default_factory=dict)  # username -> Player
+    submissions: dict = field(default_factory=dict)  # username -> Submission
+    started_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    end_reason: Optional[str] = None
+    winner: Optional[str] = None
+    seq: int = 0
+    _cache: dict = field(default_factory=dict, repr=False, compare=False)
+
+    # -------------------------------------------------
+    # Players and submissions
+    # -------------------------------------------------
+    @property
+    def usernames(self) -> list:
+        return list(self.players)
+
+    def add_player(self, username: str, joined_at: datetime = None):
+        if username not in self.players:
+            self.players[username] = Player(username, joined_at or datetime.now())
+
+    def remove_player(self, username: str):
+        self.players.pop(username, None)
+
+    @property
+    def is_over(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def start(self, now: datetime = None):
+        # waiting -> active, the clock starts now
+        self.started_at = now or datetime.now()
+        self.ends_at = self.started_at + timedelta(seconds=self.time_limit_sec)
+        self.status = "active"
+
+    def record(self, submission: Submission):
+        self.submissions[submission.username] = submission
+
+    def bump(self):
+        """Marks a broadcast change, call it inside the store update."""
+        self.seq += 1
+
+    @property
+    def all_submitted(self) -> bool:
+        return len(self.submissions) == len(self.players)
+
+    # -------------------------------------------------
+    # Cached serialization
+    # -------------------------------------------------
+    def touch(self):
+        """Drops the cached payloads, call after any change."""
+        self._cache.clear()
+
+    def _cached(self, name: str, build):
+        value = self._cache.get(name)
+        if value is None:
+            value = self._cache[name] = build()
+        return value
+
+    def scores(self) -> dict:
+        """{username: submission dict}, as sent in submission and match events."""
+        return self._cached(
+            "scores",
+            lambda: {name: sub.to_dict() for name, sub in self.submissions.items()},
+        )
+
+    def update_payload(self) -> dict:
+        """The room_update event body."""
+        return self._cached(
+            "update",
+            lambda: {
+                "room_id": self.room_id,
+                "seq": self.seq,
+                "status": self.status,
+                "players": self.usernames,
+                "ends_at": _iso(self.ends_at),
+            },
+        )
+
+    def submission_delta(self, username: str) -> dict:
+        """The submission_update event body: one scoreboard entry, not all of them."""
+        return {
+            "room_id": self.room_id,
+            "seq": self.seq,
+            "username": username,
+            "submission": self.scores()[username],
+            "both_submitted": self.all_submitted,
+        }
+
+    def ended_payload(self) -> dict:
+        """The match_ended event body; the scores already went out as deltas."""
+        return {
+            "room_id": self.room_id,
+            "seq": self.seq,
+            "winner": self.winner,
+            "reason": self.end_reason,
+        }
+
+    def snapshot(self, problem: dict) -> dict:
+        """The room_snapshot event body, sent on join and resync."""
+        return self._cached(
+            "snapshot",
+            lambda: {
+                **self.update_payload(),
+                "problem": problem,
+                "time_limit_sec": self.time_limit_sec,
+                "submissions": self.scores(),
+                "end_reason": self.end_reason,
+                "winner": self.winner,
+            },
+        )
+
+    def status_json(self, problem: dict) -> bytes:
+        """Encoded RoomStatusResponse; `problem` is the id/title/difficulty summary."""
+        return self._cached(
+            "status_json",
+            lambda: json.dumps(
+                {
+                    "room_id": self.room_id,
+                    "status": self.status,
+                    "created_at": _iso(self.created_at),
+                    "time_limit_sec": self.time_limit_sec,
+                    "problem": problem,
+                    "players": [p.to_dict() for p in self.players.values()],
+                }
+            ).encode(),
+        )
+
+    def to_dict(self) -> dict:
+        return self._cached(
+            "dict",
+            lambda: {
+                "room_id": self.room_id,
+                "problem_id": self.problem_id,
+                "time_limit_sec": self.time_limit_sec,
+                "status": self.status,
+                "created_at": _iso(self.created_at),
+                "judge_policy": self.judge_policy,
+                "players": [p.to_dict() for p in self.players.values()],
+                "submissions": self.scores(),
+                "started_at": _iso(self.started_at),
+                "ends_at": _iso(self.ends_at),
+                "end_reason": self.end_reason,
+                "winner": self.winner,
+                "seq": self.seq,
+            },
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            room_id=data["room_id"],
+            problem_id=data["problem_id"],
+            time_limit_sec=data["time_limit_sec"],
+            status=data["status"],
+            created_at=_parse(data.get("created_at")),
+            judge_policy=data.get("judge_policy"),
+            players={
+                p["username"]: Player(p["username"], _parse(p["joined_at"]))
+                for p in data.get("players", [])
+            },
+            submissions={
+                name: Submission.from_dict(sub)
+                for name, sub in data.get("submissions", {}).items()
+            },
+            started_at=_parse(data.get("started_at")),
+            ends_at=_parse(data.get("ends_at")),
+            end_reason=data.get("end_reason"),
+            winner=data.get("winner"),
+            seq=data.get("seq", 0),
+        )
@@ -0,0 +1,251 @@
+"""
+AlgoArena Judge Sandbox
+Isolates local judge workers from the server, its files and the network.
+
+Every worker starts through util-linux `unshare` in new network, mount, PID,
+IPC and UTS namespaces. A setup script, root inside those namespaces only,
+then builds a fresh root on a tmpfs:
+- read-only binds of the toolchains and nothing else (/usr, the Python
+  install, JUDGE_SANDBOX_PATHS), with the server's working directory
+  covered up in case one of them contains it
+- a private /proc, /dev/null and friends
+- size-limited tmpfs mounts for /tmp and /judge (the working directory)
+- /build, a read-only view of the directory the server stages compiled
+  submissions into
+
+It chroots into that root and drops to an unprivileged uid with setpriv
+(no new privileges, no capabilities) before the worker interpreter starts.
+
+So a submission:
+- has no network (the new namespace has no interfaces up)
+- can't read the server's directory, problems.json or other workers' files
+- can't see or signal processes outside its PID namespace, and everything
+  it starts is killed with it
+- runs as a uid of its own (one per live worker), so RLIMIT_NPROC caps
+  its processes and threads without eating into other workers' budget
+
+Needs root on the host (for the namespaces and the uid switch), and
+`unshare`, `setpriv`, `chroot`, `mount` and `env` from util-linux/coreutils.
+"""
+
+import asyncio
+import glob
+import os
+import shutil
+import sys
+from collections import deque
+
+# Paths visible inside the sandbox (read-only) unless JUDGE_SANDBOX_PATHS
+# adds more. Missing ones are skipped; /etc only gives what runtimes need.
+DEFAULT_PATHS = (
+    "/usr",
+    "/bin",
+    "/lib",
+    "/lib32",
+    "/lib64",
+    "/etc/alternatives",
+    "/etc/ld.so.cache",
+)
+
+REQUIRED_TOOLS = ("unshare", "setpriv", "chroot", "mount", "env", "sh")
+
+# PID 1 of the sandbox. The worker must not be PID 1 itself (that one
+# ignores SIGXCPU and every other signal it has no handler for), and a shell
+# in between would print "Segmentation fault" and the like into its stderr.
+# Reports a worker killed by signal N as exit code 128 + N.
+INIT = """
+import os, sys
+pid = os.fork()
+if pid == 0:
+    os.execvp(sys.argv[1], sys.argv[1:])
+_, status = os.waitpid(pid, 0)
+os._exit(128 + os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status))
+"""
+
+# Runs as root inside the new namespaces, then runs the command as `uid`.
+# Arguments: the host's Python, root mountpoint, build dir (read-only at
+# /build), work dir (writable at /judge, a tmpfs when empty), uid, tmpfs
+# size, ":"-joined read-only paths, ":"-joined paths to hide, the init above,
+# then the command's argv.
+SETUP_SCRIPT = r"""
+set -e -f
+export PATH=/usr/sbin:/usr/bin:/sbin:/bin
+python="$1"; root="$2"; build="$3"; work="$4"; uid="$5"; scratch="$6"; paths="$7"; hide="$8"
+init="$9"
+shift 9
+
+bind_ro() {
+  if [ -L "$1" ]; then
+    mkdir -p "$root$(dirname "$1")"
+    ln -s "$(readlink "$1")" "$root$1"
+    return
+  fi
+  if [ -d "$1" ]; then mkdir -p "$root$2"; else mkdir -p "$root$(dirname "$2")"; touch "$root$2"; fi
+  mount --rbind "$1" "$root$2"
+  mount -o remount,bind,ro,nosuid,nodev "$root$2"
+}
+
+mount -t tmpfs -o mode=0755,size=16m judge-root "$root"
+IFS=:
+for path in $paths; do
+  if [ -e "$path" ] || [ -L "$path" ]; then bind_ro "$path" "$path"; fi
+done
+for path in $hide; do
+  if [ -d "$root$path" ]; then mount -t tmpfs -o mode=0,size=4k judge-hidden "$root$path"; fi
+done
+unset IFS
+
+mkdir -p "$root/proc" "$root/dev" "$root/tmp" "$root/judge"
+mount -t proc -o nosuid,nodev,noexec proc "$root/proc"
+for dev in null zero random urandom; do
+  touch "$root/dev/$dev"
+  mount --bind "/dev/$dev" "$root/dev/$dev"
+done
+scratch_options="size=$scratch,mode=0700,uid=$uid,gid=$uid,nosuid,nodev"
+mount -t tmpfs -o "$scratch_options" judge-tmp "$root/tmp"
+if [ -n "$work" ]; then
+  mount --bind "$work" "$root/judge"
+else
+  mount -t tmpfs -o "$scratch_options" judge-work "$root/judge"
+fi
+if [ -n "$build" ]; then bind_ro "$build" /build; fi
+
+exec "$python" -I -c "$init" chroot "$root" setpriv --reuid="$uid" --regid="$uid" \
+  --clear-groups --no-new-privs --inh-caps=-all --bounding-set=-all env -C /judge "$@"
+"""
+
+BUILD_DIR = "/build"
+
+
+class Sandbox:
+    def __init__(
+        self,
+        paths: list = DEFAULT_PATHS,
+        uid_base: int = 70000,
+        uid_count: int = 1000,
+        scratch_mb: int = 64,
+        max_processes: int = 64,
+    ):
+        # The worker interpreter is the real binary, not a virtualenv's
+        # symlink to it, so only the base install has to be visible
+        self.python = os.path.realpath(sys.executable)
+        self.paths = list(paths) + glob.glob("/etc/java-*") + [sys.base_prefix]
+        # problems.json is opened relative to the server's working directory
+        self.hide = [os.getcwd()]
+        self.scratch_mb = scratch_mb
+        self.max_processes = max_processes
+        self._uids = deque(range(uid_base, uid_base + uid_count))
+
+    def check(self):
+        """Why the sandbox can't work on this host, or None."""
+        if os.geteuid() != 0:
+            return "the judge sandbox needs root to create namespaces and switch uid"
+        missing = [tool for tool in REQUIRED_TOOLS if shutil.which(tool) is None]
+        if missing:
+            return f"the judge sandbox needs {', '.join(missing)} on PATH"
+        return None
+
+    async def probe(self, workdir: str):
+        """Runs `true` in a sandbox; the error output if that fails, else None."""
+        uid = self.acquire_uid()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.wrap(["/bin/true"], workdir, uid),
+                cwd=workdir,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await process.communicate()
+        finally:
+            self.release_uid(uid)
+        if process.returncode != 0:
+            return stderr.decode(errors="replace").strip() or f"exit code {process.returncode}"
+        return None
+
+    def acquire_uid(self) -> int:
+        if not self._uids:
+            raise RuntimeError("No free judge uid, raise JUDGE_SANDBOX_UIDS")
+        return self._uids.popleft()
+
+    def release_uid(self, uid: int):
+        # Back of the queue, so a uid is reused as late as possible
+        self._uids.append(uid)
+
+    def exposes(self, path: str) -> bool:
+        path = os.path.realpath(path)
+        return any(
+            path == os.path.realpath(root) or path.startswith(os.path.realpath(root) + "/")
+            for root in self.paths
+        )
+
+    def wrap(self, argv: list, workdir: str, uid: int, work: str = None) -> list:
+        """
+        `argv` run in a sandbox as `uid`. `workdir` gets the mountpoints:
+        root/, and build/ which shows up read-only at /build. `work` is a
+        host directory to run in, writable at /judge (chown it to `uid`);
+        without it /judge is an empty tmpfs.
+        """
+        os.makedirs(f"{workdir}/root", exist_ok=True)
+        os.makedirs(f"{workdir}/build", exist_ok=True)
+        return [
+            "unshare",
+            "--net",
+            "--mount",
+            "--pid",
+            "--ipc",
+            "--uts",
+            "--fork",
+            "--kill-child",
+            "--",
+            "sh",
+            "-c",
+            SETUP_SCRIPT,
+            "judge-sandbox",
+            self.python,
+            f"{workdir}/root",
+            f"{workdir}/build",
+            work or "",
+            str(uid),
+            f"{self.scratch_mb}m",
+            ":".join(self.paths),
+            ":".join(self.hide),
+            INIT,
+            *argv,
+        ]
+
+    @staticmethod
+    def exit_status(returncode: int) -> int:
+        # INIT passes a worker killed by signal N on as 128 + N
+        if returncode is not None and returncode > 128:
+            return -(returncode - 128)
+        return returncode
+
+
+def create_sandbox():
+    """The configured Sandbox, or None when JUDGE_SANDBOX=none."""
+    mode = os.getenv("JUDGE_SANDBOX", "namespaces").lower()
+    if mode == "none":
+        print(
+            "[LOG] JUDGE_SANDBOX=none: local judge workers run as the server user "
+            "with its files and network in reach. Only use this for trusted code."
+        )
+        return None
+    if mode != "namespaces":
+        raise ValueError(f"Unknown JUDGE_SANDBOX: {mode}")
+
+    extra = [path for path in os.getenv("JUDGE_SANDBOX_PATHS", "").split(":") if path]
+    sandbox = Sandbox(
+        paths=list(DEFAULT_PATHS) + extra,
+        uid_base=int(os.getenv("JUDGE_SANDBOX_UID_BASE", "70000")),
+        uid_count=int(os.getenv("JUDGE_SANDBOX_UIDS", "1000")),
+        scratch_mb=int(os.getenv("JUDGE_SANDBOX_SCRATCH_MB", "64")),
+        max_processes=int(os.getenv("JUDGE_MAX_PROCESSES", "64")),
+    )
+    problem = sandbox.check()
+    if problem:
+        raise RuntimeError(
+            f"JUDGE_BACKEND=local: {problem}. Set JUDGE_SANDBOX=none to run "
+            "submissions unsandboxed (trusted code only)."
+        )
+    return sandbox
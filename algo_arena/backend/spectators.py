@@ -0,0 +1,103 @@
+"""
+AlgoArena Spectator Feed
+Read-only room state for spectators, coalesced to a fixed update rate.
+
+Spectators sit in their own Socket.IO room ("<room_id>:spectators"), so
+player events never fan out to them. Room changes only record the latest
+room per id (O(1), no await); one background task sends each changed room
+at most once per interval, with the full state, so a spectator that misses
+an update is never out of sync for longer than that.
+"""
+
+import asyncio
+
+
+def spectator_channel(room_id: str) -> str:
+    return f"{room_id}:spectators"
+
+
+class SpectatorFeed:
+    def __init__(self, emit, updates_per_sec: float = 2.0, only_watched: bool = True):
+        """
+        emit(room): awaited with the latest state of a changed room
+        only_watched: skip rooms nobody on this worker watches. Turn it off
+        when broadcasts go through Redis and the watchers may be elsewhere.
+        """
+        self.emit = emit
+        self.interval_sec = 1 / updates_per_sec if updates_per_sec > 0 else 0.5
+        self.only_watched = only_watched
+
+        self._pending = {}  # room_id -> latest Room, sent on the next flush
+        self._sent_seq = {}  # room_id -> seq of the last state sent
+        self.watching = {}  # sid -> room_id
+        self.watchers = {}  # room_id -> sids watching it here
+
+        self.published = 0
+        self.coalesced = 0  # changes folded into a pending one
+        self.sent = 0
+
+    # -------------------------------------------------
+    # Watchers (per worker)
+    # -------------------------------------------------
+    def watch(self, sid: str, room_id: str):
+        self.unwatch(sid)
+        self.watching[sid] = room_id
+        self.watchers[room_id] = self.watchers.get(room_id, 0) + 1
+
+    def unwatch(self, sid: str):
+        """Returns the room the socket was watching, if any."""
+        room_id = self.watching.pop(sid, None)
+        if room_id is None:
+            return None
+        count = self.watchers.get(room_id, 0) - 1
+        if count > 0:
+            self.watchers[room_id] = count
+        else:
+            self.watchers.pop(room_id, None)
+            self._sent_seq.pop(room_id, None)
+        return room_id
+
+    # -------------------------------------------------
+    # Updates
+    # -------------------------------------------------
+    def publish(self, room):
+        """Called on every room change; never blocks the caller."""
+        room_id = room.room_id
+        if self.only_watched and room_id not in self.watchers:
+            return
+        if room_id in self._pending:
+            self.coalesced += 1
+        elif self._sent_seq.get(room_id) == room.seq:
+            return  # Nothing new since the last send
+        self._pending[room_id] = room
+        self.published += 1
+
+    async def flush(self):
+        batch, self._pending = self._pending, {}
+        for room_id, room in batch.items():
+            if self._sent_seq.get(room_id) == room.seq:
+                continue
+            if room.status in ("finished", "abandoned"):
+                self._sent_seq.pop(room_id, None)  # Last state it will have
+            else:
+                self._sent_seq[room_id] = room.seq
+            try:
+                await self.emit(room)
+                self.sent += 1
+            except Exception as e:
+                print(f"[LOG] Spectator update for {room_id} failed: {e}")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval_sec)
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "spectators": len(self.watching),
+            "watched_rooms": len(self.watchers),
+            "updates_per_sec": round(1 / self.interval_sec, 3),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+        }
@@ -0,0 +1,194 @@
+import json
+import os
+
+import pytest
+
+from catalog import ProblemCatalog, decode_cursor, encode_cursor
+
+
+def problem(problem_id: str, difficulty: str = "easy", tags=(), title: str = None) -> dict:
+    return {
+        "id": problem_id,
+        "title": title or problem_id.replace("-", " ").title(),
+        "difficulty": difficulty,
+        "tags": list(tags),
+        "description": "",
+        "starter_code": "def solution(x):\n    pass",
+        "public_tests": [{"input": {"x": 1}, "expected": 1}],
+        "hidden_tests": [{"input": {"x": 2}, "expected": 2}],
+    }
+
+
+PROBLEMS = [
+    problem("two-sum", tags=["arrays", "hashing"]),
+    problem("reverse-string", tags=["strings"]),
+    problem("valid-anagram", tags=["strings", "hashing"]),
+    problem("merge-intervals", "medium", ["arrays", "sorting"]),
+    problem("lru-cache", "medium", ["design", "hashing"], title="LRU Cache"),
+    problem("word-ladder", "hard", ["graphs"]),
+]
+
+
+def write(path, problems):
+    text = problems if isinstance(problems, str) else json.dumps(problems)
+    before = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    with open(path, "w") as f:
+        f.write(text)
+    # A rewrite within the same clock tick must still look changed
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, max(stat.st_mtime_ns, before + 1)))
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "problems.json"
+    write(path, PROBLEMS)
+    return ProblemCatalog(str(path))
+
+
+def walk(catalog, **filters) -> list:
+    """Every id a listing returns, following next_cursor to the end."""
+    ids, cursor = [], None
+    while True:
+        items, _, cursor = catalog.page(limit=2, cursor=cursor, **filters)
+        ids += [item["id"] for item in items]
+        if cursor is None:
+            return ids
+
+
+# =====================================================
+# LOADING
+# =====================================================
+def test_loads_and_indexes_problems(catalog):
+    assert len(catalog) == 6
+    assert catalog.get("two-sum")["title"] == "Two Sum"
+    assert catalog.get("missing") is None
+    assert {p["id"] for p in catalog.summaries("MEDIUM")} == {"merge-intervals", "lru-cache"}
+    assert catalog.random_problem("hard")["id"] == "word-ladder"
+    assert catalog.random_problem("impossible") is None
+    assert catalog.harness("two-sum") is catalog.harness("two-sum")
+    assert catalog.lookups[("get", "miss")] == 1
+
+
+def test_details_payload_is_prebuilt(catalog):
+    details = json.loads(catalog.details_json("two-sum"))
+    assert details["id"] == "two-sum"
+    assert "hidden_tests" not in details
+    assert "python" in details["languages"]
+    assert catalog.details_json("missing") is None
+
+
+def test_reload_swaps_in_the_new_file(catalog):
+    version = catalog.version
+    write(catalog.path, PROBLEMS + [problem("climbing-stairs")])
+    assert catalog.reload_if_changed()
+    assert catalog.get("climbing-stairs") is not None
+    assert catalog.version != version
+    assert not catalog.reload_if_changed()  # nothing new since
+
+
+def test_broken_file_keeps_the_last_good_snapshot(catalog):
+    version = catalog.version
+    write(catalog.path, "[{not json")
+    assert not catalog.reload_if_changed()
+    assert catalog.version == version and len(catalog) == 6
+
+
+# =====================================================
+# PAGING
+# =====================================================
+def test_cursor_round_trip():
+    for problem_id in ("two-sum", "a", "ünïcode/id?"):
+        assert decode_cursor(encode_cursor(problem_id)) == problem_id
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "a", "eA*", "=="])
+def test_invalid_cursor(catalog, cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        catalog.page(cursor=cursor)
+
+
+def test_pages_cover_everything_once_in_id_order(catalog):
+    ids = walk(catalog)
+    assert ids == sorted(p["id"] for p in PROBLEMS)
+    assert walk(catalog, difficulty="easy") == ["reverse-string", "two-sum", "valid-anagram"]
+    assert walk(catalog, tags=["hashing", "strings"]) == ["valid-anagram"]
+    assert walk(catalog, title_prefix="lru") == ["lru-cache"]
+
+
+def test_page_reports_total_and_cursor(catalog):
+    items, total, cursor = catalog.page(tags=["hashing"], limit=2)
+    assert [item["id"] for item in items] == ["lru-cache", "two-sum"]
+    assert total == 3
+    assert decode_cursor(cursor) == "two-sum"
+    items, total, cursor = catalog.page(tags=["hashing"], limit=2, cursor=cursor)
+    assert [item["id"] for item in items] == ["valid-anagram"] and cursor is None
+
+
+def test_cursor_survives_a_reload(catalog):
+    # The cursor is the last id served, so a page boundary holds even if
+    # that problem is gone after the reload
+    _, _, cursor = catalog.page(limit=2)
+    assert decode_cursor(cursor) == "merge-intervals"
+    write(catalog.path, [p for p in PROBLEMS if p["id"] != "merge-intervals"])
+    assert catalog.reload_if_changed()
+    items, _, _ = catalog.page(limit=2, cursor=cursor)
+    assert [item["id"] for item in items] == ["reverse-string", "two-sum"]
+
+
+# =====================================================
+# ETAGS
+# =====================================================
+def test_etags_are_stable_across_loads(catalog, tmp_path):
+    other = tmp_path / "copy.json"
+    write(other, PROBLEMS)
+    same = ProblemCatalog(str(other))
+    assert same.version == catalog.version
+    assert same.details_etag("two-sum") == catalog.details_etag("two-sum")
+
+    changed = [dict(p, title="Two Sum II") if p["id"] == "two-sum" else p for p in PROBLEMS]
+    write(other, changed)
+    same.reload_if_changed()
+    assert same.details_etag("two-sum") != catalog.details_etag("two-sum")
+    # Only the problem that changed gets a new ETag
+    assert same.details_etag("word-ladder") == catalog.details_etag("word-ladder")
+
+
+def test_listing_answers_304_while_unchanged(client, app_module):
+    first = client.get("/problems", params={"limit": 2})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag == f'"{app_module.catalog.version}"'
+    assert first.json()["count"] == 2
+
+    again = client.get("/problems", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == etag
+
+    stale = client.get("/problems", params={"limit": 2}, headers={"If-None-Match": '"old"'})
+    assert stale.status_code == 200
+
+
+def test_problem_details_answer_304_while_unchanged(client, app_module):
+    problem_id = app_module.catalog.snapshot.ordered_ids[0]
+    first = client.get(f"/problems/{problem_id}")
+    assert first.status_code == 200
+    assert first.headers["cache-control"].startswith("public, max-age=")
+    etag = first.headers["etag"]
+
+    again = client.get(f"/problems/{problem_id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert client.get("/problems/missing").status_code == 404
+
+
+def test_listing_pages_through_the_api(client, app_module):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/problems", params=params).json()
+        ids += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == app_module.catalog.snapshot.ordered_ids
+    assert client.get("/problems", params={"cursor": "!!!"}).status_code == 400
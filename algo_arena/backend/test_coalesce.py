@@ -0,0 +1,39 @@
+import asyncio
+
+from coalesce import EventCoalescer
+
+
+class Sink:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, item):
+        self.sent.append(item)
+
+
+def test_burst_goes_out_as_one_batch():
+    async def scenario():
+        sink = Sink()
+        coalescer = EventCoalescer(sink, interval_sec=0.05)
+        for i in range(10):
+            coalescer.add(i)
+        await asyncio.sleep(0.1)
+        coalescer.add(10)
+        await asyncio.sleep(0.1)
+        assert sink.sent == [list(range(10)), [10]]
+
+    asyncio.run(scenario())
+
+
+def test_flush_sends_pending_now_and_cancels_the_timer():
+    async def scenario():
+        sink = Sink()
+        coalescer = EventCoalescer(sink, interval_sec=0.05)
+        coalescer.add("a")
+        await coalescer.flush()
+        assert sink.sent == [["a"]]
+        await asyncio.sleep(0.1)
+        await coalescer.flush()  # nothing pending, nothing sent
+        assert sink.sent == [["a"]]
+
+    asyncio.run(scenario())
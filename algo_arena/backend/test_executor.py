@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from executor import ExecutorError, LocalExecutor, PistonExecutor
+from harness import FrameDecoder, JudgeHarness
+from languages import LANGUAGES
+
+OK = {"run": {"stdout": "out", "stderr": "", "code": 0, "signal": None}}
+
+
+def piston(responses, **kwargs):
+    """A PistonExecutor whose Piston answers with `responses` in turn."""
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        status, headers, body = responses[len(calls) - 1]
+        return httpx.Response(status, headers=headers, json=body)
+
+    executor = PistonExecutor("http://piston.test/execute", backoff_sec=0, **kwargs)
+    executor._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return executor, calls
+
+
+def test_retries_busy_answers_then_runs():
+    executor, calls = piston(
+        [(503, {}, {}), (429, {"Retry-After": "0"}, {}), (200, {}, OK)], max_retries=2
+    )
+    result = asyncio.run(executor.run("print(1)"))
+    assert result["stdout"] == "out" and len(calls) == 3
+
+
+def test_run_time_comes_from_piston():
+    timed = {"run": {**OK["run"], "wall_time": 42}}
+    executor, _ = piston([(200, {}, timed), (200, {}, OK)])
+    assert asyncio.run(executor.run("print(1)"))["run_ms"] == 42
+    # Older Piston versions don't time the run
+    assert asyncio.run(executor.run("print(1)"))["run_ms"] is None
+
+
+def test_honours_retry_after(monkeypatch):
+    slept = []
+
+    async def sleep(sec):
+        slept.append(sec)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    executor, calls = piston([(429, {"Retry-After": "2"}, {}), (200, {}, OK)])
+    asyncio.run(executor.run("print(1)"))
+    assert slept == [2.0]
+
+
+def test_gives_up_when_retry_after_is_too_long():
+    executor, calls = piston(
+        [(429, {"Retry-After": "120"}, {"message": "slow down"})], max_retry_after_sec=5
+    )
+    with pytest.raises(ExecutorError, match="429"):
+        asyncio.run(executor.run("print(1)"))
+    assert len(calls) == 1
+
+
+def test_error_status_is_not_mistaken_for_a_run():
+    # A 400 body has no "run" key; it used to be read as a run that printed nothing
+    executor, calls = piston([(400, {}, {"message": "runtime is unknown"})])
+    with pytest.raises(ExecutorError, match="400"):
+        asyncio.run(executor.run("print(1)"))
+    assert len(calls) == 1
+
+
+def test_retries_run_out():
+    executor, calls = piston([(502, {}, {})] * 3, max_retries=2)
+    with pytest.raises(ExecutorError, match="502"):
+        asyncio.run(executor.run("print(1)"))
+    assert len(calls) == 3
+
+
+def test_local_run_time_is_measured_outside_the_submission():
+    # A submission can stop its own clocks; run_ms comes from this process
+    problem = JudgeHarness({"id": "sleepy", "public_tests": [{"input": {}, "expected": 1}]})
+    code = (
+        "import time\n"
+        "def solution():\n"
+        "    time.sleep(0.3)\n"
+        "    return 1\n"
+        "time.perf_counter = time.process_time = lambda: 0.0\n"
+    )
+    python = LANGUAGES["python"]
+
+    async def run():
+        executor = LocalExecutor(pool_size=1, wall_time_sec=10)
+        try:
+            return await executor.run(python.source(problem, code), python.stdin(problem))
+        finally:
+            await executor.close()
+
+    result = asyncio.run(run())
+    records = [r for r in FrameDecoder().feed(result["stdout"].encode()) if "i" in r]
+    assert records[0]["actual"] == 1
+    assert records[0]["wall_ms"] == 0
+    assert result["run_ms"] >= 300
+
+
+def test_evicted_build_is_an_executor_error(tmp_path):
+    # The artifact cache dropped the build between _prepare and staging
+    executor = LocalExecutor(pool_size=1, wall_time_sec=10)
+    acquired = []
+
+    async def prepare(language, source, stdin):
+        return {"argv": [], "stdin": stdin}, 0.0, str(tmp_path / "evicted-build")
+
+    async def acquire(acquire=executor._acquire):
+        acquired.append(await acquire())
+        return acquired[-1]
+
+    executor._prepare = prepare
+    executor._acquire = acquire
+
+    async def run():
+        try:
+            with pytest.raises(ExecutorError):
+                await executor.run("int main() {}")
+        finally:
+            await executor.close()
+
+    asyncio.run(run())
+    # The worker it took is gone, not left running
+    assert not os.path.exists(acquired[0].workdir)
+    assert not acquired[0].alive
@@ -0,0 +1,49 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import fastjson
+
+BIG = 2**64 + 1
+PAYLOAD = {
+    "status": "passed",
+    "expected": [BIG, -(2**70)],
+    "submitted_at": datetime(2024, 1, 2, 3, 4, 5),
+    1: "non-str key",
+}
+EXPECTED = {
+    "status": "passed",
+    "expected": [BIG, -(2**70)],
+    "submitted_at": "2024-01-02T03:04:05",
+    "1": "non-str key",
+}
+
+needs_orjson = pytest.mark.skipif(fastjson.orjson is None, reason="orjson not installed")
+
+
+@pytest.mark.parametrize("backend", [fastjson.StdJson, pytest.param(fastjson.OrJson, marks=needs_orjson)])
+def test_socket_dumps_ints_over_64_bits(backend):
+    assert json.loads(backend.dumps(PAYLOAD)) == EXPECTED
+
+
+@pytest.mark.parametrize(
+    "response", [fastjson.StdJSONResponse, pytest.param(fastjson.OrjsonResponse, marks=needs_orjson)]
+)
+def test_response_renders_ints_over_64_bits(response):
+    assert json.loads(response(PAYLOAD).body) == EXPECTED
+
+
+@needs_orjson
+def test_orjson_still_encodes_small_ints_itself():
+    assert fastjson.OrJson.dumps({"n": 2**63 - 1}) == '{"n":9223372036854775807}'
+
+
+@needs_orjson
+def test_orjson_other_errors_still_raise():
+    with pytest.raises(TypeError):
+        fastjson.OrJson.dumps({"n": object()})
+    cycle = []
+    cycle.append(cycle)
+    with pytest.raises(ValueError):
+        fastjson.OrJson.dumps(cycle)
@@ -0,0 +1,77 @@
+import json
+
+import harness
+from harness import FRAME_MAGIC, FrameDecoder, JudgeHarness, encode_frame
+
+RECORDS = [{"i": 0, "actual": [1, 2]}, {"i": 1, "error": "boom"}, {"done": True}]
+
+
+def stream(*records) -> bytes:
+    return b"".join(encode_frame(record) for record in records)
+
+
+def feed_all(decoder, data: bytes, chunk_size: int) -> list:
+    records = []
+    for start in range(0, len(data), chunk_size):
+        records += decoder.feed(data[start : start + chunk_size])
+    return records
+
+
+def test_frames_survive_any_chunking():
+    data = stream(*RECORDS)
+    for chunk_size in (1, 2, 3, 7, len(data)):
+        assert feed_all(FrameDecoder(), data, chunk_size) == RECORDS
+
+
+def test_bytes_outside_frames_are_skipped():
+    # print() output from the submission lands between the frames
+    data = b"hello\n" + encode_frame(RECORDS[0]) + b"\x1eworld" + encode_frame(RECORDS[2])
+    decoder = FrameDecoder()
+    assert feed_all(decoder, data, 4) == [RECORDS[0], RECORDS[2]]
+    assert decoder.skipped_bytes == len(b"hello\n") + len(b"\x1eworld")
+
+
+def test_fake_header_resyncs_on_the_next_magic():
+    data = FRAME_MAGIC + b"12x\n" + encode_frame(RECORDS[2])
+    assert FrameDecoder().feed(data) == [RECORDS[2]]
+
+
+def test_oversized_frame_is_dropped_without_buffering():
+    big = {"i": 0, "actual": "x" * 1000}
+    decoder = FrameDecoder(max_frame_bytes=100)
+    records = feed_all(decoder, stream(big, RECORDS[2]), 64)
+    assert records[0] == {"error": f"Result too large ({len(json.dumps(big))} bytes)"}
+    assert records[1:] == [RECORDS[2]]
+    assert len(decoder._buffer) == 0
+
+
+def test_malformed_payload_becomes_an_error_record():
+    data = FRAME_MAGIC + b"5\n{nope" + encode_frame(RECORDS[2])
+    assert FrameDecoder().feed(data) == [{"error": "Malformed result record"}, RECORDS[2]]
+
+
+def test_verdicts_and_early_stops():
+    test = {"input": {"n": 1}, "expected": 2}
+    assert harness.test_passed({"i": 0, "actual": 2}, test)
+    # A float answer that equals the int one passes, whatever the language printed
+    assert harness.test_passed({"i": 0, "actual": 2.0}, test)
+    assert not harness.test_passed({"i": 0, "actual": 2.5}, test)
+    assert not harness.test_passed({"i": 0, "error": "boom"}, test)
+
+    assert harness.stops_run(harness.POLICY_FAIL_FAST, 7, 2)
+    assert harness.stops_run(harness.POLICY_PUBLIC_FIRST, 1, 2)
+    assert not harness.stops_run(harness.POLICY_PUBLIC_FIRST, 2, 2)
+    assert not harness.stops_run(harness.POLICY_FULL, 0, 2)
+
+
+def test_stdin_carries_inputs_only():
+    problem = {
+        "id": "double",
+        "public_tests": [{"input": {"n": 1}, "expected": 2}],
+        "hidden_tests": [{"input": {"n": 5}, "expected": 10}],
+    }
+    judge = JudgeHarness(problem)
+    assert judge.tests_in(harness.TESTS_HIDDEN) == (1, problem["hidden_tests"])
+    job = json.loads(judge.stdin_for(harness.TESTS_ALL))
+    assert job["tests"] == [{"input": {"n": 1}}, {"input": {"n": 5}}]
+    assert "expected" not in judge.stdin_for(harness.TESTS_PUBLIC)
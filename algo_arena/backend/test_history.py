@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from history import HistoryStore
+
+ROOM = SimpleNamespace(
+    room_id="r1",
+    problem_id="two-sum",
+    status="finished",
+    end_reason="all_submitted",
+    winner="alice",
+    started_at=datetime.now(),
+    usernames=["alice", "bob"],
+)
+
+
+def details(username: str, submission_id: str) -> dict:
+    return {
+        "submission_id": submission_id,
+        "username": username,
+        "status": "passed",
+        "total_passed": 3,
+        "total_tests": 3,
+        "submitted_at": datetime.now(),
+        "code": "def solution(): ...",
+        "test_results": [{"passed": True}],
+    }
+
+
+def test_live_match_submissions_stay_unlisted(tmp_path):
+    async def scenario():
+        store = HistoryStore(str(tmp_path / "history.db"))
+        try:
+            store.record_submission("r1", "two-sum", details("alice", "s1"))
+            live = await store.submissions_by_user("alice")
+            by_problem = await store.submissions_by_problem("two-sum")
+            # Still readable by id, with no match status to show it is hidden
+            hidden = await store.submission("s1")
+
+            store.record_match(ROOM)
+            over = await store.submissions_by_user("alice")
+            shown = await store.submission("s1")
+            return live, by_problem, hidden, over, shown
+        finally:
+            await store.close()
+
+    live, by_problem, hidden, over, shown = asyncio.run(scenario())
+    assert live == [] and by_problem == []
+    assert hidden["match_status"] is None
+    assert [entry["submission_id"] for entry in over] == ["s1"]
+    assert shown["match_status"] == "finished" and shown["code"] == "def solution(): ..."
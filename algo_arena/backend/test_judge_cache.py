@@ -0,0 +1,78 @@
+import pytest
+
+from judge_cache import JudgeCache, code_hash, normalize_code
+
+CODE = "def solution(nums):\n    return sorted(nums)\n"
+
+
+@pytest.mark.parametrize(
+    "variant",
+    [
+        "# sorts\ndef solution(nums):\n    return sorted(nums)  # done\n",
+        "def solution(nums):\n\n\n  return sorted(nums)\n",
+        "def solution(nums):\n\treturn sorted( nums )\n",
+    ],
+)
+def test_cosmetic_changes_hash_the_same(variant):
+    assert code_hash(variant) == code_hash(CODE)
+
+
+@pytest.mark.parametrize(
+    "variant",
+    [
+        "def solution(nums):\n    return sorted(nums, reverse=True)\n",
+        "def solution(nums):\n    return sorted(nums)\n_salt = 'bob'\n",
+        "def solution(nums):\n    return 'sorted(nums)  # text, not a comment'\n",
+    ],
+)
+def test_real_changes_hash_differently(variant):
+    assert code_hash(variant) != code_hash(CODE)
+
+
+def test_other_languages_are_hashed_as_is():
+    cpp = '#include <vector>\nint solution() { return 1; }\n'
+    assert code_hash(cpp, "cpp") != code_hash('#include <map>\nint solution() { return 1; }\n', "cpp")
+
+
+def test_invalid_python_falls_back_to_trimming():
+    assert normalize_code("def broken(:\n   \n    pass   \n") == "def broken(:\n    pass"
+
+
+def test_key_includes_policy_language_and_tests_version():
+    keys = {
+        JudgeCache.make_key("p", "v1", CODE),
+        JudgeCache.make_key("p", "v2", CODE),
+        JudgeCache.make_key("p", "v1", CODE, policy="fail_fast"),
+        JudgeCache.make_key("p", "v1", CODE, language="javascript"),
+    }
+    assert len(keys) == 4
+
+
+def test_lru_eviction_and_stats():
+    cache = JudgeCache(max_entries=2)
+    cache.put("a", {"status": "passed"})
+    cache.put("b", {"status": "failed"})
+    assert cache.get("a") == {"status": "passed"}  # a is now the newest
+    cache.put("c", {"status": "passed"})
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire(monkeypatch):
+    import judge_cache
+
+    now = [100.0]
+    monkeypatch.setattr(judge_cache.time, "monotonic", lambda: now[0])
+    cache = JudgeCache(ttl_sec=10)
+    cache.put("a", {"status": "passed"})
+    now[0] += 9
+    assert cache.get("a") is not None
+    now[0] += 2
+    assert cache.get("a") is None and cache.stats()["size"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = JudgeCache(max_entries=0)
+    cache.put("a", {"status": "passed"})
+    assert cache.get("a") is None
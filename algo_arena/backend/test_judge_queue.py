@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from judge_queue import PRIORITY_FINAL, PRIORITY_PRACTICE, JudgeScheduler, QueueFull
+
+
+class Gate:
+    """A judge call that blocks until released, recording the order it ran in."""
+
+    def __init__(self):
+        self.order = []
+        self.running = 0
+        self.most_running = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, name):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        self.order.append(name)
+        try:
+            await self.release.wait()
+            return name
+        finally:
+            self.running -= 1
+
+
+async def settle():
+    # Lets queued jobs reach a free worker
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def submit_all(scheduler, gate, jobs, **kwargs) -> list:
+    """Submits (name, priority) pairs one after the other, as requests would arrive."""
+    tasks = []
+    for name, priority in jobs:
+        tasks.append(asyncio.create_task(scheduler.submit(priority, gate, name, **kwargs)))
+        await settle()
+    return tasks
+
+
+def test_in_flight_never_exceeds_concurrency():
+    async def scenario():
+        gate = Gate()
+        scheduler = JudgeScheduler(concurrency=2, max_queue=10)
+        jobs = await submit_all(scheduler, gate, [(i, PRIORITY_FINAL) for i in range(5)])
+        assert scheduler.in_flight == 2 and scheduler.depth == 3
+
+        gate.release.set()
+        results = await asyncio.gather(*jobs)
+        await scheduler.close()
+        return gate, results, scheduler.stats()
+
+    gate, results, stats = asyncio.run(scenario())
+    assert gate.most_running == 2
+    assert [name for name, _ in results] == [0, 1, 2, 3, 4]
+    assert stats["completed"] == 5 and stats["in_flight"] == 0
+
+
+def test_finals_jump_ahead_of_practice_runs():
+    async def scenario():
+        gate = Gate()
+        scheduler = JudgeScheduler(concurrency=1, max_queue=10)
+        # "busy" takes the only worker, the rest wait
+        jobs = await submit_all(
+            scheduler,
+            gate,
+            [
+                ("busy", PRIORITY_PRACTICE),
+                ("practice-1", PRIORITY_PRACTICE),
+                ("final-1", PRIORITY_FINAL),
+                ("practice-2", PRIORITY_PRACTICE),
+                ("final-2", PRIORITY_FINAL),
+            ],
+        )
+
+        gate.release.set()
+        await asyncio.gather(*jobs)
+        await scheduler.close()
+        return gate.order
+
+    # Same priority keeps arrival order
+    assert asyncio.run(scenario()) == ["busy", "final-1", "final-2", "practice-1", "practice-2"]
+
+
+def test_full_queue_rejects_with_a_retry_hint():
+    async def scenario():
+        gate = Gate()
+        scheduler = JudgeScheduler(concurrency=1, max_queue=2)
+        scheduler.avg_judge_sec = 3.0
+        # One running, two waiting
+        jobs = await submit_all(scheduler, gate, [(i, PRIORITY_FINAL) for i in range(3)])
+        with pytest.raises(QueueFull) as rejected:
+            await scheduler.submit(PRIORITY_FINAL, gate, "one too many")
+
+        gate.release.set()
+        await asyncio.gather(*jobs)
+        await scheduler.close()
+        return rejected.value, scheduler.stats()
+
+    rejected, stats = asyncio.run(scenario())
+    # Two jobs ahead, one worker, 3s each
+    assert rejected.retry_after == 6
+    assert stats["rejected"] == 1 and stats["completed"] == 3
+
+
+def test_errors_reach_the_caller_and_free_the_worker():
+    async def fail():
+        raise RuntimeError("engine down")
+
+    async def ok():
+        return "fine"
+
+    async def scenario():
+        scheduler = JudgeScheduler(concurrency=1, max_queue=10)
+        with pytest.raises(RuntimeError, match="engine down"):
+            await scheduler.submit(PRIORITY_FINAL, fail)
+        result, wait_ms = await scheduler.submit(PRIORITY_FINAL, ok)
+        await scheduler.close()
+        return result, wait_ms, scheduler.in_flight
+
+    result, wait_ms, in_flight = asyncio.run(scenario())
+    assert result == "fine" and wait_ms >= 0 and in_flight == 0
+
+
+def test_on_queued_hears_the_depth_and_wait():
+    async def scenario():
+        gate = Gate()
+        heard = []
+
+        async def on_queued(info):
+            heard.append(info)
+
+        scheduler = JudgeScheduler(concurrency=1, max_queue=10)
+        scheduler.avg_judge_sec = 2.0
+        jobs = await submit_all(
+            scheduler, gate, [(i, PRIORITY_FINAL) for i in range(3)], on_queued=on_queued
+        )
+        gate.release.set()
+        await asyncio.gather(*jobs)
+        await scheduler.close()
+        return heard
+
+    heard = asyncio.run(scenario())
+    assert [info["queue_depth"] for info in heard] == [1, 1, 2]
+    assert heard[-1]["estimated_wait_sec"] == 2.0
@@ -0,0 +1,89 @@
+import asyncio
+import shutil
+
+import pytest
+
+import harness
+from executor import LocalExecutor
+from harness import FrameDecoder, JudgeHarness
+from languages import ALL_LANGUAGES, enabled_languages
+
+PROBLEM = {
+    "id": "label-sum",
+    "public_tests": [
+        {"input": {"nums": [1, 2, 3], "name": "ab"}, "expected": "ab6"},
+        {"input": {"nums": [], "name": ""}, "expected": "0"},
+    ],
+    "hidden_tests": [
+        {"input": {"nums": [-5, 10**12], "name": "x y"}, "expected": "x y999999999995"},
+    ],
+}
+
+# (toolchain on PATH, a correct solution)
+SOLUTIONS = {
+    "python": (None, "def solution(nums, name):\n    return name + str(sum(nums))\n"),
+    "javascript": (
+        "node",
+        "function solution(nums, name) {\n  return name + nums.reduce((a, b) => a + b, 0);\n}\n",
+    ),
+    "cpp": (
+        "g++",
+        "string solution(vector<long long>& nums, string& name) {\n"
+        "    long long total = 0;\n"
+        "    for (long long n : nums) total += n;\n"
+        "    return name + to_string(total);\n"
+        "}\n",
+    ),
+    "java": (
+        "javac",
+        "class Solution {\n"
+        "    public String solution(long[] nums, String name) {\n"
+        "        long total = 0;\n"
+        "        for (long n : nums) total += n;\n"
+        "        return name + total;\n"
+        "    }\n"
+        "}\n",
+    ),
+}
+
+
+def judge(language: str, code: str) -> list:
+    """Per-test verdicts from a real local run, unsandboxed."""
+    adapter = ALL_LANGUAGES[language]
+    problem = JudgeHarness(PROBLEM)
+
+    async def run():
+        executor = LocalExecutor(pool_size=1, cpu_time_sec=10, wall_time_sec=60, memory_mb=512)
+        try:
+            return await executor.run(
+                adapter.source(problem, code), adapter.stdin(problem), language=adapter
+            )
+        finally:
+            await executor.close()
+
+    result = asyncio.run(run())
+    records = {r["i"]: r for r in FrameDecoder().feed(result["stdout"].encode()) if "i" in r}
+    assert not result["timed_out"], result["stderr"]
+    return [
+        harness.test_passed(records.get(i, {}), test) for i, test in enumerate(problem.tests)
+    ]
+
+
+@pytest.mark.parametrize("language", sorted(SOLUTIONS))
+def test_adapter_judges_a_correct_solution(language):
+    tool, code = SOLUTIONS[language]
+    if tool and shutil.which(tool) is None:
+        pytest.skip(f"{tool} is not installed")
+    assert judge(language, code) == [True, True, True]
+
+
+def test_enabled_languages():
+    assert list(enabled_languages("python, cpp")) == ["python", "cpp"]
+    with pytest.raises(ValueError):
+        enabled_languages("python,cobol")
+    with pytest.raises(ValueError):
+        enabled_languages("cpp")
+
+
+def test_wrong_answers_are_caught():
+    assert judge("python", "def solution(nums, name):\n    return name\n") == [False, False, False]
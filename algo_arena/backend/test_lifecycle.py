@@ -0,0 +1,69 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from lifecycle import RoomLifecycle
+from room_store import MemoryRoomStore
+from rooms import Room
+
+
+def room(time_limit_sec: int = 600, status: str = "waiting") -> Room:
+    return Room(room_id="room-1", problem_id="p", time_limit_sec=time_limit_sec, status=status)
+
+
+def expires_in(lifecycle, room_id: str) -> float:
+    return lifecycle.timers.deadline(room_id) - time.monotonic()
+
+
+@pytest.mark.parametrize("time_limit_sec", [60, 600, 4 * 60 * 60])
+def test_active_rooms_expire_a_grace_period_after_ends_at(time_limit_sec):
+    lifecycle = RoomLifecycle(MemoryRoomStore(), ttls={"active": 300})
+    active = room(time_limit_sec)
+    active.start()
+    lifecycle.track(active)
+    # Long matches are no longer cut short by a fixed TTL
+    assert expires_in(lifecycle, "room-1") == pytest.approx(time_limit_sec + 300, abs=1)
+
+
+def test_overdue_active_room_expires_after_the_grace_only():
+    lifecycle = RoomLifecycle(MemoryRoomStore(), ttls={"active": 300})
+    overdue = room(600)
+    overdue.start(datetime.now() - timedelta(seconds=1000))
+    lifecycle.track(overdue)
+    assert expires_in(lifecycle, "room-1") == pytest.approx(0, abs=1)
+
+
+def test_other_states_count_from_the_change():
+    lifecycle = RoomLifecycle(MemoryRoomStore(), ttls={"waiting": 30, "finished": 10})
+    waiting = room()
+    lifecycle.track(waiting)
+    assert expires_in(lifecycle, "room-1") == pytest.approx(30, abs=1)
+    waiting.status = "finished"
+    lifecycle.track(waiting)
+    assert expires_in(lifecycle, "room-1") == pytest.approx(10, abs=1)
+
+
+def test_sweep_evicts_expired_rooms_and_follows_status_changes():
+    async def scenario():
+        store = MemoryRoomStore()
+        lifecycle = RoomLifecycle(store, ttls={"waiting": 0, "active": 300})
+        await store.create(room())
+        lifecycle.track(await store.get("room-1"))
+
+        # Another worker started the match meanwhile: the clock restarts for that
+        await store.update("room-1", lambda current: current.start())
+        await lifecycle.sweep()
+        started = await store.get("room-1")
+        restarted = expires_in(lifecycle, "room-1")
+
+        await store.update("room-1", lambda current: setattr(current, "status", "waiting"))
+        lifecycle.track(await store.get("room-1"))
+        await lifecycle.sweep()
+        return started, restarted, await store.get("room-1"), lifecycle.stats()
+
+    started, restarted, evicted, stats = asyncio.run(scenario())
+    assert started is not None
+    assert restarted == pytest.approx(600 + 300, abs=1)
+    assert evicted is None and stats["evicted"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import fakeredis.aioredis
+
+from match_timer import MatchTimer, RedisClockLease
+
+
+class Calls:
+    def __init__(self):
+        self.timeouts = []
+        self.ticks = []
+
+    async def on_timeout(self, room_id):
+        self.timeouts.append(room_id)
+
+    async def on_tick(self, room_id, remaining):
+        self.ticks.append(room_id)
+
+
+def make_timer(calls, lease=None, tick_sec=0.05):
+    return MatchTimer(calls.on_timeout, calls.on_tick, tick_sec=tick_sec, lease=lease)
+
+
+async def run_for(seconds, *timers):
+    tasks = [asyncio.create_task(timer.run(resolution_sec=0.01)) for timer in timers]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+
+
+def test_schedules_from_ends_at():
+    async def scenario():
+        calls = Calls()
+        timer = make_timer(calls)
+        # Started elsewhere with 0.1s left, not a fresh time limit
+        timer.start("room", datetime.now() + timedelta(seconds=0.1))
+        assert 0 < timer.remaining("room") <= 0.1
+        await run_for(0.2, timer)
+        assert calls.timeouts == ["room"]
+
+    asyncio.run(scenario())
+
+
+def test_match_past_its_end_ends_on_the_next_poll():
+    async def scenario():
+        calls = Calls()
+        timer = make_timer(calls)
+        timer.start("room", datetime.now() - timedelta(minutes=5))
+        await timer.poll()
+        assert calls.timeouts == ["room"]
+        assert calls.ticks == []
+
+    asyncio.run(scenario())
+
+
+def test_one_worker_owns_each_clock():
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis()
+        calls = [Calls(), Calls()]
+        timers = [
+            make_timer(c, RedisClockLease(client, prefix="test", ttl_sec=1.0)) for c in calls
+        ]
+        ends_at = datetime.now() + timedelta(seconds=0.3)
+        for timer in timers:
+            timer.start("room", ends_at)
+        await run_for(0.4, *timers)
+
+        owners = [c for c in calls if c.timeouts]
+        assert len(owners) == 1 and owners[0].timeouts == ["room"]
+        # Only the owner ticked
+        assert owners[0].ticks and not [c for c in calls if c is not owners[0]][0].ticks
+
+    asyncio.run(scenario())
+
+
+def test_another_worker_takes_over_an_expired_lease():
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis()
+        gone = RedisClockLease(client, prefix="test", ttl_sec=0.1)
+        assert await gone.held("room")  # then the worker dies
+
+        calls = Calls()
+        timer = make_timer(calls, RedisClockLease(client, prefix="test", ttl_sec=0.1))
+        timer.start("room", datetime.now())
+        await timer.poll()
+        assert calls.timeouts == []
+        await run_for(0.3, timer)
+        assert calls.timeouts == ["room"]
+
+    asyncio.run(scenario())
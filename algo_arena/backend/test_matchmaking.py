@@ -0,0 +1,70 @@
+import pytest
+
+import matchmaking
+from matchmaking import Matchmaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(matchmaking.time, "monotonic", lambda: Clock.now)
+    return Clock
+
+
+def test_same_band_pairs_at_once(clock):
+    mm = Matchmaker(band_width=100)
+    ticket, opponent = mm.enqueue("alice", "Easy", 1210)
+    assert opponent is None and "alice" in mm
+    ticket, opponent = mm.enqueue("bob", "easy", 1290)
+    assert opponent.username == "alice" and len(mm) == 0
+    assert mm.stats()["pairs_made"] == 1
+
+
+def test_difficulties_and_unrated_players_stay_apart(clock):
+    mm = Matchmaker(band_width=100)
+    mm.enqueue("alice", "easy", 1200)
+    assert mm.enqueue("bob", "hard", 1200)[1] is None
+    assert mm.enqueue("carol", "easy", None)[1] is None
+    assert mm.enqueue("dave", "easy", None)[1].username == "carol"
+    assert len(mm) == 2
+
+
+def test_search_widens_while_waiting(clock):
+    mm = Matchmaker(band_width=100, widen_every_sec=10, max_bands=5)
+    mm.enqueue("alice", "easy", 1200)
+    mm.enqueue("bob", "easy", 1420)  # two bands away
+    assert mm.sweep() == []
+
+    clock.now += 10  # one band of reach
+    assert mm.sweep() == []
+    clock.now += 10  # two
+    (first, second), = mm.sweep()
+    assert {first.username, second.username} == {"alice", "bob"}
+    assert mm.stats()["median_wait_sec"] == 20.0
+
+
+def test_newcomer_meets_a_widened_neighbour(clock):
+    mm = Matchmaker(band_width=100, widen_every_sec=10, max_bands=5)
+    mm.enqueue("alice", "easy", 1200)
+    clock.now += 10
+    # alice now reaches one band, so bob pairs on arrival
+    assert mm.enqueue("bob", "easy", 1350)[1].username == "alice"
+
+
+def test_cancel_only_touches_own_ticket(clock):
+    mm = Matchmaker()
+    mm.enqueue("alice", "easy", 1200, sid="s1")
+    assert not mm.cancel("alice", sid="s2")
+    assert mm.cancel("alice", sid="s1")
+    assert not mm.cancel("alice")
+    assert mm.enqueue("bob", "easy", 1200)[1] is None
+
+
+def test_requeue_replaces_the_old_ticket(clock):
+    mm = Matchmaker()
+    mm.enqueue("alice", "easy", 1200)
+    mm.enqueue("alice", "hard", 1200)
+    assert len(mm) == 1
+    assert mm.enqueue("bob", "easy", 1200)[1] is None
@@ -0,0 +1,104 @@
+import json
+import re
+
+from metrics import MeteredJson, MetricsRegistry
+
+# The Prometheus text exposition format, as much of it as /metrics uses
+NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+LABEL = rf'({NAME})="((?:[^"\\\n]|\\[\\n"])*)"'
+SAMPLE = re.compile(rf"^({NAME})(?:\{{((?:{LABEL},?)*)\}})? (\S+)$")
+UNESCAPE = {"\\\\": "\\", "\\n": "\n", '\\"': '"'}
+
+
+def parse(text: str) -> dict:
+    """{family: {"help", "type", "samples"}}, asserting the text is well-formed."""
+    assert text.endswith("\n")
+    families = {}
+    current = None
+    for line in text[:-1].split("\n"):
+        if line.startswith("# HELP "):
+            name, _, help = line[len("# HELP ") :].partition(" ")
+            assert name not in families, f"{name} declared twice"
+            current = families[name] = {"help": help, "type": None, "samples": []}
+        elif line.startswith("# TYPE "):
+            name, _, kind = line[len("# TYPE ") :].partition(" ")
+            assert current is families.get(name) and kind in ("counter", "gauge", "histogram")
+            current["type"] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"not a sample line: {line!r}"
+            name, labels, value = match.group(1), match.group(2) or "", match.group(5)
+            family = None
+            for candidate in (name, re.sub(r"_(bucket|sum|count)$", "", name)):
+                if candidate in families:
+                    family = candidate
+            assert family is not None and families[family] is current, f"{name} outside its family"
+            parsed = {
+                key: re.sub(r'\\[\\n"]', lambda m: UNESCAPE[m.group(0)], raw)
+                for key, raw in re.findall(LABEL, labels)
+            }
+            current["samples"].append((name, parsed, float(value)))
+    return families
+
+
+def test_counters_and_gauges_render_with_escaped_labels():
+    registry = MetricsRegistry(prefix="test")
+    events = registry.counter("events_total", "Events seen", ("event", "room"))
+    online = registry.gauge("online", "Users online")
+    events.inc("submit", 'say "hi"\\now\nthen')
+    events.inc("submit", 'say "hi"\\now\nthen', amount=2)
+    events.inc("join", "plain")
+    online.set(3)
+
+    families = parse(registry.render())
+    assert families["test_events_total"]["type"] == "counter"
+    assert families["test_events_total"]["help"] == "Events seen"
+    assert families["test_events_total"]["samples"] == [
+        ("test_events_total", {"event": "submit", "room": 'say "hi"\\now\nthen'}, 3.0),
+        ("test_events_total", {"event": "join", "room": "plain"}, 1.0),
+    ]
+    assert families["test_online"]["type"] == "gauge"
+    assert families["test_online"]["samples"] == [("test_online", {}, 3.0)]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(prefix="test")
+    latency = registry.histogram("latency_seconds", "Latency", ("phase",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, "run")
+
+    samples = parse(registry.render())["test_latency_seconds"]["samples"]
+    buckets = {labels["le"]: value for name, labels, value in samples if name.endswith("_bucket")}
+    assert buckets == {"0.1": 2, "1": 3, "+Inf": 4}
+    assert ("test_latency_seconds_sum", {"phase": "run"}, 3.65) in samples
+    assert ("test_latency_seconds_count", {"phase": "run"}, 4) in samples
+    assert latency.count("run") == 4
+
+
+def test_metered_json_records_event_sizes():
+    registry = MetricsRegistry(prefix="test")
+    sizes = registry.histogram("event_bytes", "Event size", ("event",), buckets=(16, 64))
+    encoder = MeteredJson(sizes)
+    encoded = encoder.dumps(["room_update", {"seq": 1}])
+    encoder.dumps({"not": "an event"})
+    assert encoder.loads(encoded) == ["room_update", {"seq": 1}]
+    assert sizes.count("room_update") == 1
+    assert len(sizes._series) == 1
+    assert json.loads(encoded)[0] == "room_update"
+
+
+def test_metrics_endpoint_is_valid_exposition(client):
+    # A hit and a miss first, so the catalog lookups have samples
+    client.get("/problems")
+    client.get("/problems/missing")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    families = parse(response.text)
+    assert families, "no metrics rendered"
+    for name, family in families.items():
+        assert name.startswith("algoarena_")
+        assert family["type"] is not None, f"{name} has no TYPE"
+    lookups = families["algoarena_catalog_lookups_total"]["samples"]
+    assert any(labels.get("result") == "miss" for _, labels, _ in lookups)
@@ -0,0 +1,49 @@
+import random
+
+from rank_index import RankIndex
+
+
+def brute_force(players: dict) -> list:
+    # Highest rating first, ties by username: the order RankIndex promises
+    return sorted(players.items(), key=lambda item: (-item[1], item[0]))
+
+
+def test_matches_a_full_sort_through_random_moves():
+    rng = random.Random(7)
+    index = RankIndex()
+    players = {}
+    for i in range(300):
+        name = f"p{i}"
+        players[name] = round(rng.uniform(800, 2000), 1)
+        index.add(name, players[name])
+    for _ in range(500):
+        name = rng.choice(list(players))
+        # Some land in the same whole-point bucket, some tie exactly
+        new = rng.choice([players[name] + rng.uniform(-40, 40), 1200.0])
+        index.move(name, players[name], new)
+        players[name] = new
+
+    expected = brute_force(players)
+    assert len(index) == len(players)
+    for rank, (name, rating) in enumerate(expected, start=1):
+        assert index.rank(name, rating) == rank
+    assert index.at(1) == expected[0]
+    assert index.at(len(players) + 1) is None
+    assert [(name, rating) for _, name, rating in index.range(50, 25)] == expected[49:74]
+    assert [rank for rank, _, _ in index.range(290, 50)] == list(range(290, 301))
+
+
+def test_out_of_range_ratings_share_the_end_buckets():
+    index = RankIndex(lowest=0, highest=4000)
+    index.add("low", -50.0)
+    index.add("high", 9000.0)
+    index.add("mid", 1500.0)
+    assert [name for _, name, _ in index.range(1, 3)] == ["high", "mid", "low"]
+
+
+def test_remove_unknown_player_is_a_no_op():
+    index = RankIndex()
+    index.add("alice", 1200.0)
+    assert not index.remove("alice", 1300.0)
+    assert not index.remove("bob", 1200.0)
+    assert index.remove("alice", 1200.0) and len(index) == 0
@@ -0,0 +1,125 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis.aioredis
+import pytest
+
+import rate_limit
+from rate_limit import Budget, MemoryRateLimiter, RedisRateLimiter, create_rate_limiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time for the limiter only, moved on by hand."""
+    now = SimpleNamespace(value=1000.0)
+    fake = SimpleNamespace(monotonic=lambda: now.value, time=lambda: now.value)
+    monkeypatch.setattr(rate_limit, "time", fake)
+    return now
+
+
+def memory_limiter(budgets):
+    return MemoryRateLimiter(budgets)
+
+
+def redis_limiter(budgets):
+    return RedisRateLimiter(fakeredis.aioredis.FakeRedis(), budgets, prefix="test")
+
+
+LIMITERS = pytest.mark.parametrize("make_limiter", [memory_limiter, redis_limiter])
+
+
+@LIMITERS
+def test_bucket_runs_out_then_refills(make_limiter, clock):
+    async def scenario():
+        limiter = make_limiter({"submit": Budget(2, 10)})
+        spent = [await limiter.check("submit", username="alice") for _ in range(3)]
+        clock.value += 4
+        early = await limiter.check("submit", username="alice")
+        clock.value += 1
+        refilled = await limiter.check("submit", username="alice")
+        return spent, early, refilled, limiter.stats()["limited"]
+
+    spent, early, refilled, limited = asyncio.run(scenario())
+    # One token back every 5s
+    assert spent == [0, 0, 5]
+    assert early == 1
+    assert refilled == 0
+    assert limited == {"submit": 2}
+
+
+@LIMITERS
+def test_each_event_has_its_own_budget(make_limiter, clock):
+    async def scenario():
+        limiter = make_limiter({"submit": Budget(1, 30), "join": Budget(1, 60)})
+        return [
+            await limiter.check("submit", username="alice"),
+            await limiter.check("submit", username="alice"),
+            await limiter.check("join", username="alice"),
+            await limiter.check("join", username="alice"),
+        ]
+
+    assert asyncio.run(scenario()) == [0, 30, 0, 60]
+
+
+@LIMITERS
+def test_address_then_username(make_limiter, clock):
+    # The REST handlers charge the caller's address first, then the user
+    # once the request checks out; the two are separate buckets
+    async def request(limiter, address, username):
+        retry_after = await limiter.check("join", sid=f"addr:{address}")
+        if retry_after:
+            return retry_after
+        return await limiter.check("join", username=username)
+
+    async def scenario():
+        limiter = make_limiter({"join": Budget(2, 60)})
+        return [
+            await request(limiter, "10.0.0.1", "alice"),
+            await request(limiter, "10.0.0.1", "alice"),
+            # The address is spent, whoever it claims to be
+            await request(limiter, "10.0.0.1", "bob"),
+            # alice is spent from any address
+            await request(limiter, "10.0.0.2", "alice"),
+            await request(limiter, "10.0.0.3", "bob"),
+        ]
+
+    assert asyncio.run(scenario()) == [0, 0, 30, 30, 0]
+
+
+@LIMITERS
+def test_disabled_budget_never_limits(make_limiter, clock):
+    async def scenario():
+        limiter = make_limiter({"submit": Budget.parse("0"), "join": Budget(1, 60)})
+        return [await limiter.check("submit", username="alice") for _ in range(50)]
+
+    assert set(asyncio.run(scenario())) == {0}
+
+
+def test_budget_parse():
+    assert Budget.parse("") is None
+    assert Budget.parse("0") is None
+    assert Budget.parse("off") is None
+    budget = Budget.parse("5/30")
+    assert (budget.capacity, budget.per_sec) == (5, 5 / 30)
+
+
+def test_memory_sweep_drops_refilled_buckets(clock):
+    async def scenario():
+        limiter = MemoryRateLimiter({"submit": Budget(2, 10)})
+        await limiter.check("submit", username="alice", sid="s1")
+        clock.value += 4
+        kept = limiter.sweep()
+        clock.value += 1
+        return kept, limiter.sweep(), limiter.stats()["buckets"]
+
+    assert asyncio.run(scenario()) == (0, 2, 0)
+
+
+def test_budgets_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_SUBMIT", "3/9")
+    monkeypatch.setenv("RATE_LIMIT_CREATE_ROOM", "0")
+    limiter = create_rate_limiter(room_store=None)
+    assert isinstance(limiter, MemoryRateLimiter)
+    assert limiter.budgets["submit"].capacity == 3
+    assert "create_room" not in limiter.budgets
+    assert "join" in limiter.budgets
@@ -0,0 +1,105 @@
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from ratings import JsonlRatingLog, MemoryRatingBook, PlayerRating, RedisRatingBook
+
+
+def memory_book():
+    return MemoryRatingBook()
+
+
+def redis_book(client=None):
+    return RedisRatingBook(client or fakeredis.aioredis.FakeRedis(), prefix="test")
+
+
+BOOKS = [memory_book, redis_book]
+
+
+@pytest.mark.parametrize("make_book", BOOKS)
+def test_winner_gains_what_loser_loses(make_book):
+    async def scenario():
+        book = make_book()
+        changes = await book.record_match(["alice", "bob"], "alice", "room-1")
+        assert changes["alice"] == {"rating": 1220.0, "delta": 20.0, "rank": 1}
+        assert changes["bob"] == {"rating": 1180.0, "delta": -20.0, "rank": 2}
+        assert await book.count() == 2
+        assert (await book.get("bob")).losses == 1
+        assert await book.rating_of("carol") == book.default_rating
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("make_book", BOOKS)
+def test_room_is_rated_once(make_book):
+    async def scenario():
+        book = make_book()
+        assert await book.record_match(["alice", "bob"], "alice", "room-1")
+        assert await book.record_match(["alice", "bob"], "alice", "room-1") == {}
+        assert (await book.get("alice")).games == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("make_book", BOOKS)
+def test_winner_must_have_played(make_book):
+    async def scenario():
+        book = make_book()
+        with pytest.raises(ValueError):
+            await book.record_match(["alice", "bob"], "mallory", "room-1")
+        # Nothing was rated, so the room can still be
+        assert await book.count() == 0
+        assert await book.record_match(["alice", "bob"], None, "room-1")
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("make_book", BOOKS)
+def test_leaderboard_and_around(make_book):
+    async def scenario():
+        book = make_book()
+        for i in range(5):
+            await book.record_match([f"p{i}", f"q{i}"], f"p{i}", f"room-{i}")
+        top = await book.top(limit=3)
+        assert [entry["rank"] for entry in top] == [1, 2, 3]
+        assert all(entry["username"].startswith("p") for entry in top)
+
+        (middle,) = await book.top(limit=1, offset=4)
+        around = await book.around(middle["username"], radius=1)
+        assert [entry["rank"] for entry in around] == [4, 5, 6]
+        assert around[1] == middle
+        assert await book.around("nobody") == []
+
+    asyncio.run(scenario())
+
+
+def test_redis_workers_share_one_book():
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis()
+        first, second = redis_book(client), redis_book(client)
+        await first.record_match(["alice", "bob"], "alice", "room-1")
+        # The other worker sees the rating and won't rate the same room again
+        assert await second.rating_of("alice") == 1220.0
+        assert await second.record_match(["alice", "bob"], "alice", "room-1") == {}
+        await second.record_match(["alice", "bob"], "alice", "room-2")
+        assert (await first.get("alice")).games == 2
+
+    asyncio.run(scenario())
+
+
+def test_redis_book_imports_the_log_once(tmp_path):
+    async def scenario():
+        log = JsonlRatingLog(str(tmp_path / "ratings.jsonl"))
+        await log.save([PlayerRating("alice", 1500.0, games=30)])
+        client = fakeredis.aioredis.FakeRedis()
+        book = RedisRatingBook(client, prefix="test", seed=log)
+        await book.load()
+        assert (await book.get("alice")).rating == 1500.0
+        assert await book.rank("alice") == 1
+
+        await book.record_match(["alice", "bob"], "bob", "room-1")
+        await book.load()  # not empty any more, so nothing is overwritten
+        assert (await book.get("alice")).rating < 1500.0
+
+    asyncio.run(scenario())
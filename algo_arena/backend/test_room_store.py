@@ -0,0 +1,161 @@
+import asyncio
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from room_store import MemoryRoomStore, RedisRoomStore, _decode, _encode
+from rooms import Room, Submission
+
+
+class RedisWorkers:
+    """A RedisRoomStore plus a second client standing in for another worker."""
+
+    def __init__(self):
+        server = fakeredis.FakeServer()
+        self.store = RedisRoomStore(
+            client=fakeredis.aioredis.FakeRedis(server=server), prefix="test"
+        )
+        self.other = fakeredis.FakeRedis(server=server)
+
+    def commit_elsewhere(self, room_id: str, mutate):
+        # What another worker's update looks like from here: a write between
+        # our WATCH and EXEC
+        key = self.store._key(room_id)
+        room = _decode(self.other.get(key))
+        mutate(room)
+        room.touch()
+        self.other.set(key, _encode(room))
+
+
+def new_room(*players) -> Room:
+    room = Room(room_id="room-1", problem_id="two-sum", time_limit_sec=60)
+    for name in players:
+        room.add_player(name)
+    return room
+
+
+def join(username, refused):
+    # The join_room update: admit into a free seat, start the match at two.
+    # Like the handlers, it reports from scratch on every attempt
+    def add_player(room):
+        refused.discard(username)
+        if username not in room.players and len(room.players) >= 2:
+            refused.add(username)
+            return
+        room.add_player(username)
+        if len(room.players) == 2 and room.status == "waiting":
+            room.start()
+        room.bump()
+
+    return add_player
+
+
+def submit(username, ended):
+    def record(room):
+        room.record(Submission(username, "passed", 5, 5))
+        if room.all_submitted:
+            room.status = "finished"
+            ended.append(username)
+        room.bump()
+
+    return record
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return MemoryRoomStore()
+    return RedisWorkers().store
+
+
+def test_update_round_trips_the_room(store):
+    async def scenario():
+        await store.create(new_room("alice"))
+        room = await store.update("room-1", join("bob", set()))
+        assert room.status == "active" and room.usernames == ["alice", "bob"]
+        stored = await store.get("room-1")
+        assert stored.usernames == ["alice", "bob"] and stored.seq == 1
+        assert stored.ends_at == room.ends_at
+        assert await store.update("missing", join("bob", set())) is None
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_joins_fill_two_seats(store):
+    async def scenario():
+        await store.create(new_room("alice"))
+        refused = set()
+        await asyncio.gather(
+            *(store.update("room-1", join(name, refused)) for name in ("bob", "carol", "dave"))
+        )
+        room = await store.get("room-1")
+        assert len(room.players) == 2 and len(refused) == 2
+        assert room.status == "active" and room.seq == 1
+
+    asyncio.run(scenario())
+
+
+def test_watch_retries_when_another_worker_commits_first():
+    async def scenario():
+        workers = RedisWorkers()
+        await workers.store.create(new_room("alice"))
+        refused = set()
+        attempts = []
+        carol_joins = join("carol", refused)
+
+        def racing_join(room):
+            attempts.append(room.usernames)
+            if len(attempts) == 1:
+                # bob takes the seat after we read the room, before we write
+                workers.commit_elsewhere("room-1", join("bob", set()))
+            carol_joins(room)
+
+        room = await workers.store.update("room-1", racing_join)
+        # The first attempt was thrown away and rerun on bob's version
+        assert attempts == [["alice"], ["alice", "bob"]]
+        assert refused == {"carol"}
+        assert room.usernames == ["alice", "bob"] and room.status == "active"
+        assert (await workers.store.get("room-1")).usernames == ["alice", "bob"]
+
+    asyncio.run(scenario())
+
+
+def test_racing_submissions_end_the_match_once():
+    async def scenario():
+        workers = RedisWorkers()
+        room = new_room("alice", "bob")
+        room.start()
+        await workers.store.create(room)
+        ended = []
+        alice_submits = submit("alice", ended)
+        attempts = 0
+
+        def racing_submit(room):
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                workers.commit_elsewhere("room-1", submit("bob", ended))
+            alice_submits(room)
+
+        room = await workers.store.update("room-1", racing_submit)
+        # Without the retry alice's write would have dropped bob's submission
+        assert sorted(room.submissions) == ["alice", "bob"]
+        assert room.status == "finished" and ended == ["alice"]
+        assert room.seq == 2
+
+    asyncio.run(scenario())
+
+
+def test_details_and_delete(store):
+    async def scenario():
+        await store.create(new_room("alice"))
+        await store.save_details("room-1", "alice", {"code": "x = 1"})
+        assert await store.get_details("room-1", "alice") == {"code": "x = 1"}
+        assert await store.count() == 1
+        assert await store.count_by_status() == {"waiting": 1}
+        await store.delete("room-1")
+        assert await store.get("room-1") is None
+        assert await store.get_details("room-1", "alice") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+import asyncio
+
+from rooms import Room
+from spectators import SpectatorFeed
+
+
+class Sink:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, item):
+        self.sent.append(item)
+
+
+def room(seq: int, status: str = "active") -> Room:
+    return Room(room_id="room-1", problem_id="p", time_limit_sec=60, status=status, seq=seq)
+
+
+def test_spectator_feed_sends_latest_state_once():
+    async def scenario():
+        sink = Sink()
+        feed = SpectatorFeed(sink)
+        feed.publish(room(1))  # nobody watches yet
+        feed.watch("sid-1", "room-1")
+        for seq in (2, 3, 4):
+            feed.publish(room(seq))
+        await feed.flush()
+        assert [r.seq for r in sink.sent] == [4]
+        assert feed.coalesced == 2
+
+        feed.publish(room(4))  # no change since the last send
+        await feed.flush()
+        assert len(sink.sent) == 1
+
+    asyncio.run(scenario())
+
+
+def test_spectator_feed_sends_everything_when_watchers_may_be_elsewhere():
+    async def scenario():
+        sink = Sink()
+        feed = SpectatorFeed(sink, only_watched=False)
+        feed.publish(room(1))
+        feed.publish(room(2, "finished"))
+        await feed.flush()
+        assert [(r.seq, r.status) for r in sink.sent] == [(2, "finished")]
+        assert feed._sent_seq == {}  # finished: nothing left to remember
+
+    asyncio.run(scenario())
@@ -0,0 +1,252 @@
+import json
+import uuid
+
+import pytest
+
+from executor import Executor, ExecutorError, StopRun
+from harness import POLICY_FAIL_FAST, POLICY_FULL, POLICY_PUBLIC_FIRST, encode_frame
+
+
+class FakeExecutor(Executor):
+    """
+    Answers every test in the job from `answers` (input -> actual), without
+    running anything. Tests listed in `wrong` get a wrong answer. Every run
+    is recorded as the number of tests it was given and how many it answered.
+    """
+
+    def __init__(self, streams: bool = True):
+        self.streams = streams
+        self.answers = {}
+        self.wrong = set()
+        self.runs = []
+        self.fail = None  # an exception to raise instead of running
+        self.crash = False  # exit before the closing record
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def run(self, source: str, stdin: str = "", on_output=None, language=None) -> dict:
+        if self.fail:
+            raise self.fail
+        tests = json.loads(stdin)["tests"]
+        frames = []
+        for i, test in enumerate(tests):
+            key = json.dumps(test["input"], sort_keys=True)
+            actual = "wrong" if key in self.wrong else self.answers.get(key)
+            frames.append(encode_frame({"i": i, "actual": actual, "wall_ms": 1.0, "cpu_ms": 1.0}))
+        if not self.crash:
+            frames.append(encode_frame({"done": True}))
+
+        stdout = b"".join(frames)
+        answered = len(tests)
+        stopped = False
+        if on_output:
+            # Live frame by frame, or like Piston all at once after the run
+            chunks = frames if self.streams else [stdout]
+            stdout = b""
+            for sent, chunk in enumerate(chunks, 1):
+                try:
+                    on_output(chunk)
+                except StopRun:
+                    # A live run is killed on the spot
+                    stopped = True
+                    if self.streams:
+                        answered = sent
+                    break
+        self.runs.append((len(tests), answered))
+        return {
+            "stdout": stdout.decode(),
+            "stderr": "Traceback: boom" if self.crash else "",
+            "exit_code": 1 if self.crash else 0,
+            "timed_out": False,
+            "stopped": stopped,
+            "run_ms": 5.0,
+        }
+
+
+@pytest.fixture
+def fake(app_module, monkeypatch):
+    executor = FakeExecutor()
+    monkeypatch.setattr(app_module, "executor", executor)
+    return executor
+
+
+@pytest.fixture
+def client(fake, client):
+    # The fake has to be in place before the app starts
+    return client
+
+
+def open_room(client, app_module, fake, judge_policy=None):
+    """A running room for alice and bob, with the fake primed to solve its problem."""
+    body = {"username": "alice", "difficulty": "easy"}
+    if judge_policy:
+        body["judge_policy"] = judge_policy
+    room = client.post("/rooms", json=body).json()
+    client.post(f"/rooms/{room['room_id']}/join", json={"username": "bob"})
+
+    harness = app_module.catalog.harness(room["problem"]["id"])
+    fake.answers = {
+        json.dumps(test["input"], sort_keys=True): test["expected"] for test in harness.tests
+    }
+    return room["room_id"], harness
+
+
+def fail_tests(fake, harness, *indexes):
+    fake.wrong = {json.dumps(harness.tests[i]["input"], sort_keys=True) for i in indexes}
+
+
+def submit(client, room_id, username="alice", practice=False):
+    # Unique code each time, so the judge cache never answers
+    code = f"def solution(*args):\n    return '{uuid.uuid4()}'\n"
+    return client.post(
+        f"/rooms/{room_id}/submit",
+        json={"username": username, "code": code, "practice": practice},
+    )
+
+
+# =====================================================
+# POLICIES
+# =====================================================
+def test_full_policy_judges_every_test(client, app_module, fake):
+    room_id, harness = open_room(client, app_module, fake, POLICY_FULL)
+    fail_tests(fake, harness, 0)
+    result = submit(client, room_id).json()
+    assert result["status"] == "failed"
+    assert result["total_passed"] == len(harness.tests) - 1
+    assert result["total_skipped"] == 0
+    assert fake.runs == [(len(harness.tests), len(harness.tests))]
+
+
+def test_fail_fast_stops_at_the_first_failure(client, app_module, fake):
+    room_id, harness = open_room(client, app_module, fake, POLICY_FAIL_FAST)
+    fail_tests(fake, harness, 1)
+    result = submit(client, room_id).json()
+    assert result["status"] == "failed"
+    assert result["total_passed"] == 1
+    assert result["total_skipped"] == len(harness.tests) - 2
+    assert [t["skipped"] for t in result["test_results"][:3]] == [False, False, True]
+    assert fake.runs == [(len(harness.tests), 2)]
+
+
+def test_public_first_skips_hidden_tests_after_a_public_failure(client, app_module, fake):
+    room_id, harness = open_room(client, app_module, fake, POLICY_PUBLIC_FIRST)
+    assert 0 < harness.public_count < len(harness.tests)
+    fail_tests(fake, harness, 0)
+    result = submit(client, room_id).json()
+    assert result["total_skipped"] == len(harness.tests) - 1
+    assert fake.runs == [(len(harness.tests), 1)]
+
+
+def test_public_first_runs_hidden_tests_separately_without_streaming(
+    client, app_module, fake
+):
+    fake.streams = False
+    room_id, harness = open_room(client, app_module, fake, POLICY_PUBLIC_FIRST)
+    public, hidden = harness.public_count, len(harness.tests) - harness.public_count
+
+    result = submit(client, room_id).json()
+    assert result["status"] == "passed"
+    assert fake.runs == [(public, public), (hidden, hidden)]
+
+    # A public failure means the hidden part never runs
+    fake.runs = []
+    fail_tests(fake, harness, 0)
+    result = submit(client, room_id, username="bob").json()
+    assert result["total_skipped"] == len(harness.tests) - 1
+    assert fake.runs == [(public, public)]
+
+
+def test_problem_policy_applies_when_the_room_has_none(
+    client, app_module, fake, monkeypatch
+):
+    room_id, harness = open_room(client, app_module, fake)
+    monkeypatch.setattr(harness, "default_policy", POLICY_FAIL_FAST)
+    fail_tests(fake, harness, 0)
+    submit(client, room_id)
+    assert fake.runs == [(len(harness.tests), 1)]
+
+    # Without either, the server default (full) runs everything
+    monkeypatch.setattr(harness, "default_policy", None)
+    fake.runs = []
+    submit(client, room_id, username="bob")
+    assert fake.runs == [(len(harness.tests), len(harness.tests))]
+
+
+# =====================================================
+# PRACTICE AND FINAL
+# =====================================================
+def test_practice_runs_are_not_recorded(client, app_module, fake):
+    room_id, harness = open_room(client, app_module, fake)
+    practice_before = app_module.submissions_total.value("passed", "practice")
+    final_before = app_module.submissions_total.value("passed", "final")
+
+    for username in ("alice", "bob"):
+        assert submit(client, room_id, username, practice=True).json()["status"] == "passed"
+    assert client.get(f"/rooms/{room_id}").json()["status"] == "active"
+
+    for username in ("alice", "bob"):
+        assert submit(client, room_id, username).json()["status"] == "passed"
+    assert client.get(f"/rooms/{room_id}").json()["status"] == "finished"
+
+    assert app_module.submissions_total.value("passed", "practice") == practice_before + 2
+    assert app_module.submissions_total.value("passed", "final") == final_before + 2
+
+
+def test_submitted_code_is_shown_once_the_match_is_over(client, app_module, fake):
+    room_id, _ = open_room(client, app_module, fake)
+    submit(client, room_id, "alice")
+    # Not even with the owner's name in the query
+    hidden = client.get(f"/rooms/{room_id}/submissions/alice", params={"viewer": "alice"})
+    assert hidden.status_code == 403
+
+    submit(client, room_id, "bob")
+    details = client.get(f"/rooms/{room_id}/submissions/alice")
+    assert details.status_code == 200
+    assert details.json()["code"].startswith("def solution")
+
+
+# =====================================================
+# ERRORS
+# =====================================================
+def test_engine_failure_is_reported_as_an_error_verdict(client, app_module, fake):
+    room_id, harness = open_room(client, app_module, fake)
+    fake.fail = ExecutorError("connection refused")
+    response = submit(client, room_id)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["status"] == "error"
+    assert result["stderr"] == "Execution engine unreachable: connection refused"
+    assert result["total_tests"] == len(harness.tests)
+
+
+def test_crash_before_the_closing_record_is_an_error(client, app_module, fake):
+    room_id, _ = open_room(client, app_module, fake)
+    fake.crash = True
+    fake.streams = False
+    result = submit(client, room_id).json()
+    assert result["status"] == "error"
+    assert result["stderr"] == "Traceback: boom"
+
+
+def test_full_judge_queue_answers_429(client, app_module, fake, monkeypatch):
+    room_id, _ = open_room(client, app_module, fake)
+    monkeypatch.setattr(app_module.judge_scheduler, "max_queue", 0)
+    response = submit(client, room_id)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.json()["detail"]["retry_after"] >= 1
+
+
+def test_submit_checks_the_room_and_player(client, app_module, fake):
+    room_id, _ = open_room(client, app_module, fake)
+    assert submit(client, "no-such-room").status_code == 404
+    assert submit(client, room_id, username="mallory").status_code == 403
+    response = client.post(
+        f"/rooms/{room_id}/submit",
+        json={"username": "alice", "code": "x", "language": "cobol"},
+    )
+    assert response.status_code == 400
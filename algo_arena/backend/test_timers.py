@@ -0,0 +1,32 @@
+from timers import TimerHeap
+
+
+def test_pops_due_keys_in_deadline_order():
+    heap = TimerHeap()
+    heap.schedule("c", 3.0, "third")
+    heap.schedule("a", 1.0, "first")
+    heap.schedule("b", 2.0, "second")
+    assert heap.pop_expired(2.5) == [("a", "first"), ("b", "second")]
+    assert "c" in heap and len(heap) == 1
+    assert heap.pop_expired(2.9) == []
+
+
+def test_reschedule_and_cancel_skip_stale_entries():
+    heap = TimerHeap()
+    heap.schedule("a", 1.0)
+    heap.schedule("a", 5.0, "later")
+    heap.schedule("b", 1.0)
+    heap.cancel("b")
+    assert heap.pop_expired(2.0) == []
+    assert heap.deadline("a") == 5.0 and heap.deadline("b") is None
+    assert heap.pop_expired(5.0) == [("a", "later")]
+    assert len(heap) == 0
+
+
+def test_dead_entries_are_compacted():
+    heap = TimerHeap()
+    for i in range(5000):
+        heap.schedule("same", float(i + 10))
+    heap.pop_expired(0.0)
+    assert len(heap._heap) <= 2 * len(heap) + 1024
+    assert heap.deadline("same") == 5009.0
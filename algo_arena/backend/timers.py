@@ -0,0 +1,57 @@
+"""
+AlgoArena Timer Heap
+Keyed deadlines on a min-heap, drained by a single periodic task.
+
+Rescheduling a key just pushes a new entry. The old one stays in the heap
+and is skipped when it surfaces, so schedule() is O(log n) and draining
+costs O(expired log n) instead of scanning every key.
+"""
+
+import heapq
+import itertools
+
+
+class TimerHeap:
+    def __init__(self):
+        self._heap = []
+        self._live = {}  # key -> (deadline, seq) of its current entry
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, key):
+        return key in self._live
+
+    def schedule(self, key, deadline: float, payload=None):
+        seq = next(self._seq)
+        self._live[key] = (deadline, seq)
+        heapq.heappush(self._heap, (deadline, seq, key, payload))
+
+    def cancel(self, key):
+        self._live.pop(key, None)
+
+    def deadline(self, key):
+        entry = self._live.get(key)
+        return entry[0] if entry else None
+
+    def pop_expired(self, now: float) -> list:
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, seq, key, payload = heapq.heappop(self._heap)
+            # Skip entries that were rescheduled or cancelled since
+            if self._live.get(key) != (deadline, seq):
+                continue
+            del self._live[key]
+            expired.append((key, payload))
+
+        # Lots of dead entries: rebuild so the heap doesn't grow forever
+        if len(self._heap) > 2 * len(self._live) + 1024:
+            self._heap = [
+                entry
+                for entry in self._heap
+                if self._live.get(entry[2]) == (entry[0], entry[1])
+            ]
+            heapq.heapify(self._heap)
+
+        return expired